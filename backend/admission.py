@@ -0,0 +1,195 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, NamedTuple, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config import (
+    ADMISSION_MAX_CONCURRENT, ADMISSION_ENDPOINT_CONCURRENCY, ADMISSION_ENDPOINT_LIMITS,
+    ADMISSION_QUEUE_SECONDS, ADMISSION_RETRY_AFTER_SECONDS
+)
+from metrics import ADMISSION_REJECTED, ADMISSION_WAIT, route_template
+
+
+class AdmissionClass(NamedTuple):
+    # Lower is served first when slots free up
+    priority: int
+    # Fraction of ADMISSION_MAX_CONCURRENT requests of this class may occupy
+    share: float
+    # Concurrent requests per endpoint (None: bounded by the global limit only)
+    endpoint_limit: Optional[int]
+    # Seconds a request may wait for a slot before it is shed
+    queue_seconds: float
+
+
+# Alert sends may use every slot and wait longest. Public flood-event
+# traffic (predictions, evacuation routes) is capped below the total so
+# alerts always find room, and dashboard/history reads are capped lower
+# still and shed first.
+ADMISSION_CLASSES = {
+    "critical": AdmissionClass(0, 1.0, None, ADMISSION_QUEUE_SECONDS * 5),
+    "standard": AdmissionClass(1, 0.8, ADMISSION_ENDPOINT_CONCURRENCY, ADMISSION_QUEUE_SECONDS),
+    "background": AdmissionClass(2, 0.5, ADMISSION_ENDPOINT_CONCURRENCY, ADMISSION_QUEUE_SECONDS / 2)
+}
+
+# Route templates outside the "standard" class
+ROUTE_CLASSES = {
+    "/alerts/send": "critical",
+    "/alerts/bulk": "critical",
+    "/dashboard/stats": "background",
+    "/predictions/": "background",
+    "/predictions/history/{region}": "background",
+    "/alerts/": "background",
+    "/alerts/history/{user_id}": "background",
+    "/resources/status/{region}": "background",
+    "/resources/inventory": "background",
+    "/routes/traffic/{region}": "background"
+}
+
+# Never queued: probes, scrapes and the profiling switch must answer during
+# overload, and the event stream holds its connection open for as long as
+# the client stays
+EXEMPT_ROUTES = {"/health", "/ready", "/metrics", "/dashboard/events", "/debug/profiling", "/debug/profiling/{name}"}
+
+
+def parse_endpoint_limits(spec: str) -> Dict[str, int]:
+    """
+    "/routes/evacuation=16,/predictions/{region}=24" -> {route: limit}
+    """
+    limits = {}
+    for part in spec.split(","):
+        route, _, limit = part.strip().rpartition("=")
+        if route:
+            limits[route] = int(limit)
+    return limits
+
+
+class Gate:
+    """
+    Counting semaphore whose waiters are woken by priority, then arrival,
+    and give up after a timeout. A request may only take a slot while fewer
+    than ``capacity * share`` are in use, so low-share classes leave
+    headroom for the others.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    def _admits(self, share: float) -> bool:
+        return self.active < max(1, math.floor(self.capacity * share))
+
+    def _prune(self):
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+
+    async def acquire(self, priority: int, share: float, timeout: float) -> bool:
+        self._prune()
+        if self._admits(share) and (not self._waiters or self._waiters[0][0] > priority):
+            self.active += 1
+            return True
+        if timeout <= 0:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), share, future))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the client went away
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._prune()
+        while self._waiters and self._admits(self._waiters[0][2]):
+            future = heapq.heappop(self._waiters)[3]
+            if not future.done():
+                self.active += 1
+                future.set_result(True)
+            self._prune()
+
+
+class AdmissionMiddleware:
+    """
+    Per-endpoint concurrency limits with queue-time budgets.
+
+    A request takes a slot for its endpoint and one from the global pool,
+    waiting at most its class's queue budget for them. If the budget runs
+    out it is answered at once with 503 and Retry-After, rather than
+    queueing until upstream timeouts cascade. Slots are held until the
+    response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, fastapi_app=None, max_concurrent: int = None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.pool = Gate(max_concurrent or ADMISSION_MAX_CONCURRENT)
+        self.endpoint_limits = parse_endpoint_limits(ADMISSION_ENDPOINT_LIMITS)
+        self.endpoints: Dict[str, Gate] = {}
+
+    def _endpoint_gate(self, route: str, admission_class: AdmissionClass) -> Optional[Gate]:
+        limit = self.endpoint_limits.get(route, admission_class.endpoint_limit)
+        if limit is None:
+            return None
+        gate = self.endpoints.get(route)
+        if gate is None:
+            gate = self.endpoints[route] = Gate(limit)
+        return gate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        route = route_template(self.fastapi_app, scope)
+        if route in EXEMPT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        class_name = ROUTE_CLASSES.get(route, "standard")
+        admission_class = ADMISSION_CLASSES[class_name]
+        endpoint = self._endpoint_gate(route, admission_class)
+        start = time.perf_counter()
+        deadline = start + admission_class.queue_seconds
+
+        admitted = endpoint is None or await endpoint.acquire(admission_class.priority, 1.0,
+                                                               deadline - time.perf_counter())
+        if admitted:
+            try:
+                admitted = await self.pool.acquire(admission_class.priority, admission_class.share,
+                                                   deadline - time.perf_counter())
+            finally:
+                if not admitted and endpoint is not None:
+                    endpoint.release()
+        ADMISSION_WAIT.labels(route, class_name).observe(time.perf_counter() - start)
+
+        if not admitted:
+            ADMISSION_REJECTED.labels(route, class_name).inc()
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.pool.release()
+            if endpoint is not None:
+                endpoint.release()
+
+    async def _reject(self, send: Send):
+        body = b'{"error":"Server busy","detail":"Too many requests in progress, retry shortly"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(ADMISSION_RETRY_AFTER_SECONDS).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
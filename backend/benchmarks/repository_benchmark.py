@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+FloodGuardian AI - Repository Benchmark
+
+Times the data-access calls behind the API (saving a prediction, bulk
+alert inserts, history pages, dashboard counts) against one or more
+repository backends. The sqlite backend needs no network, so this runs
+offline against a scratch database; supabase and postgres use the usual
+SUPABASE_URL/SUPABASE_KEY or DATABASE_URL settings and write test rows.
+
+Usage:
+    python benchmarks/repository_benchmark.py [backends] [iterations]
+
+    backends: comma-separated, default "sqlite" (e.g. sqlite,postgres)
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import create_repository
+from pagination import decode_cursor
+from repositories.sqlite import SQLiteRepository
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(fn, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def prediction(rng: random.Random, region: str):
+    severity = rng.uniform(0.1, 1.0)
+    return {
+        "region": region,
+        "severity": severity,
+        "prediction_data": {
+            "region": region,
+            "severity": severity,
+            "risk_level": "high" if severity > 0.7 else "medium" if severity > 0.4 else "low",
+            "forecast_hours": 72,
+            "precipitation_mm": rng.uniform(0, 200),
+            "water_level_m": rng.uniform(0, 3),
+            "affected_population": rng.randint(0, 50000)
+        }
+    }
+
+
+async def bench_backend(backend: str, iterations: int, seed: int = 42):
+    rng = random.Random(seed)
+    if backend == "sqlite":
+        repository = SQLiteRepository(os.path.join(tempfile.mkdtemp(), "benchmark.db"))
+    else:
+        repository = create_repository(backend)
+    region = f"Benchmark-{rng.randrange(10 ** 6)}"
+
+    try:
+        # Recipients for the alert inserts
+        users = await repository._insert("users", [
+            {"name": f"User {i}", "phone": f"+999{rng.randrange(10 ** 9):09d}", "location": region} for i in range(20)
+        ])
+        steps = {
+            "insert prediction": lambda: repository.insert_prediction(prediction(rng, region)),
+            "insert 20 alerts": lambda: repository.insert_alerts(
+                [{"user_id": user["id"], "message": "benchmark"} for user in users]),
+            "history page": lambda: repository.prediction_page(region, None, 20),
+            "history page (projected)": lambda: repository.prediction_page(
+                region, ["region", "severity", "id", "created_at"], 20),
+            "recent alerts + users": lambda: repository.alert_page(None, None, 50, None, True),
+            "count predictions": lambda: repository.count("predictions", "estimated"),
+            "high severity": lambda: repository.high_severity_predictions(0.7, 5)
+        }
+        for step, fn in steps.items():
+            timings = await measure(fn, iterations)
+            print(f"{backend:<12}{step:<26}{percentile(timings, 50):>10.3f}{percentile(timings, 99):>10.3f}"
+                  f"{statistics.mean(timings):>10.3f}")
+
+        # Walk the history to the end, one keyset page at a time
+        pages, after = 0, None
+        start = time.perf_counter()
+        while True:
+            rows, cursor = await repository.prediction_page(region, None, 20, after)
+            pages += 1
+            if cursor is None:
+                break
+            after = decode_cursor(cursor)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{backend:<12}{f'all {pages} pages':<26}{elapsed / pages:>10.3f}{'':>10}{'':>10}  (ms per page)")
+    finally:
+        await repository.close()
+
+
+def run(backends: str = "sqlite", iterations: int = 200):
+    print(f"{'backend':<12}{'operation':<26}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for backend in backends.split(","):
+        asyncio.run(bench_backend(backend.strip(), iterations))
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else "sqlite", int(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+FloodGuardian AI - Routing Benchmark
+
+Compares point-to-point query latency of plain A* on the road graph with
+the contraction-hierarchy index, and checks both return the same travel time.
+
+Usage:
+    python benchmarks/routing_benchmark.py <graph_dir> <hierarchy_dir> [queries]
+"""
+
+import random
+import statistics
+import sys
+import os
+import time
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.road_graph import RoadGraph
+from services.contraction_hierarchy import ContractionHierarchy
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(graph_dir: str, hierarchy_dir: str, queries: int = 200, seed: int = 42):
+    graph = RoadGraph.load(graph_dir)
+    hierarchy = ContractionHierarchy.load(hierarchy_dir)
+    print(f"Graph: {graph.node_count:,} nodes, {graph.edge_count:,} edges")
+
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(graph.node_count), rng.randrange(graph.node_count)) for _ in range(queries)]
+
+    timings = {"astar": [], "ch": []}
+    mismatches = 0
+    for source, target in pairs:
+        start = time.perf_counter()
+        baseline = graph.shortest_path(source, target)
+        timings["astar"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        fast = hierarchy.shortest_path(source, target)
+        timings["ch"].append(time.perf_counter() - start)
+
+        if (baseline is None) != (fast is None) or (baseline and abs(baseline[0] - fast[0]) > 1e-2):
+            mismatches += 1
+
+    print(f"\n{'search':<8}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, values in timings.items():
+        ms = [v * 1000 for v in values]
+        print(f"{name:<8}{percentile(ms, 50):>10.3f}{percentile(ms, 99):>10.3f}{statistics.mean(ms):>10.3f}")
+
+    speedup = statistics.mean(timings["astar"]) / statistics.mean(timings["ch"])
+    print(f"\nSpeed-up: {speedup:.1f}x over {queries} queries, {mismatches} mismatched results")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    ok = run(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 200)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+FloodGuardian AI - Serialization Benchmark
+
+Measures response rendering with the standard-library JSON encoder
+(JSONResponse) against orjson (ORJSONResponse), and the cost and size of
+gzip/brotli compression, on payloads shaped like our largest responses.
+Rendering alone overstates the gain: handlers annotated -> Dict[str, Any]
+still go through FastAPI's jsonable_encoder either way, so each payload is
+also timed as a full request through a TestClient round trip.
+
+Usage:
+    python benchmarks/serialization_benchmark.py [iterations]
+"""
+
+import random
+import statistics
+import sys
+import os
+import time
+from typing import Any, Dict
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from compression import Compressor, brotli
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def flood_extent(rng: random.Random, lat: float, lon: float, polygons: int = 4, vertices: int = 40):
+    features = []
+    for _ in range(polygons):
+        ring = [[lon + rng.uniform(-0.05, 0.05), lat + rng.uniform(-0.05, 0.05)] for _ in range(vertices)]
+        ring.append(ring[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"depth_m": round(rng.uniform(0.1, 2.0), 2)},
+            "geometry": {"type": "Polygon", "coordinates": [ring]}
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def prediction_history(rng: random.Random, rows: int = 100):
+    """
+    /predictions/history/{region}: full rows including the prediction_data blob
+    """
+    predictions = []
+    for i in range(rows):
+        severity = rng.uniform(0.1, 1.0)
+        predictions.append({
+            "id": i + 1,
+            "region": "Lagos",
+            "severity": severity,
+            "created_at": f"2025-09-{1 + i % 28:02d}T{i % 24:02d}:00:00.000000",
+            "prediction_data": {
+                "region": "Lagos",
+                "severity": severity,
+                "risk_level": "high" if severity > 0.7 else "medium" if severity > 0.4 else "low",
+                "forecast_hours": 72,
+                "precipitation_mm": rng.uniform(0, 200),
+                "water_level_m": rng.uniform(0, 5),
+                "confidence": rng.uniform(0.7, 0.95),
+                "affected_population": rng.randint(1000, 50000),
+                "timestamp": "2025-09-11T21:00:00Z",
+                "flood_extent": flood_extent(rng, 6.52, 3.38)
+            }
+        })
+    return {"status": "success", "region": "Lagos", "predictions": predictions, "count": rows}
+
+
+def resource_status(rng: random.Random, rows: int = 2000):
+    """
+    /resources/status/{region}: every resource row for the region
+    """
+    kinds = ["boats", "medical_kits", "food_packs", "water_liters", "blankets", "generators", "tents"]
+    resources = [{
+        "id": i + 1,
+        "region": "Lagos",
+        "resource_type": rng.choice(kinds),
+        "quantity": rng.randint(1, 5000),
+        "allocated_at": f"2025-09-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00"
+    } for i in range(rows)]
+    return {"status": "success", "region": "Lagos", "resources": resources}
+
+
+def bulk_routes(rng: random.Random, routes: int = 200):
+    """
+    /routes/evacuation/bulk: routes with steps and encoded polylines
+    """
+    def route():
+        return {
+            "status": "success",
+            "distance": f"{rng.uniform(1, 20):.1f} km",
+            "duration": f"{rng.randint(3, 60)} mins",
+            "distance_m": rng.uniform(1000, 20000),
+            "duration_s": rng.uniform(180, 3600),
+            "start_address": f"{6.5 + rng.random() * 0.1:.5f},{3.3 + rng.random() * 0.1:.5f}",
+            "end_address": "Lagos Island",
+            "steps": [f"Continue onto Street {rng.randint(1, 99)} for {rng.randint(50, 900)} m" for _ in range(12)],
+            "polyline": "".join(chr(rng.randint(63, 126)) for _ in range(400)),
+            "cached": False
+        }
+    successful = [route() for _ in range(routes)]
+    return {"status": "completed", "region": "Lagos", "total_requests": routes, "successful_routes": successful,
+            "failed_routes": [], "success_count": routes, "failure_count": 0}
+
+
+def measure(fn, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def client(payload, response_class) -> TestClient:
+    """
+    An app serving the payload from a handler declared like ours
+    """
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/payload")
+    def get_payload() -> Dict[str, Any]:
+        return payload
+
+    return TestClient(app)
+
+
+def run(iterations: int = 200, seed: int = 42):
+    rng = random.Random(seed)
+    payloads = {
+        "prediction history": prediction_history(rng),
+        "resource status": resource_status(rng),
+        "bulk routes": bulk_routes(rng)
+    }
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    print(f"{'payload':<20}{'step':<16}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'bytes':>12}")
+    for name, payload in payloads.items():
+        rows = []
+        std, body = measure(lambda: JSONResponse(payload).body, iterations)
+        rows.append(("json", std, len(body)))
+        fast, body = measure(lambda: ORJSONResponse(payload).body, iterations)
+        rows.append(("orjson", fast, len(body)))
+        round_trips = {}
+        for label, response_class in (("json", JSONResponse), ("orjson", ORJSONResponse)):
+            with client(payload, response_class) as c:
+                timings, response = measure(lambda: c.get("/payload", headers={"Accept-Encoding": "identity"}),
+                                            iterations)
+            round_trips[label] = timings
+            rows.append((f"{label} request", timings, len(response.content)))
+        for encoding in encodings:
+            timings, compressed = measure(lambda: Compressor(encoding).finish(body), iterations)
+            rows.append((f"orjson+{encoding}", [f + t for f, t in zip(fast, timings)], len(compressed)))
+
+        for step, timings, size in rows:
+            print(f"{name:<20}{step:<16}{percentile(timings, 50):>10.3f}{percentile(timings, 99):>10.3f}"
+                  f"{statistics.mean(timings):>10.3f}{size:>12,}")
+        print(f"{'':<20}orjson speed-up: {statistics.mean(std) / statistics.mean(fast):.1f}x rendering, "
+              f"{statistics.mean(round_trips['json']) / statistics.mean(round_trips['orjson']):.1f}x "
+              f"per request\n")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+FloodGuardian AI - Startup Benchmark
+
+Times `import main` in fresh interpreters and fails when the median goes
+over the budget, or when importing the API builds a service or loads an
+SDK that should only load on first use (Supabase, Twilio, requests). Run
+it in CI to keep worker cold starts fast.
+
+Usage:
+    python benchmarks/startup_benchmark.py [budget_ms] [runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported by `import main`
+LAZY_MODULES = ("supabase", "twilio", "requests")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed_ms = (time.perf_counter() - start) * 1000
+from providers import providers
+print(json.dumps({
+    "import_ms": elapsed_ms,
+    "loaded": [m for m in %r if m in sys.modules],
+    "built": [name for name, p in providers.items() if p.built]
+}))
+""" % (LAZY_MODULES,)
+
+
+def import_once(env):
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env, count: int = 10):
+    """
+    Modules with the largest cumulative import time (python -X importtime)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports only, so nested modules are not counted twice
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def run(budget_ms: float = 1500, runs: int = 5):
+    # Importing must work without credentials; services read them when first used
+    env = {k: v for k, v in os.environ.items() if k not in ("SUPABASE_URL", "SUPABASE_KEY")}
+
+    samples = [import_once(env) for _ in range(runs)]
+    timings = [s["import_ms"] for s in samples]
+    median = statistics.median(timings)
+    print(f"import main: median {median:.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms "
+          f"(budget {budget_ms:.0f} ms)")
+
+    print("\nSlowest top-level imports:")
+    for cumulative_ms, name in slowest_imports(env):
+        print(f"  {cumulative_ms:>8.1f} ms  {name}")
+
+    ok = median <= budget_ms
+    if not ok:
+        print(f"\n❌ Import time over budget by {median - budget_ms:.0f} ms")
+    loaded, built = samples[0]["loaded"], samples[0]["built"]
+    if loaded:
+        print(f"\n❌ Imported at startup (should load on first use): {', '.join(loaded)}")
+        ok = False
+    if built:
+        print(f"\n❌ Services built at import: {', '.join(built)}")
+        ok = False
+    if ok:
+        print("\n✅ Within import budget")
+    return ok
+
+
+if __name__ == "__main__":
+    ok = run(float(sys.argv[1]) if len(sys.argv) > 1 else 1500, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
+    sys.exit(0 if ok else 1)
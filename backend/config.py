@@ -14,3 +14,110 @@ TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
 MAPS_API_KEY = os.getenv("MAPS_API_KEY")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Population grid (gridded population .npy with a sidecar .json holding the
+# grid origin and cell size) and region boundaries (GeoJSON)
+POPULATION_GRID_PATH = os.getenv("POPULATION_GRID_PATH")
+REGION_BOUNDARIES_PATH = os.getenv("REGION_BOUNDARIES_PATH")
+
+# Local road graph for evacuation routing: a compiled graph directory or an
+# OSM XML extract (.osm / .osm.gz / .osm.bz2)
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH")
+# Optional contraction-hierarchy index built from the road graph with
+# services/contraction_hierarchy.py
+CONTRACTION_HIERARCHY_PATH = os.getenv("CONTRACTION_HIERARCHY_PATH")
+
+# Evacuation center registry (JSON); the built-in list is used when unset
+EVACUATION_CENTERS_PATH = os.getenv("EVACUATION_CENTERS_PATH")
+
+# Local gazetteer (CSV or JSON of name, lat, lon, region, population) used to
+# geocode free-text route origins offline, and the size of its lookup cache
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")
+GEOCODER_CACHE_SIZE = int(os.getenv("GEOCODER_CACHE_SIZE", "4096"))
+
+# Evacuation route cache: maximum routes kept in memory, and an optional file
+# the cache is saved to so routes survive restarts
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "10000"))
+ROUTE_CACHE_PATH = os.getenv("ROUTE_CACHE_PATH")
+
+# Origins routed at once by the streaming bulk evacuation endpoint
+BULK_ROUTE_CONCURRENCY = int(os.getenv("BULK_ROUTE_CONCURRENCY", "4"))
+
+# API concurrency limits: connections in the async database pool, seconds a
+# database request (including the wait for a pooled connection) may take, and
+# worker threads for blocking work (Earth-2, Twilio, routing)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "50"))
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Dashboard stats snapshot: seconds between background refreshes, and the
+# PostgREST count method for table totals (exact, planned or estimated)
+STATS_REFRESH_SECONDS = float(os.getenv("STATS_REFRESH_SECONDS", "15"))
+STATS_COUNT_METHOD = os.getenv("STATS_COUNT_METHOD", "estimated")
+
+# Live dashboard events: events buffered per connected client before it is
+# told to resync from a fresh snapshot
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Dependency health probes: seconds between background checks, seconds each
+# probe may take, and the latency (ms) above which a dependency counts as slow
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "10"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "3"))
+HEALTH_SLOW_MS = float(os.getenv("HEALTH_SLOW_MS", "1000"))
+
+# Admission control: requests handled at once across the API, per endpoint
+# (override per route as "/routes/evacuation=16,/predictions/{region}=24"),
+# seconds a request may wait for a slot before it is shed with a 503, and the
+# Retry-After sent with it
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "100"))
+ADMISSION_ENDPOINT_CONCURRENCY = int(os.getenv("ADMISSION_ENDPOINT_CONCURRENCY", "32"))
+ADMISSION_ENDPOINT_LIMITS = os.getenv("ADMISSION_ENDPOINT_LIMITS", "")
+ADMISSION_QUEUE_SECONDS = float(os.getenv("ADMISSION_QUEUE_SECONDS", "1"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+# Serving: uvicorn worker processes started by `python main.py` (production
+# and multi-worker runs have auto-reload off), and a SQLite file all workers
+# on the host share as a cache for predictions, dashboard stats and routes and
+# for the flood overlays routing uses (unset: each process caches on its own
+# and only sees the flood extents it fetched), with its size bound
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "100000"))
+
+# Seconds a cached Earth-2 prediction for a region is reused before it is
+# fetched (and saved) again; needs SHARED_CACHE_PATH
+PREDICTION_CACHE_SECONDS = float(os.getenv("PREDICTION_CACHE_SECONDS", "300"))
+
+# Request tracing: fraction of requests traced (a sampled W3C traceparent
+# header lends its trace id but is subject to the same rate, unless
+# TRACE_HONOR_PARENT is set for callers that can be trusted), a file traces are
+# appended to as Zipkin JSON (one trace per line) and rotated to ".1" at
+# TRACE_EXPORT_MAX_BYTES, and/or a Zipkin-compatible collector URL
+# (e.g. http://localhost:9411/api/v2/spans)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_HONOR_PARENT = os.getenv("TRACE_HONOR_PARENT", "false").lower() == "true"
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "floodguardian-api")
+
+# On-demand CPU profiling: token that authorizes the /debug/profiling switch
+# and X-Profile-Token requests (unset: profiling disabled), the directory
+# collapsed-stack profiles are written to, the sampling interval (ms), the
+# number of profiles kept, and the longest a request profile samples for
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+
+# Data access: where users, predictions, alerts and resources are stored
+# (supabase: the Supabase REST API; postgres: DATABASE_URL directly through
+# a connection pool, needs `pip install asyncpg`; sqlite: a local file at
+# SQLITE_PATH, created on first use, for offline runs and benchmarks)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase")
+DATABASE_URL = os.getenv("DATABASE_URL")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "floodguardian.db")
@@ -1,8 +1,79 @@
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from config import SUPABASE_URL, SUPABASE_KEY, DB_MAX_CONNECTIONS, DB_TIMEOUT_SECONDS, DATA_BACKEND
+from metrics import upstream_timer
+from providers import Provider
 
-# Create Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+class TimedTransport(httpx.AsyncHTTPTransport):
+    """
+    Records each Supabase REST call as "<METHOD> <table>" in the upstream latency metrics
+    """
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        table = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        with upstream_timer("supabase", f"{request.method} {table}"):
+            return await super().handle_async_request(request)
+
+class PooledAsyncPostgrestClient(AsyncPostgrestClient):
+    """
+    Async PostgREST client whose connection pool is capped at DB_MAX_CONNECTIONS
+    """
+    
+    def create_session(self, base_url, headers, timeout) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=TimedTransport(
+                limits=httpx.Limits(max_connections=DB_MAX_CONNECTIONS, max_keepalive_connections=DB_MAX_CONNECTIONS)
+            )
+        )
+
+def create_async_supabase_client() -> PooledAsyncPostgrestClient:
+    return PooledAsyncPostgrestClient(
+        f"{SUPABASE_URL}/rest/v1",
+        headers={
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apiKey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}"
+        },
+        # Requests waiting for a free pooled connection count against the timeout
+        timeout=DB_TIMEOUT_SECONDS
+    )
+
+# Non-blocking client for the Supabase REST endpoint (PostgREST's query
+# builder, awaited), shared by the supabase repository
+async_supabase = Provider("async_supabase", create_async_supabase_client)
+
+def create_repository(backend: str = None, own_connections: bool = False):
+    """
+    The Repository for DATA_BACKEND (supabase, postgres or sqlite).
+    own_connections: use a REST client of its own rather than async_supabase,
+    for a repository driven from another event loop.
+    """
+    backend = backend or DATA_BACKEND
+    if backend == "supabase":
+        from repositories.supabase_rest import SupabaseRepository
+        if own_connections:
+            return SupabaseRepository(create_async_supabase_client(), owns_client=True)
+        return SupabaseRepository(async_supabase)
+    if backend == "postgres":
+        from repositories.postgres import PostgresRepository
+        return PostgresRepository()
+    if backend == "sqlite":
+        from repositories.sqlite import SQLiteRepository
+        return SQLiteRepository()
+    raise ValueError(f"Unknown DATA_BACKEND: {backend} (expected supabase, postgres or sqlite)")
+
+def create_blocking_repository():
+    from repositories.blocking import BlockingRepository
+    return BlockingRepository(create_repository(own_connections=True))
+
+# Users, predictions, alerts and resources, whichever backend stores them:
+# awaited by API handlers, or called from jobs and worker threads
+repository = Provider("repository", create_repository)
+blocking_repository = Provider("blocking_repository", create_blocking_repository)
 
 # Database schema setup functions
 def create_tables():
@@ -15,8 +15,10 @@ Run this job periodically (e.g., every hour) via cron or task scheduler.
 import time
 import sys
 import os
+import threading
 from datetime import datetime
 from typing import List, Dict, Any
+import numpy as np
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,7 +27,16 @@ from services.earth2_service import earth2_service
 from services.sms_service import sms_service
 from services.resource_allocator import resource_allocator
 from services.routing_service import routing_service
-from database import supabase
+from services.geocoder import geocoder
+from services.population_grid import population_grid
+from database import blocking_repository
+from profiling import SamplingProfiler, take_monitor_sweep_request
+
+# Origins whose evacuation routes each sweep pre-computes: gazetteer places
+# and population grid blocks (of this many cells a side) per region
+ROUTE_ORIGIN_PLACES = 10
+ROUTE_ORIGIN_CELLS = 10
+ROUTE_ORIGIN_CELL_FACTOR = 10
 
 class FloodMonitor:
     """
@@ -73,6 +84,14 @@ class FloodMonitor:
                 print(f"❌ {error_msg}")
                 results["errors"].append(error_msg)
         
+        # Keep this sweep's routes for the API and the next run
+        try:
+            saved = routing_service.route_cache.save()
+            if saved:
+                print(f"\n💾 Saved {saved} cached evacuation routes")
+        except Exception as e:
+            print(f"\n⚠️  Route cache save error: {e}")
+        
         self.print_summary(results)
         return results
     
@@ -112,6 +131,11 @@ class FloodMonitor:
             self.save_prediction(region, prediction)
             print(f"  💾 Prediction saved to database")
             
+            # Keep evacuation routing in line with the latest flood extent
+            invalidated = routing_service.apply_flood_prediction(region, prediction)
+            if invalidated:
+                print(f"  🚧 Flood extent changed road costs, {invalidated} cached routes invalidated")
+            
             # Step 3: Send alerts if severity is high
             if severity >= self.severity_threshold:
                 alerts_sent = self.send_region_alerts(region, prediction)
@@ -146,7 +170,7 @@ class FloodMonitor:
                 "severity": prediction.get("severity", 0.0),
                 "prediction_data": prediction
             }
-            supabase.table("predictions").insert(record).execute()
+            blocking_repository.insert_prediction(record)
         except Exception as e:
             print(f"  ⚠️  Database error: {str(e)}")
     
@@ -159,9 +183,9 @@ class FloodMonitor:
         """
         try:
             # Get users in the region
-            users_result = supabase.table("users").select("*").eq("location", region).execute()
+            users = blocking_repository.users_in_region(region)
             
-            if not users_result.data:
+            if not users:
                 print(f"  ℹ️  No registered users in {region}")
                 return 0
             
@@ -179,13 +203,13 @@ Stay safe! - FloodGuardian AI
             
             # Send SMS to all users
             alerts_sent = 0
-            for user in users_result.data:
+            for user in users:
                 if sms_service.send_sms(user["phone"], message):
                     # Save alert record
-                    supabase.table("alerts").insert({
+                    blocking_repository.insert_alerts([{
                         "user_id": user["id"],
                         "message": message
-                    }).execute()
+                    }])
                     alerts_sent += 1
             
             return alerts_sent
@@ -205,7 +229,8 @@ Stay safe! - FloodGuardian AI
             allocation = resource_allocator.allocate_resources(
                 region=region,
                 affected_population=affected_population,
-                severity=severity
+                severity=severity,
+                flood_extent=prediction.get("flood_extent")
             )
             
             if "error" not in allocation:
@@ -218,24 +243,23 @@ Stay safe! - FloodGuardian AI
     def generate_evacuation_routes(self, region: str):
         """
         Generate and cache evacuation routes for a region
+        
+        Routes land in the routing service's route cache, so API requests
+        from the same origins are served without another search.
         """
         try:
-            # Get major locations in the region (simplified)
-            major_locations = [
-                f"City Center, {region}",
-                f"Main Market, {region}",
-                f"University, {region}",
-                f"Airport, {region}"
-            ]
+            # Origins that resolve inside the region: its centre, its most
+            # populous gazetteer places and its most populated grid blocks
+            major_locations = [f"City Center, {region}"]
+            major_locations += [f"{name}, {region}" for name in geocoder.region_places(region, ROUTE_ORIGIN_PLACES)]
+            if population_grid.has_region(region):
+                lat, lon, population = population_grid.region_cells(region, ROUTE_ORIGIN_CELL_FACTOR)
+                for i in np.argsort(-population)[:ROUTE_ORIGIN_CELLS]:
+                    major_locations.append(f"{lat[i]:.5f},{lon[i]:.5f}")
             
-            routes_generated = 0
-            for location in major_locations:
-                try:
-                    route = routing_service.get_evacuation_route(location, region=region)
-                    if "error" not in route:
-                        routes_generated += 1
-                except:
-                    continue
+            # One bulk call: with a road graph this is a single reverse search from the region's centers
+            routes = routing_service.get_multiple_evacuation_routes(major_locations, region)
+            routes_generated = sum(1 for route in routes if "error" not in route)
             
             print(f"    🗺️  Generated {routes_generated} evacuation routes")
             
@@ -263,18 +287,39 @@ Stay safe! - FloodGuardian AI
         print(f"\n✅ Monitoring completed at {datetime.now()}")
         print("=" * 60)
 
+def profiled_sweep(monitor: FloodMonitor):
+    """
+    Run one sweep under the sampling profiler and save a flamegraph-ready profile
+    """
+    profiler = SamplingProfiler(thread_ids={threading.get_ident()}).start()
+    try:
+        return monitor.monitor_all_regions()
+    finally:
+        profiler.stop()
+        path = profiler.save("flood-monitor-sweep")
+        print(f"\n🔥 Sweep profile ({profiler.samples} samples over {profiler.duration:.1f}s): {path}")
+
 def main():
     """
     Main function to run flood monitoring
+    
+    --continuous runs a sweep every hour; --profile profiles the (first)
+    sweep. A running monitor also profiles its next sweep when one is
+    requested through POST /debug/profiling.
     """
     monitor = FloodMonitor()
+    profile_next = "--profile" in sys.argv[1:]
     
     # Check if running in continuous mode
-    if len(sys.argv) > 1 and sys.argv[1] == "--continuous":
+    if "--continuous" in sys.argv[1:]:
         print("🔄 Running in continuous mode (every hour)")
         while True:
             try:
-                monitor.monitor_all_regions()
+                if profile_next or take_monitor_sweep_request():
+                    profile_next = False
+                    profiled_sweep(monitor)
+                else:
+                    monitor.monitor_all_regions()
                 print(f"\n⏰ Waiting 1 hour before next check...")
                 time.sleep(3600)  # Wait 1 hour
             except KeyboardInterrupt:
@@ -283,6 +328,8 @@ def main():
             except Exception as e:
                 print(f"\n❌ Unexpected error: {e}")
                 time.sleep(300)  # Wait 5 minutes before retry
+    elif profile_next:
+        profiled_sweep(monitor)
     else:
         # Run once
         monitor.monitor_all_regions()
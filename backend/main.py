@@ -1,17 +1,32 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+import anyio
+import asyncio
 import uvicorn
 import os
+from config import THREADPOOL_SIZE, API_WORKERS, ENVIRONMENT
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware
+from metrics import MetricsMiddleware, latest as latest_metrics, worker_exited
+from tracing import TracingMiddleware, TracedORJSONResponse
+from profiling import ProfilingMiddleware
+from services.dashboard_stats import dashboard_stats
+from services.event_hub import event_hub, RESYNC
+from services.health_monitor import health_monitor
 
 # Import routers
-from routes import alerts, predictions, routes, resources
+from routes import alerts, predictions, routes, resources, profiling
 
 # Create FastAPI app
 app = FastAPI(
     title="FloodGuardian AI Agent",
     description="AI-powered flood prediction and emergency response system",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes large history/status payloads several times faster
+    # (rendered in a "serialize" span when the request is traced)
+    default_response_class=TracedORJSONResponse
 )
 
 # Add CORS middleware
@@ -22,6 +37,10 @@ allowed_origins = (
     else ["*"]
 )
 
+# Shed load with 503/Retry-After once endpoints are saturated; added before
+# CORS so rejected requests still carry CORS headers
+app.add_middleware(AdmissionMiddleware, fastapi_app=app)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -30,11 +49,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above COMPRESSION_MIN_BYTES (brotli or gzip, as the client accepts)
+app.add_middleware(CompressionMiddleware)
+
+# Trace a sample of requests (TRACE_SAMPLE_RATE) when an export target is set
+app.add_middleware(TracingMiddleware, fastapi_app=app)
+
+# CPU-profile requests while switched on via /debug/profiling (needs PROFILING_TOKEN)
+app.add_middleware(ProfilingMiddleware, fastapi_app=app)
+
+# Outermost, so latencies include tracing, profiling, compression and CORS handling
+app.add_middleware(MetricsMiddleware, fastapi_app=app)
+
 # Include routers
 app.include_router(alerts.router, prefix="/alerts", tags=["Alerts"])
 app.include_router(predictions.router, prefix="/predictions", tags=["Predictions"])
 app.include_router(routes.router, prefix="/routes", tags=["Routes"])
 app.include_router(resources.router, prefix="/resources", tags=["Resources"])
+app.include_router(profiling.router, prefix="/debug/profiling", tags=["Debug"])
+
+@app.on_event("startup")
+async def limit_threadpool():
+    """
+    Cap the worker threads that run blocking handlers and calls (THREADPOOL_SIZE)
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+@app.on_event("startup")
+async def start_dashboard_stats():
+    dashboard_stats.start()
+
+@app.on_event("startup")
+async def start_health_monitor():
+    health_monitor.start()
+
+@app.on_event("shutdown")
+async def close_database():
+    from database import async_supabase, repository, blocking_repository
+    await dashboard_stats.stop()
+    await health_monitor.stop()
+    if repository.built:
+        await repository.close()
+    if blocking_repository.built:
+        await asyncio.to_thread(blocking_repository.close)
+    if async_supabase.built:
+        await async_supabase.aclose()
+    worker_exited()
+
+@app.on_event("shutdown")
+def save_route_cache():
+    """
+    Persist cached evacuation routes (when ROUTE_CACHE_PATH is set)
+    """
+    from services.routing_service import routing_service
+    try:
+        routing_service.route_cache.save()
+    except Exception as e:
+        print(f"❌ Failed to save route cache: {e}")
 
 @app.get("/")
 def root():
@@ -57,94 +128,111 @@ def root():
 def health_check():
     """
     Health check endpoint
+    
+    Reports each dependency (ok, slow, down or simulated) from the latest
+    background probe. Overall status is "healthy", "degraded" (a dependency
+    is slow or down but requests can still be served), "unhealthy" (the
+    database is down), "starting" (not probed yet) or "stale" (no probe has
+    finished for several intervals). Always 200 while the
+    process is up; use /ready to take workers out of rotation.
     """
-    return {
-        "status": "healthy",
-        "timestamp": "2025-09-11T21:00:00Z",
-        "services": {
-            "database": "connected",
-            "earth2": "available",
-            "sms": "ready",
-            "routing": "ready",
-            "resources": "ready"
-        }
-    }
+    return health_monitor.health()
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness probe: 200 when this worker can serve traffic, 503 when it is
+    starting, its health probes have stalled or the database is unreachable
+    """
+    report = health_monitor.health()
+    return ORJSONResponse(report, status_code=200 if health_monitor.ready() else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics: per-route latency and in-flight requests, dependency
+    call timings and cache hit ratios
+    """
+    return Response(latest_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/dashboard/stats")
-def get_dashboard_stats():
+async def get_dashboard_stats():
     """
     Get dashboard statistics
+    
+    Served from a snapshot refreshed in the background every
+    STATS_REFRESH_SECONDS; falls back to sample data until the database
+    has answered once.
     """
     try:
-        # Try to get data from database, but provide fallback if it fails
-        try:
-            from database import supabase
-            
-            # Get recent statistics
-            predictions_count = len(supabase.table("predictions").select("id").execute().data)
-            alerts_count = len(supabase.table("alerts").select("id").execute().data)
-            users_count = len(supabase.table("users").select("id").execute().data)
-            
-            # Get recent high-severity predictions
-            high_severity = supabase.table("predictions").select("*").gte("severity", 0.7).limit(5).execute()
-            
-            return {
-                "status": "success",
-                "stats": {
-                    "total_predictions": predictions_count,
-                    "total_alerts_sent": alerts_count,
-                    "registered_users": users_count,
-                    "high_severity_regions": len(high_severity.data),
-                    "system_status": "operational"
-                },
-                "recent_high_severity": high_severity.data
-            }
-            
-        except Exception as db_error:
-            # If database fails, return mock data
-            print(f"Database connection failed: {db_error}")
-            return {
-                "status": "success",
-                "stats": {
-                    "total_predictions": 42,
-                    "total_alerts_sent": 15,
-                    "registered_users": 8,
-                    "high_severity_regions": 2,
-                    "system_status": "operational"
-                },
-                "recent_high_severity": [
-                    {
-                        "id": 1,
-                        "region": "Miami-Dade County",
-                        "severity": 0.85,
-                        "created_at": "2025-01-12T10:30:00Z"
-                    },
-                    {
-                        "id": 2,
-                        "region": "New Orleans",
-                        "severity": 0.72,
-                        "created_at": "2025-01-12T09:15:00Z"
-                    }
-                ]
-            }
-        
+        return await dashboard_stats.get()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get dashboard stats: {str(e)}")
 
+@app.get("/dashboard/events")
+async def stream_dashboard_events():
+    """
+    Live dashboard updates as server-sent events
+    
+    Starts with a full "stats" snapshot, then pushes "prediction", "alert"
+    and "stats" (changed fields only) events as they happen. A client that
+    falls behind gets a fresh full snapshot instead of the missed events.
+    """
+    async def events():
+        subscription = event_hub.subscribe()
+        try:
+            snapshot = await dashboard_stats.get()
+            yield event_hub.format_sse({"type": "stats", "data": snapshot["stats"]})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is RESYNC:
+                    snapshot = await dashboard_stats.get()
+                    event = {"type": "stats", "data": snapshot["stats"]}
+                yield event_hub.format_sse(event)
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Exception handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    if ENVIRONMENT == "production" or API_WORKERS > 1:
+        # Production serving: API_WORKERS processes, no auto-reload. Set
+        # SHARED_CACHE_PATH so workers share predictions, stats and routes.
+        if API_WORKERS > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            # Workers inherit this before importing prometheus_client, so
+            # /metrics reports all of them whichever worker is scraped
+            import tempfile
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="floodguardian-metrics-")
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=API_WORKERS,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
 
@@ -0,0 +1,190 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from tracing import span
+
+REQUEST_LATENCY = Histogram(
+    "floodguardian_http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "floodguardian_http_requests_in_flight",
+    "Requests currently being handled",
+    ["method", "route"],
+    # With several workers: the sum over live worker processes
+    multiprocess_mode="livesum"
+)
+UPSTREAM_LATENCY = Histogram(
+    "floodguardian_upstream_duration_seconds",
+    "Time spent in calls to dependencies (Earth-2, Supabase, Twilio) and in route searches",
+    ["service", "operation", "outcome"]
+)
+UPSTREAM_ERRORS = Counter(
+    "floodguardian_upstream_errors_total",
+    "Dependency calls that raised",
+    ["service", "operation"]
+)
+ADMISSION_WAIT = Histogram(
+    "floodguardian_admission_wait_seconds",
+    "Time requests spent queued for an admission slot",
+    ["route", "admission_class"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+ADMISSION_REJECTED = Counter(
+    "floodguardian_admission_rejected_total",
+    "Requests shed with a 503 because no slot freed up within their queue budget",
+    ["route", "admission_class"]
+)
+
+# Requests that match no route share one label so typos cannot create new series
+UNMATCHED_ROUTE = "unmatched"
+# Resolved (method, path) -> route template; cleared when it reaches this size
+ROUTE_CACHE_LIMIT = 10000
+_route_templates = {}
+
+
+def route_template(app, scope: Scope) -> str:
+    """
+    The path template ("/predictions/history/{region}") a request will be
+    routed to. Matching runs once per distinct path; later lookups are a
+    dict hit.
+    """
+    key = (scope["method"], scope["path"])
+    template = _route_templates.get(key)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+        if len(_route_templates) >= ROUTE_CACHE_LIMIT:
+            _route_templates.clear()
+        _route_templates[key] = template
+    return template
+
+
+@contextmanager
+def upstream_timer(service: str, operation: str):
+    """
+    Time a dependency call (also a trace span); exceptions are counted and re-raised
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with span(f"{service} {operation}"):
+            yield
+    except Exception:
+        outcome = "error"
+        UPSTREAM_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Per-route request latency histogram and in-flight gauge
+    """
+
+    def __init__(self, app: ASGIApp, fastapi_app=None):
+        self.app = app
+        # Route table to resolve templates against (the FastAPI app this wraps)
+        self.fastapi_app = fastapi_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(self.fastapi_app, scope)
+        status: Optional[int] = None
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method, route, str(status or 500)).observe(time.perf_counter() - start)
+
+
+class CacheCollector:
+    """
+    Hit/miss counters and hit ratios of the in-process caches, read at scrape time
+    """
+
+    def describe(self):
+        # Registration would otherwise call collect(), importing the services
+        # while they may still be importing this module
+        return []
+
+    def collect(self):
+        from services.routing_service import routing_service
+        from services.geocoder import geocoder
+        from services.shared_cache import shared_cache
+
+        caches = {
+            "routes": routing_service.route_cache.stats(),
+            "geocoder": geocoder.cache_info()
+        }
+        if shared_cache.enabled:
+            caches["shared"] = shared_cache.stats()
+        hits = CounterMetricFamily("floodguardian_cache_hits", "Cache lookups that hit", labels=["cache"])
+        misses = CounterMetricFamily("floodguardian_cache_misses", "Cache lookups that missed", labels=["cache"])
+        ratio = GaugeMetricFamily("floodguardian_cache_hit_ratio", "Hits over lookups since start", labels=["cache"])
+        entries = GaugeMetricFamily("floodguardian_cache_entries", "Entries currently cached", labels=["cache"])
+        for name, stats in caches.items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            ratio.add_metric([name], stats["hit_ratio"])
+            if "entries" in stats:
+                entries.add_metric([name], stats["entries"])
+        yield from (hits, misses, ratio, entries)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def latest() -> bytes:
+    """
+    The metrics in Prometheus text format. With several API workers
+    (PROMETHEUS_MULTIPROC_DIR set) request and upstream metrics are
+    aggregated over every worker's files, so any worker answers a scrape
+    for all of them; cache stats are those of the worker that answers.
+    """
+    if not multiprocess_enabled():
+        return generate_latest()
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_cache_collector)
+    return generate_latest(registry)
+
+
+def worker_exited():
+    """
+    Drop this worker's live gauges from the aggregated metrics
+    """
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+
+_cache_collector = CacheCollector()
+REGISTRY.register(_cache_collector)
@@ -0,0 +1,83 @@
+import base64
+import json
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# Upper bound on rows per page, whatever the client asks for
+MAX_PAGE_SIZE = 500
+# Cursor timestamps are spliced into a filter, so only timestamp characters are accepted
+TIMESTAMP_PATTERN = re.compile(r"^[0-9T:.+\- Z]+$")
+
+
+def encode_cursor(row: Dict[str, Any], time_column: str) -> str:
+    raw = json.dumps([row[time_column], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Raises ValueError for a cursor we did not issue
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(timestamp, str) or not TIMESTAMP_PATTERN.match(timestamp) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return timestamp, row_id
+
+
+def field_names(fields: Optional[str], allowed: Iterable[str], time_column: str) -> Optional[List[str]]:
+    """
+    Field names for a ``fields=a,b`` projection, or None for all columns.
+
+    The keyset columns are always included so the next cursor can be
+    built. Raises ValueError for fields not in ``allowed``.
+    """
+    if not fields:
+        return None
+    allowed = list(allowed)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    for required in ("id", time_column):
+        if required not in names:
+            names.append(required)
+    return names
+
+
+def keyset_page(query, time_column: str, limit: int, after: Optional[Tuple[str, int]] = None):
+    """
+    Newest-first page of a PostgREST select, continuing after the decoded
+    cursor ``after``.
+
+    Orders by (time_column, id) descending and, given a cursor, keeps only
+    rows strictly after it in that order, so each page is an index range
+    scan however deep it is. One extra row is fetched to tell whether
+    another page follows.
+    """
+    if after:
+        timestamp, row_id = after
+        # postgrest-py 0.13 has no or_() builder; add the PostgREST "or" filter
+        # directly. Timestamps are quoted since they contain reserved characters.
+        query.params = query.params.add(
+            "or", f'({time_column}.lt."{timestamp}",and({time_column}.eq."{timestamp}",id.lt.{row_id}))'
+        )
+    # A single order parameter: "<time>.desc,id.desc"
+    return query.order(f"{time_column}.desc,id", desc=True).limit(limit + 1)
+
+
+def page_rows(rows: List[Dict[str, Any]], limit: int, time_column: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Trim the look-ahead row and build the cursor for the next page (None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], time_column)
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
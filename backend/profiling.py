@@ -0,0 +1,262 @@
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from config import PROFILING_TOKEN, PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_MAX_FILES, PROFILE_MAX_SECONDS
+
+# Leaf frames of threads with nothing to do: an event loop waiting in
+# select() or a worker waiting for a job. Those samples are dropped, so
+# profiles show where CPU time goes rather than where threads sleep.
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("socket.py", "accept")
+}
+# Seconds between reads of the shared switch state
+SWITCH_CHECK_SECONDS = 1.0
+# Shared-cache key holding the switch, so every API worker follows it
+SWITCH_KEY = "profiling:switch"
+# File the flood monitor checks before each sweep
+MONITOR_TRIGGER = "profile-next-sweep"
+# Responses that stay open for as long as the client listens: never profiled
+STREAMING_ROUTES = {"/dashboard/events", "/routes/evacuation/bulk/stream"}
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread records the stacks of the
+    watched threads (all other threads by default) every interval, and the
+    result is written in collapsed-stack format ("outer;inner;leaf count"
+    per line) that flamegraph.pl, speedscope and inferno read directly.
+    The profiled code runs unmodified, so overhead is the sampling thread
+    alone and scales with the interval. With max_seconds the sampling
+    thread stops on its own after that long.
+    """
+
+    def __init__(self, interval_ms: float = None, thread_ids: Set[int] = None, max_seconds: float = None):
+        self.interval = (interval_ms or PROFILE_INTERVAL_MS) / 1000
+        self.thread_ids = thread_ids
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        if self.max_seconds:
+            self.duration = min(self.duration, self.max_seconds)
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = self.started_at + self.max_seconds if self.max_seconds else None
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                leaf = frame.f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self, name: str, directory: str = None) -> Optional[str]:
+        """
+        Write the profile as <directory>/<UTC time>-<name>.folded, keeping at
+        most PROFILE_MAX_FILES profiles. Returns the path (None when no
+        samples were taken).
+        """
+        if not self.samples:
+            return None
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")
+        path = os.path.join(directory, f"{stamp}-{safe_name}.folded")
+        with open(path, "w") as f:
+            f.write(self.folded())
+        prune_profiles(directory)
+        return path
+
+
+def prune_profiles(directory: str, keep: int = None):
+    keep = keep or PROFILE_MAX_FILES
+    files = sorted(f for f in os.listdir(directory) if f.endswith(".folded"))
+    for name in files[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def authorized(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and token is not None and secrets.compare_digest(token, PROFILING_TOKEN)
+
+
+class ProfilingSwitch:
+    """
+    Whether, and for what share of requests, the API profiles itself.
+
+    The switch is turned on for a limited time through the authenticated
+    /debug/profiling endpoint and turns itself off when that time is up.
+    With a shared cache the state is stored there, so every worker on the
+    host follows it; workers re-read it at most once a second.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.until = 0.0
+        self.interval_ms = PROFILE_INTERVAL_MS
+        self._checked_at = 0.0
+
+    def set(self, sample_rate: float, duration_seconds: float, interval_ms: float = None):
+        from services.shared_cache import shared_cache
+        self.sample_rate = sample_rate
+        self.until = time.time() + duration_seconds if sample_rate > 0 else 0.0
+        self.interval_ms = interval_ms or PROFILE_INTERVAL_MS
+        shared_cache.set(SWITCH_KEY, {"sample_rate": self.sample_rate, "until": self.until,
+                                      "interval_ms": self.interval_ms}, ttl_seconds=max(duration_seconds, 1))
+        self._checked_at = time.monotonic()
+
+    def active_rate(self) -> float:
+        now = time.monotonic()
+        if now - self._checked_at > SWITCH_CHECK_SECONDS:
+            self._checked_at = now
+            from services.shared_cache import shared_cache
+            if shared_cache.enabled:
+                state = shared_cache.get(SWITCH_KEY) or {"sample_rate": 0.0, "until": 0.0}
+                self.sample_rate, self.until = state["sample_rate"], state["until"]
+                self.interval_ms = state.get("interval_ms", PROFILE_INTERVAL_MS)
+        if self.sample_rate and time.time() >= self.until:
+            self.sample_rate = 0.0
+        return self.sample_rate
+
+    def state(self) -> Dict[str, Any]:
+        rate = self.active_rate()
+        return {
+            "enabled": rate > 0,
+            "sample_rate": rate,
+            "interval_ms": self.interval_ms,
+            "until": datetime.fromtimestamp(self.until, timezone.utc).isoformat() if rate else None
+        }
+
+
+def recent_profiles(directory: str = None, count: int = 20) -> List[str]:
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted((f for f in os.listdir(directory) if f.endswith(".folded")), reverse=True)[:count]
+
+
+def request_monitor_sweep_profile(directory: str = None) -> str:
+    """
+    Ask the flood monitor to profile its next sweep
+    """
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MONITOR_TRIGGER)
+    open(path, "w").close()
+    return path
+
+
+def take_monitor_sweep_request(directory: str = None) -> bool:
+    """
+    True (once) when a profile of the next monitor sweep was requested
+    """
+    path = os.path.join(directory or PROFILE_DIR, MONITOR_TRIGGER)
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request while the switch is on (for its sample rate of
+    requests) or when the request carries X-Profile-Token. One request is
+    profiled at a time per worker, for at most PROFILE_MAX_SECONDS, and
+    streaming responses are never profiled, which bounds the overhead
+    whatever the rate. Async handlers share the event loop thread, so a
+    profile can include work for requests that overlapped it.
+    """
+
+    def __init__(self, app: ASGIApp, fastapi_app=None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self._busy = False
+
+    def _wanted(self, scope: Scope) -> Optional[str]:
+        """
+        The route template when this request should be profiled, else None
+        """
+        if not PROFILING_TOKEN or self._busy:
+            return None
+        token = Headers(scope=scope).get("x-profile-token")
+        if token is not None:
+            wanted = authorized(token)
+        else:
+            rate = profiling_switch.active_rate()
+            wanted = rate > 0 and random.random() < rate
+        if not wanted:
+            return None
+        from metrics import route_template
+        route = route_template(self.fastapi_app, scope)
+        return route if route not in STREAMING_ROUTES else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route = self._wanted(scope) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profiler = SamplingProfiler(profiling_switch.interval_ms, max_seconds=PROFILE_MAX_SECONDS).start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self._busy = False
+            try:
+                await run_in_threadpool(profiler.save, f"{scope['method']}-{route}")
+            except OSError as e:
+                print(f"⚠️ Failed to save profile: {e}")
+
+
+# Create a global instance
+profiling_switch = ProfilingSwitch()
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+from tracing import span
+
+T = TypeVar("T")
+
+
+class Provider(Generic[T]):
+    """
+    A service built on first use instead of at import.
+
+    Attribute access is forwarded to the built instance, so a module-level
+    provider stands in for the global instance it replaces
+    (``async_supabase.table(...)`` works either way). Construction runs once,
+    under a lock, so concurrent first requests share one client.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.build_seconds: Optional[float] = None
+        providers[name] = self
+
+    @property
+    def built(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    with span(f"build {self.name}"):
+                        self._instance = self.factory()
+                    self.build_seconds = time.perf_counter() - start
+                instance = self._instance
+        return instance
+
+    def reset(self):
+        """
+        Drop the instance; the next use builds a new one
+        """
+        with self._lock:
+            self._instance = None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+
+# Every provider by name
+providers: Dict[str, Provider] = {}
+
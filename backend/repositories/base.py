@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from pagination import page_rows
+
+# Tables the repositories read and write
+TABLES = ("users", "predictions", "alerts", "resources")
+# Columns of the prediction rows pushed to live dashboards
+PREDICTION_SUMMARY = ("id", "region", "severity", "created_at")
+# Recipient columns embedded in alert rows as "users": {...}
+USER_SUMMARY = ("name", "location")
+
+
+class Repository(ABC):
+    """
+    Data access for users, predictions, alerts and resources.
+
+    Each backend implements the abstract coroutines over its own
+    connections; one that misses any cannot be constructed.
+    Rows are plain dicts shaped as the Supabase REST API returns them
+    (timestamps as ISO 8601 strings, JSON columns decoded), so handlers and
+    jobs behave the same whichever backend DATA_BACKEND selects.
+    """
+
+    backend = "base"
+
+    @abstractmethod
+    async def ping(self):
+        """
+        Cheapest round trip to the database; raises when it is unreachable
+        """
+
+    @abstractmethod
+    async def count(self, table: str, method: str = "exact") -> int:
+        """
+        Rows in a table. Backends that can may answer "planned" and
+        "estimated" from table statistics instead of scanning.
+        """
+
+    @abstractmethod
+    async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def users_in_region(self, region: str) -> List[Dict[str, Any]]:
+        ...
+
+    async def insert_prediction(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Save a prediction; returns the stored row
+        """
+        rows = await self._insert("predictions", [record])
+        return rows[0] if rows else None
+
+    async def insert_alerts(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Save alert records (all with the same keys) in one statement
+        """
+        return await self._insert("alerts", records) if records else []
+
+    async def insert_resource(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rows = await self._insert("resources", [record])
+        return rows[0] if rows else None
+
+    @abstractmethod
+    async def resources(self, region: str = None) -> List[Dict[str, Any]]:
+        """
+        Resource records, for one region or all of them
+        """
+
+    async def prediction_page(self, region: str = None, columns: List[str] = None, limit: int = 20,
+                              after: Tuple[str, int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first page of predictions (for one region, or all), continuing
+        after a decoded cursor. Returns the rows and the next page's cursor.
+        """
+        filters = {"region": region} if region is not None else {}
+        rows = await self._page("predictions", "created_at", filters, columns, limit, after)
+        return page_rows(rows, limit, "created_at")
+
+    async def alert_page(self, user_id: int = None, columns: List[str] = None, limit: int = 50,
+                         after: Tuple[str, int] = None,
+                         with_users: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first page of alerts (for one user, or all), optionally with
+        each recipient's name and location under "users"
+        """
+        filters = {"user_id": user_id} if user_id is not None else {}
+        rows = await self._page("alerts", "sent_at", filters, columns, limit, after, with_users)
+        return page_rows(rows, limit, "sent_at")
+
+    @abstractmethod
+    async def high_severity_predictions(self, min_severity: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        Newest predictions with severity of at least ``min_severity``
+        """
+
+    @abstractmethod
+    async def latest_prediction_id(self) -> int:
+        """
+        Id of the newest prediction (0 when there are none)
+        """
+
+    @abstractmethod
+    async def predictions_after(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """
+        Summaries (PREDICTION_SUMMARY) of predictions saved after ``after_id``, oldest first
+        """
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def _insert(self, table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def _page(self, table: str, time_column: str, filters: Dict[str, Any], columns: Optional[List[str]],
+                    limit: int, after: Optional[Tuple[str, int]], with_users: bool = False) -> List[Dict[str, Any]]:
+        """
+        Up to limit + 1 rows ordered by (time_column, id) descending, strictly
+        after ``after``; page_rows trims the look-ahead row
+        """
@@ -0,0 +1,41 @@
+import asyncio
+import functools
+import threading
+from typing import Any
+from repositories.base import Repository
+
+
+class BlockingRepository:
+    """
+    Blocking front for a Repository, for jobs and for handlers that run in
+    worker threads.
+
+    Calls run on an event loop of the repository's own in a background
+    thread, so its connections stay on one loop whichever thread calls, and
+    the caller waits for the result. Context variables travel with each
+    call, so spans opened inside belong to the caller's trace.
+    """
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name=f"{repository.backend}-repository", daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, attr: str) -> Any:
+        method = getattr(self.repository, attr)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            # Scheduled from this thread, so the task runs in a copy of its context
+            return asyncio.run_coroutine_threadsafe(method(*args, **kwargs), self._loop).result()
+        return call
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.repository.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+import orjson
+from config import DATABASE_URL, DB_MAX_CONNECTIONS, DB_TIMEOUT_SECONDS
+from metrics import upstream_timer
+from repositories.sql import SQLRepository
+
+
+class PostgresRepository(SQLRepository):
+    """
+    Repository talking to Postgres directly (DATABASE_URL, e.g. the Supabase
+    database's connection string) through an asyncpg connection pool of up
+    to DB_MAX_CONNECTIONS connections. Skips the REST layer's HTTP and JSON
+    round trip, and "estimated" counts come from the planner's statistics.
+
+    asyncpg is an optional dependency, imported when the pool is first
+    needed. The pool belongs to the event loop that created it.
+    """
+
+    backend = "postgres"
+    # Cursor timestamps arrive as ISO 8601 text
+    TIMESTAMP_PARAM = "?::text::timestamptz"
+
+    def __init__(self, dsn: str = None, max_connections: int = None):
+        self.dsn = dsn or DATABASE_URL
+        if not self.dsn:
+            raise RuntimeError("DATA_BACKEND=postgres needs DATABASE_URL")
+        self.max_connections = max_connections or DB_MAX_CONNECTIONS
+        self._pool = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+
+    async def _get_pool(self):
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    try:
+                        import asyncpg
+                    except ImportError:
+                        raise RuntimeError("DATA_BACKEND=postgres needs asyncpg (pip install asyncpg)")
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=1,
+                        max_size=self.max_connections,
+                        command_timeout=DB_TIMEOUT_SECONDS,
+                        init=self._init_connection
+                    )
+        return self._pool
+
+    @staticmethod
+    async def _init_connection(conn):
+        # JSON columns in and out as Python objects, as PostgREST returns them
+        for json_type in ("json", "jsonb"):
+            await conn.set_type_codec(json_type, schema="pg_catalog",
+                                      encoder=lambda value: orjson.dumps(value).decode(), decoder=orjson.loads)
+
+    @staticmethod
+    def _sql(sql: str) -> str:
+        # "?" placeholders to asyncpg's $1, $2, ...
+        numbers = itertools.count(1)
+        return re.sub(r"\?", lambda _: f"${next(numbers)}", sql)
+
+    async def _fetch(self, operation: str, sql: str, args: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        pool = await self._get_pool()
+        with upstream_timer("postgres", operation):
+            records = await pool.fetch(self._sql(sql), *args, timeout=DB_TIMEOUT_SECONDS)
+        return [
+            {key: value.isoformat() if isinstance(value, (datetime, date)) else value for key, value in record.items()}
+            for record in records
+        ]
+
+    async def count(self, table: str, method: str = "exact") -> int:
+        if method != "exact":
+            # The planner's row estimate: no scan however large the table is.
+            # -1 until the table has been vacuumed or analyzed once.
+            rows = await self._fetch(
+                f"count {table}",
+                "SELECT reltuples::bigint AS n FROM pg_class WHERE oid = ?::text::regclass",
+                (self._table(table),)
+            )
+            if rows and rows[0]["n"] >= 0:
+                return rows[0]["n"]
+        return await super().count(table, method)
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
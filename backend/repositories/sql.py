@@ -0,0 +1,108 @@
+from abc import abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from repositories.base import Repository, TABLES, PREDICTION_SUMMARY, USER_SUMMARY
+
+
+class SQLRepository(Repository):
+    """
+    Repository for databases queried with SQL directly. Statements are
+    written with "?" placeholders; backends run them (translating the
+    placeholders if their driver needs to) and return rows as dicts.
+    """
+
+    # Placeholder for a cursor timestamp compared with a time column
+    TIMESTAMP_PARAM = "?"
+
+    @abstractmethod
+    async def _fetch(self, operation: str, sql: str, args: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        ...
+
+    def _encode(self, value: Any) -> Any:
+        """
+        A value as the driver should receive it
+        """
+        return value
+
+    @staticmethod
+    def _table(table: str) -> str:
+        # Table names are interpolated into statements
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return table
+
+    async def ping(self):
+        await self._fetch("ping", "SELECT 1 AS ok")
+
+    async def count(self, table: str, method: str = "exact") -> int:
+        rows = await self._fetch(f"count {table}", f"SELECT count(*) AS n FROM {self._table(table)}")
+        return rows[0]["n"]
+
+    async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rows = await self._fetch("SELECT users", "SELECT * FROM users WHERE id = ?", (user_id,))
+        return rows[0] if rows else None
+
+    async def users_in_region(self, region: str) -> List[Dict[str, Any]]:
+        return await self._fetch("SELECT users", "SELECT * FROM users WHERE location = ?", (region,))
+
+    async def resources(self, region: str = None) -> List[Dict[str, Any]]:
+        if region is None:
+            return await self._fetch("SELECT resources", "SELECT * FROM resources")
+        return await self._fetch("SELECT resources", "SELECT * FROM resources WHERE region = ?", (region,))
+
+    async def high_severity_predictions(self, min_severity: float, limit: int) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            "SELECT predictions",
+            "SELECT * FROM predictions WHERE severity >= ? ORDER BY created_at DESC LIMIT ?",
+            (min_severity, limit)
+        )
+
+    async def latest_prediction_id(self) -> int:
+        rows = await self._fetch("SELECT predictions", "SELECT max(id) AS id FROM predictions")
+        return rows[0]["id"] or 0
+
+    async def predictions_after(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            "SELECT predictions",
+            f"SELECT {', '.join(PREDICTION_SUMMARY)} FROM predictions WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+
+    async def _insert(self, table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        columns = list(records[0])
+        row = f"({', '.join('?' for _ in columns)})"
+        args = [self._encode(record[column]) for record in records for column in columns]
+        return await self._fetch(
+            f"INSERT {table}",
+            f"INSERT INTO {self._table(table)} ({', '.join(columns)}) "
+            f"VALUES {', '.join(row for _ in records)} RETURNING *",
+            args
+        )
+
+    async def _page(self, table: str, time_column: str, filters: Dict[str, Any], columns: Optional[List[str]],
+                    limit: int, after: Optional[Tuple[str, int]], with_users: bool = False) -> List[Dict[str, Any]]:
+        select = ", ".join(f"t.{column}" for column in columns) if columns else "t.*"
+        source = f"{self._table(table)} t"
+        if with_users:
+            select += "".join(f", u.{column} AS users__{column}" for column in USER_SUMMARY)
+            source += " LEFT JOIN users u ON u.id = t.user_id"
+        where, args = [], []
+        for column, value in filters.items():
+            where.append(f"t.{column} = ?")
+            args.append(value)
+        if after:
+            # Row-value comparison: an index range scan on (time_column, id)
+            where.append(f"(t.{time_column}, t.id) < ({self.TIMESTAMP_PARAM}, ?)")
+            args.extend(after)
+        sql = f"SELECT {select} FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY t.{time_column} DESC, t.id DESC LIMIT ?"
+        args.append(limit + 1)
+
+        rows = await self._fetch(f"SELECT {table}", sql, args)
+        if with_users:
+            for row in rows:
+                user = {column: row.pop(f"users__{column}") for column in USER_SUMMARY}
+                # As PostgREST embeds it: null when the alert has no recipient
+                row["users"] = user if any(v is not None for v in user.values()) else None
+        return rows
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+import threading
+from typing import Any, Dict, List, Sequence
+import orjson
+from config import SQLITE_PATH
+from metrics import upstream_timer
+from repositories.sql import SQLRepository
+
+# JSON columns, stored as text
+JSON_COLUMNS = ("prediction_data", "details")
+
+# supabase_schema.sql in SQLite terms. Timestamps are ISO 8601 text in UTC
+# with a fixed width, so they sort by time and look like PostgREST's.
+NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now') || '+00:00')"
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL UNIQUE,
+    location TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    region TEXT NOT NULL,
+    severity REAL NOT NULL,
+    prediction_data TEXT,
+    created_at TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    message TEXT NOT NULL,
+    sent_at TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    region TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    details TEXT,
+    allocated_at TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE INDEX IF NOT EXISTS idx_users_location ON users(location);
+CREATE INDEX IF NOT EXISTS idx_predictions_region_created_at_id ON predictions(region, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at_id ON predictions(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_predictions_severity ON predictions(severity);
+CREATE INDEX IF NOT EXISTS idx_alerts_user_id_sent_at_id ON alerts(user_id, sent_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_sent_at_id ON alerts(sent_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_resources_region ON resources(region);
+"""
+
+
+class SQLiteRepository(SQLRepository):
+    """
+    Repository over a local SQLite file with the same tables as Supabase,
+    created on first use. Needs no server or network, so the API, the
+    monitor job and the benchmarks run fully offline against it.
+
+    The file is in WAL mode, so readers never wait for the writer and
+    several worker processes can share it. Each thread keeps its own
+    connection and statements run in worker threads, off the event loop.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or SQLITE_PATH
+        # sqlite3 connections may not be shared between threads
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only ever used by this thread; close() may run on another
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return orjson.dumps(value).decode()
+        return value
+
+    def _run(self, sql: str, args: Sequence[Any]) -> List[Dict[str, Any]]:
+        rows = [dict(row) for row in self._connection().execute(sql, tuple(args)).fetchall()]
+        for row in rows:
+            for column in JSON_COLUMNS:
+                if isinstance(row.get(column), str):
+                    row[column] = orjson.loads(row[column])
+        return rows
+
+    async def _fetch(self, operation: str, sql: str, args: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        with upstream_timer("sqlite", operation):
+            return await asyncio.to_thread(self._run, sql, args)
+
+    async def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pagination import keyset_page
+from repositories.base import Repository, PREDICTION_SUMMARY, USER_SUMMARY
+
+
+class SupabaseRepository(Repository):
+    """
+    Repository over the Supabase REST API (PostgREST). Calls are timed by
+    the client's transport, as for every other Supabase request.
+    """
+
+    backend = "supabase"
+
+    def __init__(self, client=None, owns_client: bool = False):
+        from database import async_supabase
+        self.client = client if client is not None else async_supabase
+        self.owns_client = owns_client
+
+    async def ping(self):
+        await self.client.table("predictions").select("id").limit(1).execute()
+
+    async def count(self, table: str, method: str = "exact") -> int:
+        # Only the count is wanted; one id keeps the response body tiny
+        result = await self.client.table(table).select("id", count=method).limit(1).execute()
+        return result.count or 0
+
+    async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        result = await self.client.table("users").select("*").eq("id", user_id).execute()
+        return result.data[0] if result.data else None
+
+    async def users_in_region(self, region: str) -> List[Dict[str, Any]]:
+        result = await self.client.table("users").select("*").eq("location", region).execute()
+        return result.data
+
+    async def resources(self, region: str = None) -> List[Dict[str, Any]]:
+        query = self.client.table("resources").select("*")
+        if region is not None:
+            query = query.eq("region", region)
+        result = await query.execute()
+        return result.data
+
+    async def high_severity_predictions(self, min_severity: float, limit: int) -> List[Dict[str, Any]]:
+        result = await self.client.table("predictions").select("*").gte("severity", min_severity) \
+            .order("created_at", desc=True).limit(limit).execute()
+        return result.data
+
+    async def latest_prediction_id(self) -> int:
+        result = await self.client.table("predictions").select("id").order("id", desc=True).limit(1).execute()
+        return result.data[0]["id"] if result.data else 0
+
+    async def predictions_after(self, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        result = await self.client.table("predictions").select(", ".join(PREDICTION_SUMMARY)) \
+            .gt("id", after_id).order("id").limit(limit).execute()
+        return result.data
+
+    async def close(self):
+        if self.owns_client:
+            await self.client.aclose()
+
+    async def _insert(self, table: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        result = await self.client.table(table).insert(records if len(records) > 1 else records[0]).execute()
+        return result.data or []
+
+    async def _page(self, table: str, time_column: str, filters: Dict[str, Any], columns: Optional[List[str]],
+                    limit: int, after: Optional[Tuple[str, int]], with_users: bool = False) -> List[Dict[str, Any]]:
+        select = ",".join(columns) if columns else "*"
+        if with_users:
+            # Embedded through the alerts.user_id foreign key
+            select += f", users({', '.join(USER_SUMMARY)})"
+        query = self.client.table(table).select(select)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        result = await keyset_page(query, time_column, limit, after).execute()
+        return result.data
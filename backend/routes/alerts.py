@@ -1,8 +1,15 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Dict, Any, List
 from services.sms_service import sms_service
-from database import supabase
+from services.dashboard_stats import dashboard_stats
+from services.event_hub import event_hub
+from database import repository
+from pagination import clamp_limit, decode_cursor, field_names
+
+# Columns clients may request with ?fields=; alerts are keyed by sent_at
+ALERT_FIELDS = ("id", "user_id", "message", "sent_at")
 
 router = APIRouter()
 
@@ -16,7 +23,7 @@ class BulkAlertRequest(BaseModel):
     severity_threshold: float = 0.5
 
 @router.post("/send")
-def send_alert(alert: AlertRequest) -> Dict[str, Any]:
+async def send_alert(alert: AlertRequest) -> Dict[str, Any]:
     """
     Send alert to a specific user
     
@@ -28,16 +35,15 @@ def send_alert(alert: AlertRequest) -> Dict[str, Any]:
     """
     try:
         # Get user information from database
-        user_result = supabase.table("users").select("*").eq("id", alert.user_id).execute()
+        user = await repository.get_user(alert.user_id)
         
-        if not user_result.data:
+        if user is None:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = user_result.data[0]
         phone = user["phone"]
         
         # Send SMS
-        success = sms_service.send_sms(phone, alert.message)
+        success = await run_in_threadpool(sms_service.send_sms, phone, alert.message)
         
         if success:
             # Save alert to database
@@ -45,7 +51,9 @@ def send_alert(alert: AlertRequest) -> Dict[str, Any]:
                 "user_id": alert.user_id,
                 "message": alert.message
             }
-            supabase.table("alerts").insert(alert_record).execute()
+            await repository.insert_alerts([alert_record])
+            event_hub.publish("alert", {"user_id": alert.user_id, "count": 1})
+            dashboard_stats.changed()
         
         return {
             "status": "sent" if success else "failed",
@@ -60,7 +68,7 @@ def send_alert(alert: AlertRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Alert service error: {str(e)}")
 
 @router.post("/bulk")
-def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
+async def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
     """
     Send alerts to all users in a region
     
@@ -72,9 +80,9 @@ def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
     """
     try:
         # Get all users in the specified region
-        users_result = supabase.table("users").select("*").eq("location", bulk_alert.region).execute()
+        users = await repository.users_in_region(bulk_alert.region)
         
-        if not users_result.data:
+        if not users:
             return {
                 "status": "no_users",
                 "message": f"No users found in region: {bulk_alert.region}",
@@ -83,14 +91,14 @@ def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
             }
         
         # Extract phone numbers
-        phone_numbers = [user["phone"] for user in users_result.data]
+        phone_numbers = [user["phone"] for user in users]
         
         # Send bulk SMS
-        results = sms_service.send_bulk_sms(phone_numbers, bulk_alert.message)
+        results = await run_in_threadpool(sms_service.send_bulk_sms, phone_numbers, bulk_alert.message)
         
         # Save successful alerts to database
         successful_alerts = []
-        for user in users_result.data:
+        for user in users:
             if user["phone"] not in [error.split()[-1] for error in results.get("errors", [])]:
                 successful_alerts.append({
                     "user_id": user["id"],
@@ -98,12 +106,14 @@ def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
                 })
         
         if successful_alerts:
-            supabase.table("alerts").insert(successful_alerts).execute()
+            await repository.insert_alerts(successful_alerts)
+            event_hub.publish("alert", {"region": bulk_alert.region, "count": len(successful_alerts)})
+            dashboard_stats.changed()
         
         return {
             "status": "completed",
             "region": bulk_alert.region,
-            "total_users": len(users_result.data),
+            "total_users": len(users),
             "sent": results["sent"],
             "failed": results["failed"],
             "errors": results.get("errors", [])
@@ -113,37 +123,69 @@ def send_bulk_alert(bulk_alert: BulkAlertRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Bulk alert service error: {str(e)}")
 
 @router.get("/history/{user_id}")
-def get_alert_history(user_id: int, limit: int = 10) -> Dict[str, Any]:
+async def get_alert_history(user_id: int, limit: int = 10, cursor: str = None, fields: str = None) -> Dict[str, Any]:
     """
-    Get alert history for a specific user
+    Get alert history for a specific user, newest first
+    
+    Args:
+        user_id: User ID
+        limit: Page size
+        cursor: next_cursor from the previous page
+        fields: Comma-separated columns to return (e.g. message,sent_at)
     """
     try:
-        result = supabase.table("alerts").select("*").eq("user_id", user_id).limit(limit).order("sent_at", desc=True).execute()
+        limit = clamp_limit(limit)
+        try:
+            columns = field_names(fields, ALERT_FIELDS, "sent_at")
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        alerts, next_cursor = await repository.alert_page(user_id, columns, limit, after)
         
         return {
             "status": "success",
             "user_id": user_id,
-            "alerts": result.data,
-            "count": len(result.data)
+            "alerts": alerts,
+            "count": len(alerts),
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get alert history: {str(e)}")
 
 @router.get("/")
-def get_recent_alerts(limit: int = 50) -> Dict[str, Any]:
+async def get_recent_alerts(limit: int = 50, cursor: str = None, fields: str = None) -> Dict[str, Any]:
     """
-    Get recent alerts across all users
+    Get recent alerts across all users, newest first
+    
+    Args:
+        limit: Page size
+        cursor: next_cursor from the previous page
+        fields: Comma-separated columns to return; "users" adds the recipient's name and location
     """
     try:
-        result = supabase.table("alerts").select("*, users(name, location)").limit(limit).order("sent_at", desc=True).execute()
+        limit = clamp_limit(limit)
+        try:
+            columns = field_names(fields, ALERT_FIELDS + ("users",), "sent_at")
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Recipients are included unless a projection leaves them out
+        with_users = columns is None or "users" in columns
+        if columns is not None:
+            columns = [name for name in columns if name != "users"]
+        alerts, next_cursor = await repository.alert_page(None, columns, limit, after, with_users)
         
         return {
             "status": "success",
-            "alerts": result.data,
-            "count": len(result.data)
+            "alerts": alerts,
+            "count": len(alerts),
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get alerts: {str(e)}")
-
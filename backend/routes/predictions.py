@@ -1,12 +1,21 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any
 from services.earth2_service import earth2_service
-from database import supabase
+from services.routing_service import routing_service
+from services.dashboard_stats import dashboard_stats
+from services.shared_cache import shared_cache
+from config import PREDICTION_CACHE_SECONDS
+from database import repository
+from pagination import clamp_limit, decode_cursor, field_names
+
+# Columns clients may request with ?fields=
+PREDICTION_FIELDS = ("id", "region", "severity", "created_at", "prediction_data")
 
 router = APIRouter()
 
 @router.get("/{region}")
-def get_flood_prediction(region: str, lat: float = None, lon: float = None) -> Dict[str, Any]:
+async def get_flood_prediction(region: str, lat: float = None, lon: float = None) -> Dict[str, Any]:
     """
     Get flood prediction for a specific region
     
@@ -17,33 +26,55 @@ def get_flood_prediction(region: str, lat: float = None, lon: float = None) -> D
         
     Returns:
         Flood prediction data
+        
+    A prediction fetched by any worker is reused for PREDICTION_CACHE_SECONDS
+    (when SHARED_CACHE_PATH is set); only freshly fetched predictions are saved.
     """
     try:
-        # Get prediction from Earth-2 service
-        prediction_data = earth2_service.get_flood_prediction(region, lat, lon)
+        cache_key = f"prediction:{region}:{lat}:{lon}"
+        prediction_data = shared_cache.get(cache_key)
+        cached = prediction_data is not None
+        if not cached:
+            # Get prediction from Earth-2 service
+            prediction_data = await run_in_threadpool(earth2_service.get_flood_prediction, region, lat, lon)
+            
+            if "error" in prediction_data:
+                raise HTTPException(status_code=500, detail=prediction_data["error"])
+            shared_cache.set(cache_key, prediction_data, ttl_seconds=PREDICTION_CACHE_SECONDS)
         
-        if "error" in prediction_data:
-            raise HTTPException(status_code=500, detail=prediction_data["error"])
+        # Flooded roads feed straight into evacuation routing. A fetched
+        # prediction is published to every worker (through the shared cache
+        # when set), so a cached one has been applied already. A point
+        # prediction only describes one location, so it must not replace the
+        # region-wide flood extent.
+        if not cached and lat is None and lon is None:
+            await run_in_threadpool(routing_service.apply_flood_prediction, region, prediction_data)
         
-        # Save prediction to database
-        db_record = {
-            "region": region,
-            "severity": prediction_data.get("severity", 0.0),
-            "prediction_data": prediction_data
-        }
-        
-        try:
-            result = supabase.table("predictions").insert(db_record).execute()
-            saved_to_db = len(result.data) > 0 if result.data else False
-        except Exception as db_error:
-            print(f"Database insert failed: {db_error}")
-            saved_to_db = False
+        saved_to_db = False
+        if not cached:
+            # Save prediction to database
+            db_record = {
+                "region": region,
+                "severity": prediction_data.get("severity", 0.0),
+                "prediction_data": prediction_data
+            }
+            
+            try:
+                row = await repository.insert_prediction(db_record)
+                saved_to_db = row is not None
+                if saved_to_db:
+                    # Live dashboards get the prediction now rather than on the next refresh
+                    dashboard_stats.note_prediction(row)
+                    dashboard_stats.changed()
+            except Exception as db_error:
+                print(f"Database insert failed: {db_error}")
         
         return {
             "status": "success",
             "region": region,
             "prediction": prediction_data,
-            "saved_to_db": saved_to_db
+            "saved_to_db": saved_to_db,
+            "cached": cached
         }
         
     except HTTPException:
@@ -53,37 +84,65 @@ def get_flood_prediction(region: str, lat: float = None, lon: float = None) -> D
         raise HTTPException(status_code=500, detail=f"Prediction service error: {str(e)}")
 
 @router.get("/history/{region}")
-def get_prediction_history(region: str, limit: int = 10) -> Dict[str, Any]:
+async def get_prediction_history(region: str, limit: int = 10, cursor: str = None, fields: str = None) -> Dict[str, Any]:
     """
-    Get historical predictions for a region
+    Get historical predictions for a region, newest first
+    
+    Args:
+        region: Region name
+        limit: Page size
+        cursor: next_cursor from the previous page
+        fields: Comma-separated columns to return (e.g. region,severity,created_at)
     """
     try:
-        result = supabase.table("predictions").select("*").eq("region", region).limit(limit).order("created_at", desc=True).execute()
+        limit = clamp_limit(limit)
+        try:
+            columns = field_names(fields, PREDICTION_FIELDS, "created_at")
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        predictions, next_cursor = await repository.prediction_page(region, columns, limit, after)
         
         return {
             "status": "success",
             "region": region,
-            "predictions": result.data,
-            "count": len(result.data)
+            "predictions": predictions,
+            "count": len(predictions),
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get prediction history: {str(e)}")
 
 @router.get("/")
-def get_all_recent_predictions(limit: int = 20) -> Dict[str, Any]:
+async def get_all_recent_predictions(limit: int = 20, cursor: str = None, fields: str = None) -> Dict[str, Any]:
     """
-    Get recent predictions for all regions
+    Get recent predictions for all regions, newest first
+    
+    Args:
+        limit: Page size
+        cursor: next_cursor from the previous page
+        fields: Comma-separated columns to return (e.g. region,severity,created_at)
     """
     try:
-        result = supabase.table("predictions").select("*").limit(limit).order("created_at", desc=True).execute()
+        limit = clamp_limit(limit)
+        try:
+            columns = field_names(fields, PREDICTION_FIELDS, "created_at")
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        predictions, next_cursor = await repository.prediction_page(None, columns, limit, after)
         
         return {
             "status": "success",
-            "predictions": result.data,
-            "count": len(result.data)
+            "predictions": predictions,
+            "count": len(predictions),
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get predictions: {str(e)}")
-
@@ -0,0 +1,72 @@
+import os
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import Dict, Any
+from config import PROFILING_TOKEN, PROFILE_DIR
+from profiling import authorized, profiling_switch, recent_profiles, request_monitor_sweep_profile
+
+router = APIRouter()
+
+class ProfilingRequest(BaseModel):
+    sample_rate: float = 0.01
+    duration_seconds: float = 300
+    interval_ms: float = None
+    monitor_sweep: bool = False
+
+def require_token(token: str):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@router.get("")
+def get_profiling(x_profile_token: str = Header(None)) -> Dict[str, Any]:
+    """
+    Profiling switch state and the most recent profiles
+    """
+    require_token(x_profile_token)
+    return {
+        "status": "success",
+        "switch": profiling_switch.state(),
+        "profiles": recent_profiles()
+    }
+
+@router.post("")
+def set_profiling(request: ProfilingRequest, x_profile_token: str = Header(None)) -> Dict[str, Any]:
+    """
+    Turn request profiling on for a share of requests for a limited time (or
+    off, with sample_rate 0), and optionally profile the flood monitor's next sweep
+
+    Args:
+        request: Sample rate (0-1), how long to stay on, sampling interval and
+            whether to profile the next monitor sweep
+
+    Returns:
+        The new switch state
+    """
+    require_token(x_profile_token)
+    if not 0 <= request.sample_rate <= 1:
+        raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+    if not 0 < request.duration_seconds <= 3600:
+        raise HTTPException(status_code=400, detail="duration_seconds must be between 0 and 3600")
+    if request.interval_ms is not None and request.interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+
+    profiling_switch.set(request.sample_rate, request.duration_seconds, request.interval_ms)
+    result = {"status": "success", "switch": profiling_switch.state()}
+    if request.monitor_sweep:
+        request_monitor_sweep_profile()
+        result["monitor_sweep"] = "requested"
+    return result
+
+@router.get("/{name}", response_class=PlainTextResponse)
+def download_profile(name: str, x_profile_token: str = Header(None)) -> str:
+    """
+    A saved profile in collapsed-stack format (feed to flamegraph.pl or speedscope)
+    """
+    require_token(x_profile_token)
+    if name not in recent_profiles(count=10 ** 6):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(os.path.join(PROFILE_DIR, name), "r") as f:
+        return f.read()
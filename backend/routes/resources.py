@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, List
 from services.resource_allocator import resource_allocator
+from services.population_grid import population_grid
+from database import repository
 
 router = APIRouter()
 
@@ -71,7 +73,7 @@ def get_resource_status(region: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Failed to get resource status: {str(e)}")
 
 @router.post("/update")
-def update_resource_inventory(update: ResourceUpdateRequest) -> Dict[str, Any]:
+async def update_resource_inventory(update: ResourceUpdateRequest) -> Dict[str, Any]:
     """
     Update resource inventory (allocate, distribute, or request more)
     
@@ -82,8 +84,6 @@ def update_resource_inventory(update: ResourceUpdateRequest) -> Dict[str, Any]:
         Update confirmation
     """
     try:
-        from database import supabase
-        
         # Record the resource update
         update_record = {
             "region": update.region,
@@ -92,19 +92,19 @@ def update_resource_inventory(update: ResourceUpdateRequest) -> Dict[str, Any]:
             "action": update.action
         }
         
-        result = supabase.table("resources").insert(update_record).execute()
+        row = await repository.insert_resource(update_record)
         
         return {
             "status": "success",
             "update": update_record,
-            "database_id": result.data[0]["id"] if result.data else None
+            "database_id": row["id"] if row else None
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update resources: {str(e)}")
 
 @router.get("/inventory")
-def get_global_inventory() -> Dict[str, Any]:
+async def get_global_inventory() -> Dict[str, Any]:
     """
     Get global resource inventory across all regions
     
@@ -112,14 +112,12 @@ def get_global_inventory() -> Dict[str, Any]:
         Global resource status
     """
     try:
-        from database import supabase
-        
         # Get all resource records
-        result = supabase.table("resources").select("*").execute()
+        records = await repository.resources()
         
         # Aggregate by region and resource type
         inventory = {}
-        for record in result.data:
+        for record in records:
             region = record["region"]
             resource_type = record["resource_type"]
             
@@ -158,6 +156,9 @@ def get_resource_requirements(region: str, population: int = None) -> Dict[str,
         Resource requirements breakdown
     """
     try:
+        if not population and population_grid.has_region(region):
+            population = int(population_grid.region_population(region))
+        
         if not population:
             # Estimate population based on region
             regional_populations = {
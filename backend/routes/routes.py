@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+import contextvars
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import Dict, Any, List
+import orjson
+from config import BULK_ROUTE_CONCURRENCY
 from services.routing_service import routing_service
+from services.evacuation_centers import evacuation_centers
+from services.isochrones import MIN_CELL_DEG, MAX_CELL_DEG, MAX_BAND_MIN, MAX_BANDS
 
 router = APIRouter()
 
@@ -9,10 +17,27 @@ class RouteRequest(BaseModel):
     origin: str
     destination: str = None
     region: str = None
+    # Map zoom level to simplify the returned polyline for (full detail when omitted)
+    zoom: int = None
 
 class BulkRouteRequest(BaseModel):
     origins: List[str]
     region: str
+    zoom: int = None
+
+class EvacueeOrigin(BaseModel):
+    location: str
+    population: int = Field(..., ge=0)
+
+class AssignmentRequest(BaseModel):
+    region: str
+    origins: List[EvacueeOrigin] = None
+    # Population grid cells aggregated per origin side
+    cell_factor: int = Field(10, ge=1, le=100)
+
+class CenterCapacityUpdate(BaseModel):
+    capacity: int = Field(None, ge=0)
+    occupancy: int = Field(None, ge=0)
 
 @router.post("/evacuation")
 def get_evacuation_route(route_request: RouteRequest) -> Dict[str, Any]:
@@ -29,11 +54,12 @@ def get_evacuation_route(route_request: RouteRequest) -> Dict[str, Any]:
         route_data = routing_service.get_evacuation_route(
             origin=route_request.origin,
             destination=route_request.destination,
-            region=route_request.region
+            region=route_request.region,
+            zoom=route_request.zoom
         )
         
         if "error" in route_data:
-            raise HTTPException(status_code=500, detail=route_data["error"])
+            raise HTTPException(status_code=404 if route_data.get("not_found") else 500, detail=route_data["error"])
         
         return {
             "status": "success",
@@ -64,7 +90,8 @@ def get_bulk_evacuation_routes(bulk_request: BulkRouteRequest) -> Dict[str, Any]
     try:
         routes = routing_service.get_multiple_evacuation_routes(
             origins=bulk_request.origins,
-            region=bulk_request.region
+            region=bulk_request.region,
+            zoom=bulk_request.zoom
         )
         
         successful_routes = [route for route in routes if "error" not in route]
@@ -83,6 +110,203 @@ def get_bulk_evacuation_routes(bulk_request: BulkRouteRequest) -> Dict[str, Any]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Bulk routing service error: {str(e)}")
 
+@router.post("/evacuation/bulk/stream")
+async def stream_bulk_evacuation_routes(bulk_request: BulkRouteRequest) -> StreamingResponse:
+    """
+    Stream evacuation routes for multiple origins as NDJSON
+    
+    Each line is {"index", "origin", "route"} or {"index", "origin", "error"},
+    written as soon as that origin's route is ready (so not necessarily in
+    request order); the last line is a summary. At most
+    BULK_ROUTE_CONCURRENCY origins are routed at once, so memory stays flat
+    however large the batch.
+    
+    Args:
+        bulk_request: Bulk route request containing list of origins and region
+        
+    Returns:
+        application/x-ndjson stream of routes
+    """
+    # Off the event loop: it may first apply another worker's flood overlay
+    route = await run_in_threadpool(routing_service.bulk_router, bulk_request.region, bulk_request.zoom)
+    
+    async def lines():
+        loop = asyncio.get_running_loop()
+        origins = iter(enumerate(bulk_request.origins))
+        pending = {}
+        success_count = failure_count = 0
+        while True:
+            # Keep the worker threads busy without queueing the whole batch
+            while len(pending) < BULK_ROUTE_CONCURRENCY:
+                item = next(origins, None)
+                if item is None:
+                    break
+                # Run in the request's context so trace spans attach to it
+                pending[loop.run_in_executor(None, contextvars.copy_context().run, route, item[1])] = item
+            if not pending:
+                break
+            
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                index, origin = pending.pop(future)
+                result = future.result()
+                if "error" in result:
+                    failure_count += 1
+                    line = {"index": index, "origin": origin, "error": result["error"]}
+                else:
+                    success_count += 1
+                    line = {"index": index, "origin": origin, "route": result}
+                yield orjson.dumps(line, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+        
+        yield orjson.dumps({
+            "status": "completed",
+            "region": bulk_request.region,
+            "total_requests": len(bulk_request.origins),
+            "success_count": success_count,
+            "failure_count": failure_count
+        }) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.post("/evacuation/assign")
+def assign_evacuees(assignment_request: AssignmentRequest) -> Dict[str, Any]:
+    """
+    Assign evacuees to evacuation centers by travel time under capacity limits
+    
+    Args:
+        assignment_request: Region and optional origins with populations
+        
+    Returns:
+        Per-center load and per-origin allocations
+    """
+    try:
+        origins = [origin.dict() for origin in assignment_request.origins] if assignment_request.origins else None
+        plan = routing_service.assign_evacuees(
+            region=assignment_request.region,
+            origins=origins,
+            cell_factor=assignment_request.cell_factor
+        )
+        
+        if "error" in plan:
+            raise HTTPException(status_code=400, detail=plan["error"])
+        
+        return {
+            "status": "success",
+            "region": assignment_request.region,
+            "assignment": plan
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Evacuee assignment error: {str(e)}")
+
+@router.get("/isochrones/{region}")
+def get_evacuation_isochrones(region: str, bands: str = "15,30,60", cell_deg: float = 0.005,
+                              format: str = "cells") -> Dict[str, Any]:
+    """
+    Get the areas of a region that can reach an evacuation center within each travel-time band
+    
+    Args:
+        region: Region name
+        bands: Comma-separated band limits in minutes (at most 12, capped at 240)
+        cell_deg: Grid cell size in degrees (clamped to 0.0005-0.1)
+        format: "cells" (row runs of grid cells) or "geojson" (band polygons)
+        
+    Returns:
+        Travel-time bands for the region
+    """
+    try:
+        try:
+            bands_min = tuple(int(b) for b in bands.split(",") if b.strip())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="bands must be comma-separated minutes, e.g. 15,30,60")
+        if not bands_min or min(bands_min) <= 0 or cell_deg <= 0:
+            raise HTTPException(status_code=400, detail="bands and cell_deg must be positive")
+        if len(set(bands_min)) > MAX_BANDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BANDS} bands")
+        # Keep the search and the grid bounded whatever the query string says
+        bands_min = tuple(min(b, MAX_BAND_MIN) for b in bands_min)
+        cell_deg = min(max(cell_deg, MIN_CELL_DEG), MAX_CELL_DEG)
+        if format not in ("cells", "geojson"):
+            raise HTTPException(status_code=400, detail="format must be 'cells' or 'geojson'")
+        
+        result = routing_service.get_isochrones(region, bands_min, cell_deg, output=format)
+        
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Isochrone error: {str(e)}")
+
+@router.post("/evacuation-centers/{region}/{center_name}/capacity")
+def update_center_capacity(region: str, center_name: str, update: CenterCapacityUpdate) -> Dict[str, Any]:
+    """
+    Update a center's capacity or occupancy and repair the current assignment
+    
+    Centers and plans are held in memory per process: with API_WORKERS > 1
+    the update only reaches the worker that served this request.
+    
+    Args:
+        region: Region name
+        center_name: Evacuation center name
+        update: New capacity and/or current occupancy
+        
+    Returns:
+        Remaining capacity and how the assignment changed
+    """
+    try:
+        result = routing_service.update_center_capacity(
+            region, center_name, capacity=update.capacity, occupancy=update.occupancy
+        )
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        return {
+            "status": "success",
+            "region": region,
+            "update": result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update center capacity: {str(e)}")
+
+@router.get("/evacuation-centers/nearest")
+def get_nearest_evacuation_centers(lat: float, lon: float, k: int = Query(5, ge=1, le=100), radius_km: float = None,
+                                   include_closed: bool = False) -> Dict[str, Any]:
+    """
+    Get the nearest evacuation centers to a location
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        k: Maximum number of centers to return
+        radius_km: Only return centers within this distance (optional)
+        include_closed: Also return closed or full centers
+        
+    Returns:
+        Centers ordered by distance, with distance_km
+    """
+    try:
+        centers = evacuation_centers.nearest(lat, lon, k=k, radius_km=radius_km, open_only=not include_closed)
+        
+        return {
+            "status": "success",
+            "location": {"lat": lat, "lon": lon},
+            "evacuation_centers": centers,
+            "count": len(centers)
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find nearest evacuation centers: {str(e)}")
+
 @router.get("/evacuation-centers/{region}")
 def get_evacuation_centers(region: str) -> Dict[str, Any]:
     """
@@ -95,30 +319,7 @@ def get_evacuation_centers(region: str) -> Dict[str, Any]:
         List of evacuation centers
     """
     try:
-        # This would typically query a database of evacuation centers
-        # For now, return mock data
-        evacuation_centers = {
-            "Abuja": [
-                {"name": "National Stadium", "address": "National Stadium, Abuja", "capacity": 10000},
-                {"name": "University of Abuja", "address": "Airport Road, Abuja", "capacity": 5000},
-                {"name": "Abuja Municipal Area Council", "address": "AMAC Secretariat", "capacity": 3000}
-            ],
-            "Lagos": [
-                {"name": "National Theatre", "address": "Iganmu, Lagos", "capacity": 8000},
-                {"name": "Tafawa Balewa Square", "address": "Lagos Island", "capacity": 15000},
-                {"name": "University of Lagos", "address": "Akoka, Lagos", "capacity": 12000}
-            ],
-            "Kano": [
-                {"name": "Sani Abacha Stadium", "address": "Kano", "capacity": 25000},
-                {"name": "Bayero University", "address": "New Site, Kano", "capacity": 8000}
-            ],
-            "Port Harcourt": [
-                {"name": "Liberation Stadium", "address": "Port Harcourt", "capacity": 38000},
-                {"name": "University of Port Harcourt", "address": "Choba, Port Harcourt", "capacity": 10000}
-            ]
-        }
-        
-        centers = evacuation_centers.get(region, [])
+        centers = evacuation_centers.for_region(region)
         
         return {
             "status": "success",
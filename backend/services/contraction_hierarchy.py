@@ -0,0 +1,335 @@
+import heapq
+import json
+import math
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Allow running as a script: python services/contraction_hierarchy.py ...
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.road_graph import RoadGraph
+
+# Upward search graphs are stored as two CSR structures:
+#   fwd_*  arcs u -> v with rank[v] > rank[u], grouped by u
+#   bwd_*  arcs u -> v with rank[u] > rank[v], grouped by v (tail stored)
+# For each arc, *_mid is the contracted middle node of a shortcut (-1 for an
+# original road edge) and *_edge the original edge id (-1 for shortcuts).
+HIERARCHY_ARRAYS = (
+    "rank",
+    "fwd_indptr", "fwd_head", "fwd_weight", "fwd_mid", "fwd_edge",
+    "bwd_indptr", "bwd_tail", "bwd_weight", "bwd_mid", "bwd_edge",
+)
+
+# Witness searches stop after settling this many nodes; a missed witness only
+# adds a redundant shortcut, it never breaks correctness
+WITNESS_SETTLE_LIMIT = 500
+
+
+class ContractionHierarchy:
+    """
+    Contraction-hierarchy index over a RoadGraph for fast point-to-point queries
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], graph_version: str):
+        for name in HIERARCHY_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.graph_version = graph_version
+        self._views = None
+
+    # ------------------------------------------------------------------
+    # Preprocessing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, graph: RoadGraph, verbose: bool = False) -> "ContractionHierarchy":
+        """
+        Contract every node in edge-difference order, adding shortcuts where
+        no witness path exists.
+        """
+        n = graph.node_count
+        # out_arcs[u][v] = (weight, mid, edge); parallel edges keep the fastest
+        out_arcs: List[Dict[int, Tuple[float, int, int]]] = [dict() for _ in range(n)]
+        in_arcs: List[Dict[int, Tuple[float, int, int]]] = [dict() for _ in range(n)]
+        indptr = graph.indptr.tolist()
+        indices = graph.indices.tolist()
+        weight = graph.weight.tolist()
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v == u:
+                    continue
+                w = weight[e]
+                if v not in out_arcs[u] or w < out_arcs[u][v][0]:
+                    out_arcs[u][v] = (w, -1, e)
+                    in_arcs[v][u] = (w, -1, e)
+
+        contracted = [False] * n
+        deleted_neighbours = [0] * n
+        rank = np.zeros(n, dtype=np.int32)
+        # Every arc that ever existed, keyed by (tail, head)
+        all_arcs: Dict[Tuple[int, int], Tuple[float, int, int]] = {}
+        for u in range(n):
+            for v, arc in out_arcs[u].items():
+                all_arcs[(u, v)] = arc
+
+        def shortcuts_for(v: int, apply: bool) -> int:
+            count = 0
+            incoming = [(u, arc[0]) for u, arc in in_arcs[v].items() if not contracted[u]]
+            outgoing = [(w, arc[0]) for w, arc in out_arcs[v].items() if not contracted[w]]
+            if not incoming or not outgoing:
+                return 0
+            max_out = max(w for _, w in outgoing)
+            for u, w_uv in incoming:
+                targets = {x: w_uv + w_vx for x, w_vx in outgoing if x != u}
+                if not targets:
+                    continue
+                witness = _witness_search(out_arcs, contracted, u, v, set(targets), w_uv + max_out)
+                for x, via_cost in targets.items():
+                    if witness.get(x, math.inf) <= via_cost:
+                        continue
+                    count += 1
+                    if apply:
+                        existing = out_arcs[u].get(x)
+                        if existing is None or via_cost < existing[0]:
+                            arc = (via_cost, v, -1)
+                            out_arcs[u][x] = arc
+                            in_arcs[x][u] = arc
+                            all_arcs[(u, x)] = arc
+            return count
+
+        def priority(v: int) -> int:
+            degree = sum(1 for u in in_arcs[v] if not contracted[u]) + \
+                sum(1 for w in out_arcs[v] if not contracted[w])
+            return shortcuts_for(v, apply=False) - degree + deleted_neighbours[v]
+
+        heap = [(priority(v), v) for v in range(n)]
+        heapq.heapify(heap)
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate and push back if no longer the minimum
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            shortcuts_for(v, apply=True)
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for u in in_arcs[v]:
+                deleted_neighbours[u] += 1
+            for w in out_arcs[v]:
+                deleted_neighbours[w] += 1
+
+            if verbose and order % 10000 == 0:
+                print(f"  contracted {order:,}/{n:,} nodes, {len(all_arcs):,} arcs")
+
+        return cls(cls._pack(n, rank, all_arcs), graph.version)
+
+    @staticmethod
+    def _pack(n: int, rank: np.ndarray, all_arcs: Dict[Tuple[int, int], Tuple[float, int, int]]) -> Dict[str, np.ndarray]:
+        tails = np.fromiter((k[0] for k in all_arcs), dtype=np.int64, count=len(all_arcs))
+        heads = np.fromiter((k[1] for k in all_arcs), dtype=np.int64, count=len(all_arcs))
+        weights = np.fromiter((a[0] for a in all_arcs.values()), dtype=np.float64, count=len(all_arcs))
+        mids = np.fromiter((a[1] for a in all_arcs.values()), dtype=np.int64, count=len(all_arcs))
+        edges = np.fromiter((a[2] for a in all_arcs.values()), dtype=np.int64, count=len(all_arcs))
+
+        upward = rank[heads] > rank[tails]
+        arrays = {"rank": rank}
+        for prefix, mask, key, other in (("fwd", upward, tails, heads), ("bwd", ~upward, heads, tails)):
+            order = np.argsort(key[mask], kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(key[mask], minlength=n), out=indptr[1:])
+            arrays[f"{prefix}_indptr"] = indptr
+            arrays[f"{prefix}_{'head' if prefix == 'fwd' else 'tail'}"] = other[mask][order].astype(np.int32)
+            arrays[f"{prefix}_weight"] = weights[mask][order].astype(np.float32)
+            arrays[f"{prefix}_mid"] = mids[mask][order].astype(np.int32)
+            arrays[f"{prefix}_edge"] = edges[mask][order].astype(np.int64)
+        return arrays
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, directory: str):
+        """
+        Write the hierarchy as a directory of .npy arrays plus meta.json
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in HIERARCHY_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"graph_version": self.graph_version}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "ContractionHierarchy":
+        """
+        Memory-map a hierarchy directory written by ``save``
+        """
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                  for name in HIERARCHY_ARRAYS}
+        return cls(arrays, meta["graph_version"])
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def shortest_path(self, source: int, target: int) -> Optional[Tuple[float, List[int]]]:
+        """
+        Bidirectional upward Dijkstra. Returns (travel time in seconds, list
+        of original edge ids) like RoadGraph.shortest_path, or None.
+        """
+        if source == target:
+            return 0.0, []
+
+        (f_ptr, f_head, f_weight, _, _, b_ptr, b_tail, b_weight, _, _) = self._adjacency()
+        dist = ({source: 0.0}, {target: 0.0})
+        parent = ({}, {})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        settled = (set(), set())
+        best, meeting = math.inf, -1
+
+        while heaps[0] or heaps[1]:
+            # Alternate directions, always expanding the side with the smaller key
+            side = 0 if not heaps[1] or (heaps[0] and heaps[0][0][0] <= heaps[1][0][0]) else 1
+            d, u = heapq.heappop(heaps[side])
+            if d >= best:
+                # Upward searches cannot stop at the first meeting; only once
+                # both frontiers pass the best candidate
+                heaps[side].clear()
+                continue
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meeting = d + other, u
+
+            ptr, nbr, wts = (f_ptr, f_head, f_weight) if side == 0 else (b_ptr, b_tail, b_weight)
+            my_dist, my_parent = dist[side], parent[side]
+
+            # Stall-on-demand: if a higher-ranked node already reached reaches u
+            # more cheaply, u's tentative distance is not exact, so skip expanding it
+            s_ptr, s_nbr, s_wts = (b_ptr, b_tail, b_weight) if side == 0 else (f_ptr, f_head, f_weight)
+            stalled = False
+            for a in range(s_ptr[u], s_ptr[u + 1]):
+                if my_dist.get(s_nbr[a], math.inf) + s_wts[a] < d:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+
+            for a in range(ptr[u], ptr[u + 1]):
+                v = nbr[a]
+                nd = d + wts[a]
+                if nd < my_dist.get(v, math.inf):
+                    my_dist[v] = nd
+                    my_parent[v] = a
+                    heapq.heappush(heaps[side], (nd, v))
+
+        if meeting < 0:
+            return None
+
+        edges: List[int] = []
+        # Forward half: walk parents back from the meeting node to the source
+        node, forward = meeting, []
+        while node != source:
+            a = parent[0][node]
+            tail = int(np.searchsorted(self.fwd_indptr, a, side="right") - 1)
+            forward.append(("fwd", a))
+            node = tail
+        for kind, a in reversed(forward):
+            self._unpack(kind, a, edges)
+        # Backward half: walk parents from the meeting node to the target
+        node = meeting
+        while node != target:
+            a = parent[1][node]
+            self._unpack("bwd", a, edges)
+            node = int(np.searchsorted(self.bwd_indptr, a, side="right") - 1)
+
+        return best, edges
+
+    def _unpack(self, kind: str, arc: int, out: List[int]):
+        """
+        Expand a hierarchy arc into original edge ids, appending to ``out``
+        """
+        stack = [(kind, arc)]
+        while stack:
+            kind, arc = stack.pop()
+            mids = self.fwd_mid if kind == "fwd" else self.bwd_mid
+            mid = int(mids[arc])
+            if mid < 0:
+                out.append(int((self.fwd_edge if kind == "fwd" else self.bwd_edge)[arc]))
+                continue
+            if kind == "fwd":
+                tail = int(np.searchsorted(self.fwd_indptr, arc, side="right") - 1)
+                head = int(self.fwd_head[arc])
+            else:
+                head = int(np.searchsorted(self.bwd_indptr, arc, side="right") - 1)
+                tail = int(self.bwd_tail[arc])
+            # Both halves of a shortcut lead down to the lower-ranked middle node:
+            # tail -> mid is stored in bwd at mid, mid -> head in fwd at mid
+            first = self._find_arc(self.bwd_indptr, self.bwd_tail, mid, tail)
+            second = self._find_arc(self.fwd_indptr, self.fwd_head, mid, head)
+            # Stack is LIFO: push the second half first
+            stack.append(("fwd", second))
+            stack.append(("bwd", first))
+
+    @staticmethod
+    def _find_arc(indptr: np.ndarray, other: np.ndarray, node: int, neighbour: int) -> int:
+        start, stop = int(indptr[node]), int(indptr[node + 1])
+        hits = np.nonzero(other[start:stop] == neighbour)[0]
+        return start + int(hits[0])
+
+    def _adjacency(self):
+        if self._views is None:
+            self._views = tuple(memoryview(getattr(self, name)) for name in HIERARCHY_ARRAYS[1:])
+        return self._views
+
+
+def _witness_search(out_arcs: List[Dict[int, Tuple[float, int, int]]], contracted: List[bool],
+                    source: int, skip: int, targets: set, max_cost: float) -> Dict[int, float]:
+    """
+    Bounded Dijkstra from ``source`` that ignores ``skip`` and contracted nodes
+    """
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = set(targets)
+    settled = 0
+    while heap and remaining and settled < WITNESS_SETTLE_LIMIT:
+        d, u = heapq.heappop(heap)
+        if d > dist.get(u, math.inf):
+            continue
+        if d > max_cost:
+            break
+        settled += 1
+        remaining.discard(u)
+        for v, (w, _, _) in out_arcs[u].items():
+            if v == skip or contracted[v]:
+                continue
+            nd = d + w
+            if nd < dist.get(v, math.inf):
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+if __name__ == "__main__":
+    # Optional preprocessing step, run once per compiled road graph:
+    #   python services/contraction_hierarchy.py data/road_graph data/road_graph_ch
+    if len(sys.argv) != 3:
+        print("Usage: python services/contraction_hierarchy.py <graph_dir> <output_dir>")
+        sys.exit(1)
+    road_graph = RoadGraph.load(sys.argv[1])
+    print(f"🔧 Contracting {road_graph.node_count:,} nodes...")
+    hierarchy = ContractionHierarchy.build(road_graph, verbose=True)
+    hierarchy.save(sys.argv[2])
+    print(f"✅ Contraction hierarchy written to {sys.argv[2]}")
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from config import STATS_REFRESH_SECONDS, STATS_COUNT_METHOD
+from services.event_hub import event_hub
+from services.shared_cache import shared_cache
+
+# Shared-cache key of the latest snapshot, so workers take turns querying
+SNAPSHOT_KEY = "dashboard:stats"
+
+# Served until the first successful refresh when the database is unreachable
+MOCK_STATS = {
+    "stats": {
+        "total_predictions": 42,
+        "total_alerts_sent": 15,
+        "registered_users": 8,
+        "high_severity_regions": 2,
+        "system_status": "operational"
+    },
+    "recent_high_severity": [
+        {
+            "id": 1,
+            "region": "Miami-Dade County",
+            "severity": 0.85,
+            "created_at": "2025-01-12T10:30:00Z"
+        },
+        {
+            "id": 2,
+            "region": "New Orleans",
+            "severity": 0.72,
+            "created_at": "2025-01-12T09:15:00Z"
+        }
+    ]
+}
+
+
+class DashboardStats:
+    """
+    Dashboard statistics served from an in-memory snapshot.
+
+    A background task refreshes the snapshot every STATS_REFRESH_SECONDS
+    using server-side row counts, so serving the dashboard costs the same
+    however large the tables are and however many viewers poll it. Each
+    refresh pushes changed stats, and predictions written by other
+    processes (the monitor job), to the event hub. With several workers, a
+    snapshot another worker took within the refresh interval is adopted
+    instead of querying again.
+    """
+
+    def __init__(self, refresh_seconds: float = None, count_method: str = None):
+        self.refresh_seconds = refresh_seconds or STATS_REFRESH_SECONDS
+        self.count_method = count_method or STATS_COUNT_METHOD
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.refreshed_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        # Newest prediction id already pushed to live clients
+        self.last_prediction_id: Optional[int] = None
+        # Set after a write here: the next refresh must query, not adopt
+        self._dirty = False
+
+    async def _query(self) -> Dict[str, Any]:
+        from database import repository
+        predictions_count, alerts_count, users_count, high_severity = await asyncio.gather(
+            repository.count("predictions", self.count_method),
+            repository.count("alerts", self.count_method),
+            repository.count("users", self.count_method),
+            repository.high_severity_predictions(0.7, 5)
+        )
+        return {
+            "stats": {
+                "total_predictions": predictions_count,
+                "total_alerts_sent": alerts_count,
+                "registered_users": users_count,
+                "high_severity_regions": len(high_severity),
+                "system_status": "operational"
+            },
+            "recent_high_severity": high_severity
+        }
+
+    async def _new_predictions(self):
+        from database import repository
+        if self.last_prediction_id is None:
+            # First refresh: only learn where we are
+            self.last_prediction_id = await repository.latest_prediction_id()
+            return
+        for row in await repository.predictions_after(self.last_prediction_id, 50):
+            self.note_prediction(row)
+
+    def note_prediction(self, row: Dict[str, Any]):
+        """
+        Push a newly saved prediction to live clients (once per id)
+        """
+        if row.get("id") is not None:
+            if self.last_prediction_id is not None and row["id"] <= self.last_prediction_id:
+                return
+            self.last_prediction_id = row["id"]
+        event_hub.publish("prediction", {k: row.get(k) for k in ("id", "region", "severity", "created_at")})
+
+    def changed(self):
+        """
+        Something was written: refresh soon instead of waiting for the next tick
+        """
+        if self.refreshed_at is not None:
+            self._dirty = True
+            asyncio.ensure_future(self.refresh())
+
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Re-query the database and replace the snapshot; concurrent callers
+        share one refresh. On failure the previous snapshot is kept.
+        """
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh(self) -> Dict[str, Any]:
+        try:
+            previous = self.snapshot
+            shared = None if self._dirty else shared_cache.get_entry(SNAPSHOT_KEY)
+            if shared is not None and time.time() - shared[1] < self.refresh_seconds:
+                self.snapshot, self.refreshed_at = shared
+            else:
+                self._dirty = False
+                self.snapshot = await self._query()
+                self.refreshed_at = time.time()
+                shared_cache.set(SNAPSHOT_KEY, self.snapshot)
+            self.last_error = None
+            
+            if previous is not None:
+                delta = {k: v for k, v in self.snapshot["stats"].items() if previous["stats"].get(k) != v}
+                if delta:
+                    event_hub.publish("stats", delta)
+            await self._new_predictions()
+        except Exception as e:
+            print(f"Database connection failed: {e}")
+            self.last_error = str(e)
+        return self.snapshot
+
+    async def get(self) -> Dict[str, Any]:
+        """
+        The current snapshot, with when it was taken
+        """
+        if self.snapshot is None:
+            await self.refresh()
+        payload = self.snapshot or MOCK_STATS
+        return {
+            "status": "success",
+            **payload,
+            "generated_at": datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat() if self.refreshed_at else None,
+            "stale": self.last_error is not None
+        }
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a global instance
+dashboard_stats = DashboardStats()
@@ -1,7 +1,8 @@
-import requests
 import json
 from typing import Dict, Any
 from config import EARTH2_API_KEY
+from metrics import upstream_timer
+from tracing import traced
 
 class Earth2Service:
     """
@@ -12,6 +13,16 @@ class Earth2Service:
         self.api_key = EARTH2_API_KEY
         self.base_url = "https://api.nvidia.earth2"  # Placeholder URL
     
+    @property
+    def uses_mock(self) -> bool:
+        """
+        True when no real API key is configured and predictions are simulated
+        """
+        return (not self.api_key or
+                self.api_key == "your-nvidia-earth2-key" or
+                self.api_key == "mock-earth2-key-for-development")
+    
+    @traced()
     def get_flood_prediction(self, region: str, lat: float = None, lon: float = None) -> Dict[str, Any]:
         """
         Get flood prediction for a specific region
@@ -27,9 +38,7 @@ class Earth2Service:
         try:
             # For development, return mock data
             # In production, replace with actual Earth-2 API call
-            if (not self.api_key or 
-                self.api_key == "your-nvidia-earth2-key" or 
-                self.api_key == "mock-earth2-key-for-development"):
+            if self.uses_mock:
                 return self._get_mock_prediction(region)
             
             headers = {
@@ -46,8 +55,12 @@ class Earth2Service:
             if lat and lon:
                 params.update({"lat": lat, "lon": lon})
             
+            # Imported here so importing the API does not pay for requests
+            import requests
+            
             url = f"{self.base_url}/predict"
-            response = requests.get(url, headers=headers, params=params)
+            with upstream_timer("earth2", "predict"):
+                response = requests.get(url, headers=headers, params=params)
             
             if response.status_code == 200:
                 return response.json()
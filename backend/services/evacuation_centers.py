@@ -0,0 +1,192 @@
+import heapq
+import json
+import math
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from config import EVACUATION_CENTERS_PATH
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Built-in centers (approximate coordinates), used when no registry file is configured
+DEFAULT_EVACUATION_CENTERS = {
+    "Abuja": [
+        {"name": "National Stadium", "address": "National Stadium, Abuja", "capacity": 10000, "lat": 9.0359, "lon": 7.4535},
+        {"name": "University of Abuja", "address": "Airport Road, Abuja", "capacity": 5000, "lat": 8.9870, "lon": 7.1790},
+        {"name": "Abuja Municipal Area Council", "address": "AMAC Secretariat", "capacity": 3000, "lat": 9.0166, "lon": 7.4861}
+    ],
+    "Lagos": [
+        {"name": "National Theatre", "address": "Iganmu, Lagos", "capacity": 8000, "lat": 6.4767, "lon": 3.3688},
+        {"name": "Tafawa Balewa Square", "address": "Lagos Island", "capacity": 15000, "lat": 6.4474, "lon": 3.3975},
+        {"name": "University of Lagos", "address": "Akoka, Lagos", "capacity": 12000, "lat": 6.5158, "lon": 3.3896}
+    ],
+    "Kano": [
+        {"name": "Sani Abacha Stadium", "address": "Kano", "capacity": 25000, "lat": 11.9856, "lon": 8.5139},
+        {"name": "Bayero University", "address": "New Site, Kano", "capacity": 8000, "lat": 11.9770, "lon": 8.4730}
+    ],
+    "Port Harcourt": [
+        {"name": "Liberation Stadium", "address": "Port Harcourt", "capacity": 38000, "lat": 4.8242, "lon": 7.0198},
+        {"name": "University of Port Harcourt", "address": "Choba, Port Harcourt", "capacity": 10000, "lat": 4.9030, "lon": 6.9170}
+    ]
+}
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(math.pi / 2, km / (2 * EARTH_RADIUS_KM)))
+
+
+class KDTree:
+    """
+    Static 3-D KD-tree over points on the unit sphere.
+
+    Straight-line (chord) distance between unit vectors orders points
+    exactly like great-circle distance, so no projection is needed. The
+    tree is implicit: each subrange of ``order`` stores its pivot at the
+    midpoint, split on ``axis[mid]``.
+    """
+
+    def __init__(self, points: List[Tuple[float, float, float]]):
+        self.points = points
+        self.order = list(range(len(points)))
+        self.axis = [0] * len(points)
+        self._build(0, len(points))
+
+    def _build(self, lo: int, hi: int):
+        # Iterative build to avoid recursion limits on large registries
+        stack = [(lo, hi)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= 1:
+                continue
+            span = self.order[lo:hi]
+            spreads = [max(self.points[i][d] for i in span) - min(self.points[i][d] for i in span) for d in range(3)]
+            axis = spreads.index(max(spreads))
+            span.sort(key=lambda i: self.points[i][axis])
+            self.order[lo:hi] = span
+            mid = (lo + hi) // 2
+            self.axis[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def query(self, target: Tuple[float, float, float], k: int = 1, max_chord: float = math.inf,
+              accept: Callable[[int], bool] = None) -> List[Tuple[float, int]]:
+        """
+        Up to ``k`` accepted points within ``max_chord``, as sorted (chord, index) pairs
+        """
+        if k < 1:
+            return []
+        points, order, axis = self.points, self.order, self.axis
+        best: List[Tuple[float, int]] = []  # max-heap via negated distances
+        limit2 = max_chord * max_chord
+        # Entries carry the squared distance to their splitting plane, so the
+        # far side can be re-checked against the best distance found since
+        stack = [(0, len(order), 0.0)]
+        while stack:
+            lo, hi, plane2 = stack.pop()
+            if lo >= hi or plane2 > (-best[0][0] if len(best) == k else limit2):
+                continue
+            mid = (lo + hi) // 2
+            i = order[mid]
+            p = points[i]
+            d2 = (p[0] - target[0]) ** 2 + (p[1] - target[1]) ** 2 + (p[2] - target[2]) ** 2
+            if d2 <= limit2 and (accept is None or accept(i)):
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, i))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, i))
+
+            if hi - lo == 1:
+                continue
+            diff = target[axis[mid]] - p[axis[mid]]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Push the far side first so the near side is explored first
+            stack.append((far[0], far[1], diff * diff))
+            stack.append((near[0], near[1], 0.0))
+
+        return sorted((math.sqrt(-d), i) for d, i in best)
+
+
+class EvacuationCenterRegistry:
+    """
+    Evacuation centers with k-nearest and within-radius lookups
+    """
+
+    def __init__(self, path: str = None):
+        path = path or EVACUATION_CENTERS_PATH
+        centers = None
+        if path:
+            try:
+                centers = self._read(path)
+                print(f"✅ Loaded {len(centers)} evacuation centers")
+            except Exception as e:
+                print(f"❌ Failed to load evacuation centers, using built-in list: {e}")
+        if centers is None:
+            centers = [dict(c, region=region) for region, items in DEFAULT_EVACUATION_CENTERS.items() for c in items]
+        self.load(centers)
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        """
+        Read centers from JSON: either a list of centers with a ``region``
+        field, or a {region: [centers]} mapping
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [dict(c, region=region) for region, items in data.items() for c in items]
+        return data
+
+    def load(self, centers: List[Dict[str, Any]]):
+        for i, center in enumerate(centers):
+            center.setdefault("id", i)
+            center.setdefault("status", "open")
+            center.setdefault("occupancy", 0)
+        self.centers = centers
+        self._by_region: Dict[str, List[Dict[str, Any]]] = {}
+        for center in centers:
+            self._by_region.setdefault(center.get("region"), []).append(center)
+
+        self._located = [c for c in centers if "lat" in c and "lon" in c]
+        self._tree = KDTree([_unit_vector(c["lat"], c["lon"]) for c in self._located])
+
+    def for_region(self, region: str) -> List[Dict[str, Any]]:
+        return self._by_region.get(region, [])
+
+    def get(self, region: str, name: str) -> Optional[Dict[str, Any]]:
+        return next((c for c in self.for_region(region) if c["name"] == name), None)
+
+    @staticmethod
+    def is_open(center: Dict[str, Any]) -> bool:
+        return center.get("status") == "open" and center.get("capacity", 0) - center.get("occupancy", 0) > 0
+
+    def nearest(self, lat: float, lon: float, k: int = 1, radius_km: float = None, region: str = None,
+                open_only: bool = False, predicate: Callable[[Dict[str, Any]], bool] = None) -> List[Dict[str, Any]]:
+        """
+        The ``k`` closest centers to a coordinate, nearest first, each with a
+        ``distance_km`` field. Pass a large ``k`` with ``radius_km`` for a
+        within-radius query.
+        """
+        located = self._located
+
+        def accept(i: int) -> bool:
+            center = located[i]
+            if region is not None and center.get("region") != region:
+                return False
+            if open_only and not self.is_open(center):
+                return False
+            return predicate is None or predicate(center)
+
+        max_chord = _km_to_chord(radius_km) if radius_km is not None else math.inf
+        hits = self._tree.query(_unit_vector(lat, lon), k=k, max_chord=max_chord, accept=accept)
+        return [dict(located[i], distance_km=round(_chord_to_km(chord), 3)) for chord, i in hits]
+
+
+# Create a global instance
+evacuation_centers = EvacuationCenterRegistry()
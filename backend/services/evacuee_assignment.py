@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from services.road_graph import RoadGraph
+
+# Per-center travel-time arrays kept between plans (each holds one float per graph node)
+TREE_CACHE_SIZE = 64
+
+
+class AssignmentPlan:
+    """
+    Evacuees from each origin spread across evacuation centers.
+
+    ``people[k, n]`` is how many people from origin ``n`` go to center ``k``;
+    ``times[k, n]`` is the travel time in seconds (inf if unreachable).
+    """
+
+    def __init__(self, centers: List[Dict[str, Any]], capacity: np.ndarray,
+                 origins: List[str], population: np.ndarray, times: np.ndarray):
+        self.centers = centers
+        self.capacity = capacity.astype(np.int64)
+        self.origins = origins
+        self.population = population.astype(np.int64)
+        self.times = times
+        self.people = np.zeros(times.shape, dtype=np.int64)
+
+    @property
+    def load(self) -> np.ndarray:
+        return self.people.sum(axis=1)
+
+    @property
+    def unassigned(self) -> np.ndarray:
+        return self.population - self.people.sum(axis=0)
+
+    def fill(self, origin_subset: np.ndarray = None) -> int:
+        """
+        Greedy assignment: walk (center, origin) pairs in increasing travel
+        time and move as many people as the origin has left and the center
+        can still take. Restricting to ``origin_subset`` makes this the
+        repair step after a capacity change. Returns people newly assigned.
+        """
+        cols = np.arange(self.times.shape[1]) if origin_subset is None else np.asarray(origin_subset)
+        if cols.size == 0:
+            return 0
+
+        remaining_people = self.unassigned[cols].tolist()
+        remaining_capacity = np.maximum(self.capacity - self.load, 0).tolist()
+        sub_times = self.times[:, cols]
+        # Unreachable pairs (inf) sort last and are never used
+        order = np.argsort(sub_times, axis=None, kind="stable")[:int(np.isfinite(sub_times).sum())]
+
+        moved = 0
+        people_left = sum(remaining_people)
+        capacity_left = sum(remaining_capacity)
+        n_sub = cols.size
+        for flat in order.tolist():
+            if people_left == 0 or capacity_left == 0:
+                break
+            k, j = divmod(flat, n_sub)
+            take = min(remaining_people[j], remaining_capacity[k])
+            if take <= 0:
+                continue
+            self.people[k, cols[j]] += take
+            remaining_people[j] -= take
+            remaining_capacity[k] -= take
+            people_left -= take
+            capacity_left -= take
+            moved += take
+        return moved
+
+    def set_capacity(self, center_index: int, capacity: int) -> Dict[str, int]:
+        """
+        Change one center's remaining capacity and repair the plan incrementally.
+
+        If the center now holds more people than it can take, the farthest
+        origins assigned to it are evicted first; only evicted origins and
+        origins that were already unassigned are re-run through the greedy
+        fill. Returns how many people were evicted and how many placed.
+        """
+        self.capacity[center_index] = max(0, int(capacity))
+        excess = int(self.people[center_index].sum() - self.capacity[center_index])
+
+        evicted = 0
+        if excess > 0:
+            assigned = np.nonzero(self.people[center_index])[0]
+            for n in assigned[np.argsort(-self.times[center_index, assigned])].tolist():
+                take = min(excess, int(self.people[center_index, n]))
+                self.people[center_index, n] -= take
+                excess -= take
+                evicted += take
+                if excess == 0:
+                    break
+
+        waiting = np.nonzero(self.unassigned > 0)[0]
+        return {"evicted": evicted, "reassigned": self.fill(waiting)}
+
+    def center_index(self, name: str) -> Optional[int]:
+        for i, center in enumerate(self.centers):
+            if center["name"] == name:
+                return i
+        return None
+
+    def summary(self, include_origins: bool = True) -> Dict[str, Any]:
+        load = self.load
+        result = {
+            "total_population": int(self.population.sum()),
+            "assigned": int(load.sum()),
+            "unassigned": int(self.unassigned.sum()),
+            "centers": [
+                {
+                    "name": center["name"],
+                    "address": center.get("address"),
+                    "capacity": int(self.capacity[k]),
+                    "assigned": int(load[k]),
+                    "remaining": int(max(self.capacity[k] - load[k], 0))
+                }
+                for k, center in enumerate(self.centers)
+            ]
+        }
+        if include_origins:
+            origins = []
+            for n, origin in enumerate(self.origins):
+                ks = np.nonzero(self.people[:, n])[0]
+                origins.append({
+                    "origin": origin,
+                    "population": int(self.population[n]),
+                    "allocations": [
+                        {
+                            "center": self.centers[k]["name"],
+                            "people": int(self.people[k, n]),
+                            "duration_s": round(float(self.times[k, n]), 1)
+                        }
+                        for k in ks.tolist()
+                    ]
+                })
+            result["origins"] = origins
+        return result
+
+
+class EvacueeAssignment:
+    """
+    Assigns origin populations to evacuation centers by travel time under capacity limits
+    """
+
+    def __init__(self):
+        # region -> latest plan, kept so capacity updates can be applied incrementally
+        self.plans: Dict[str, AssignmentPlan] = {}
+        # (graph version, cost revision, center node) -> travel time from every node
+        self._trees: "OrderedDict[Tuple[str, int, int], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def travel_times(self, graph: RoadGraph, centers: List[Dict[str, Any]], origin_nodes: np.ndarray) -> np.ndarray:
+        """
+        Travel-time matrix [center, origin]: one reverse search per center,
+        reused until the road graph or its flood costs change
+        """
+        times = np.empty((len(centers), origin_nodes.size))
+        for k, center in enumerate(centers):
+            times[k] = self._center_times(graph, graph.nearest_node(center["lat"], center["lon"]))[origin_nodes]
+        return times
+
+    def _center_times(self, graph: RoadGraph, node: int) -> np.ndarray:
+        key = (graph.version, graph.cost_revision, int(node))
+        with self._lock:
+            dist = self._trees.get(key)
+            if dist is not None:
+                self._trees.move_to_end(key)
+                return dist
+        dist = graph.reverse_search([node]).dist
+        with self._lock:
+            self._trees[key] = dist
+            while len(self._trees) > TREE_CACHE_SIZE:
+                self._trees.popitem(last=False)
+        return dist
+
+    def plan(self, region: str, graph: RoadGraph, centers: List[Dict[str, Any]], origins: List[str],
+             origin_points: np.ndarray, population: np.ndarray) -> AssignmentPlan:
+        """
+        Build and store a fresh plan for a region.
+
+        Args:
+            origin_points: (N, 2) array of origin lat/lon
+            population: people at each origin
+        """
+        origin_nodes = np.fromiter((graph.nearest_node(lat, lon) for lat, lon in origin_points),
+                                   dtype=np.int64, count=len(origin_points))
+        capacity = np.array([max(0, c.get("capacity", 0) - c.get("occupancy", 0)) for c in centers])
+        times = self.travel_times(graph, centers, origin_nodes)
+
+        plan = AssignmentPlan(centers, capacity, origins, np.asarray(population).round(), times)
+        plan.fill()
+        self.plans[region] = plan
+        return plan
+
+
+# Create a global instance
+evacuee_assignment = EvacueeAssignment()
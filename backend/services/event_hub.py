@@ -0,0 +1,88 @@
+import asyncio
+import json
+from typing import Dict, Any, Optional, Set
+from config import EVENT_QUEUE_SIZE
+
+# Queued in place of a client's backlog when it falls too far behind
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue of pending events
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]):
+        """
+        Queue an event without waiting. A client whose queue is full has its
+        backlog replaced by a single resync marker, so a slow reader costs a
+        bounded amount of memory and catches up from a fresh snapshot.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventHub:
+    """
+    Per-process fan-out of live dashboard events (predictions, alerts,
+    stats deltas) to every connected client
+    """
+
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or EVENT_QUEUE_SIZE
+        self.subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: Any):
+        """
+        Send an event to every subscriber; safe to call from the event loop
+        or from worker threads
+        """
+        if not self.subscribers:
+            return
+        event = {"type": event_type, "data": data}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is self._loop:
+            self._fan_out(event)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: Dict[str, Any]):
+        for subscription in list(self.subscribers):
+            subscription.offer(event)
+
+    @staticmethod
+    def format_sse(event: Dict[str, Any]) -> str:
+        return f"event: {event['type']}\ndata: {json.dumps(event.get('data'), default=str)}\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.subscribers),
+            "queued": sum(s.queue.qsize() for s in self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers)
+        }
+
+
+# Create a global instance
+event_hub = EventHub()
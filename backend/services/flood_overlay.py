@@ -0,0 +1,144 @@
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from services.road_graph import RoadGraph
+
+# Water at or above this depth (metres) closes a road; shallower water slows it
+CLOSURE_DEPTH_M = 0.3
+# Travel-time multiplier per metre of water below the closure depth
+PENALTY_PER_METRE = 10.0
+# Depth assumed for flood polygons when the prediction gives none
+DEFAULT_DEPTH_M = 0.5
+
+
+def flood_polygons(flood_extent: Any, default_depth: float = DEFAULT_DEPTH_M) -> List[Tuple[list, float]]:
+    """
+    Normalise a prediction's flood extent into (polygon, depth in metres) pairs.
+
+    Accepts a list of polygons (rings of [lon, lat]), a GeoJSON Polygon or
+    MultiPolygon geometry, or a FeatureCollection whose features may carry
+    ``properties.depth_m``.
+    """
+    if not flood_extent:
+        return []
+
+    if isinstance(flood_extent, list):
+        return [(polygon, default_depth) for polygon in flood_extent]
+
+    kind = flood_extent.get("type")
+    if kind == "Polygon":
+        return [(flood_extent["coordinates"], default_depth)]
+    if kind == "MultiPolygon":
+        return [(polygon, default_depth) for polygon in flood_extent["coordinates"]]
+    if kind == "Feature":
+        depth = (flood_extent.get("properties") or {}).get("depth_m", default_depth)
+        return flood_polygons(flood_extent.get("geometry"), depth)
+    if kind == "FeatureCollection":
+        result = []
+        for feature in flood_extent.get("features", []):
+            result.extend(flood_polygons(feature, default_depth))
+        return result
+    return []
+
+
+def points_in_polygon(lat: np.ndarray, lon: np.ndarray, polygon: list) -> np.ndarray:
+    """
+    Vectorized even-odd point-in-polygon test for many points at once
+    """
+    inside = np.zeros(lat.shape, dtype=bool)
+    for ring in polygon:
+        ring = np.asarray(ring, dtype=np.float64)
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            crosses = (ay > lat) != (by > lat)
+            if not crosses.any():
+                continue
+            x_at = ax + (lat[crosses] - ay) * (bx - ax) / (by - ay)
+            flip = np.zeros_like(inside)
+            flip[crosses] = lon[crosses] < x_at
+            inside ^= flip
+    return inside
+
+
+class FloodOverlay:
+    """
+    Keeps road-graph edge costs in line with the latest flood extent per region
+    """
+
+    def __init__(self, graph: RoadGraph):
+        self.graph = graph
+        # region -> {edge id: cost factor}
+        self.region_factors: Dict[str, Dict[int, float]] = {}
+        # edge id -> cost revision at which it was last made more expensive
+        self.penalized_at: Dict[int, int] = {}
+
+    def edge_factors(self, flood_extent: Any, water_level_m: float = None) -> Dict[int, float]:
+        """
+        Cost factor for every edge whose midpoint lies inside the flood extent
+        """
+        default_depth = water_level_m if water_level_m is not None else DEFAULT_DEPTH_M
+        mid_lat, mid_lon = self.graph.edge_midpoints()
+        factors: Dict[int, float] = {}
+
+        for polygon, depth in flood_polygons(flood_extent, default_depth):
+            outer = np.asarray(polygon[0], dtype=np.float64)
+            # Bounding-box prefilter keeps the polygon test to nearby edges
+            candidates = np.nonzero(
+                (mid_lon >= outer[:, 0].min()) & (mid_lon <= outer[:, 0].max()) &
+                (mid_lat >= outer[:, 1].min()) & (mid_lat <= outer[:, 1].max())
+            )[0]
+            if candidates.size == 0:
+                continue
+            hit = candidates[points_in_polygon(mid_lat[candidates], mid_lon[candidates], polygon)]
+
+            factor = np.inf if depth >= CLOSURE_DEPTH_M else 1.0 + depth * PENALTY_PER_METRE
+            for e in hit.tolist():
+                factors[e] = max(factors.get(e, 1.0), factor)
+
+        return factors
+
+    def update_region(self, region: str, flood_extent: Any, water_level_m: float = None) -> Tuple[List[int], Optional[int]]:
+        """
+        Replace a region's flood overlay.
+
+        Returns the edges whose cost changed and, if any of them became
+        cheaper (water receding), the earliest cost revision at which one of
+        those edges had been penalized: routes computed since then may have
+        detoured around it and are stale even though they do not touch it.
+        """
+        new = self.edge_factors(flood_extent, water_level_m)
+        old = self.region_factors.get(region, {})
+
+        # Edges may be flooded by several regions' extents; the worst factor wins
+        others: Dict[int, float] = {}
+        for name, factors in self.region_factors.items():
+            if name == region:
+                continue
+            for e, f in factors.items():
+                if e in old or e in new:
+                    others[e] = max(others.get(e, 1.0), f)
+
+        changed, targets = [], []
+        stale_since = None
+        for e in set(old) | set(new):
+            before = max(old.get(e, 1.0), others.get(e, 1.0))
+            after = max(new.get(e, 1.0), others.get(e, 1.0))
+            if before == after:
+                continue
+            changed.append(e)
+            targets.append(after)
+            if after < before:
+                penalized = self.penalized_at.pop(e, 0)
+                stale_since = penalized if stale_since is None else min(stale_since, penalized)
+
+        if new:
+            self.region_factors[region] = new
+        else:
+            self.region_factors.pop(region, None)
+
+        if changed:
+            revision = self.graph.set_cost_factors(np.asarray(changed), np.asarray(targets))
+            for e, f in zip(changed, targets):
+                if f > 1:
+                    self.penalized_at[e] = revision
+        return changed, stale_since
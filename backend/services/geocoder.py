@@ -0,0 +1,269 @@
+import bisect
+import csv
+import json
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from config import GAZETTEER_PATH, GEOCODER_CACHE_SIZE
+from services.evacuation_centers import evacuation_centers
+
+# Approximate city-centre coordinates of the monitored regions, always in the gazetteer
+REGION_CENTROIDS = {
+    "Abuja": (9.0579, 7.4951),
+    "Lagos": (6.5244, 3.3792),
+    "Kano": (12.0022, 8.5920),
+    "Port Harcourt": (4.8156, 7.0498),
+    "Ibadan": (7.3775, 3.9470),
+    "Kaduna": (10.5105, 7.4165),
+    "Benin City": (6.3350, 5.6037),
+    "Jos": (9.8965, 8.8583),
+    "Maiduguri": (11.8311, 13.1510),
+    "Sokoto": (13.0059, 5.2476),
+    "Ilorin": (8.4966, 4.5421),
+    "Enugu": (6.4584, 7.5464)
+}
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy match
+MIN_FUZZY_SCORE = 0.45
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase, strip accents and punctuation, collapse whitespace
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_coordinates(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Parse a "lat,lon" string, returning None for anything else
+    """
+    if not text:
+        return None
+    parts = text.split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+class Gazetteer:
+    """
+    In-memory place-name index with exact, prefix and trigram fuzzy lookup
+    """
+
+    def __init__(self, places: List[Dict[str, Any]]):
+        self.places = places
+        self.exact: Dict[str, List[int]] = {}
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.trigram_counts: List[int] = []
+        prefix = []
+
+        for i, place in enumerate(places):
+            key = normalize(place["name"])
+            place["key"] = key
+            self.exact.setdefault(key, []).append(i)
+            prefix.append((key, i))
+            grams = trigrams(key)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_index.setdefault(gram, []).append(i)
+
+        prefix.sort()
+        self.prefix_keys = [k for k, _ in prefix]
+        self.prefix_ids = [i for _, i in prefix]
+
+    def search(self, query: str, region: str = None, limit: int = 5) -> List[Tuple[float, int]]:
+        """
+        Best matches for a query as (score, place index), highest score first
+        """
+        key = normalize(query)
+        if not key:
+            return []
+
+        def in_region(i: int) -> bool:
+            return region is None or self.places[i].get("region") == region
+
+        exact = [(1.0, i) for i in self.exact.get(key, []) if in_region(i)]
+        if exact:
+            return exact[:limit]
+
+        # Prefix matches score by how much of the name the query covers
+        results: Dict[int, float] = {}
+        start = bisect.bisect_left(self.prefix_keys, key)
+        for pos in range(start, min(start + 50, len(self.prefix_keys))):
+            if not self.prefix_keys[pos].startswith(key):
+                break
+            i = self.prefix_ids[pos]
+            if in_region(i):
+                results[i] = 0.5 + 0.5 * len(key) / len(self.prefix_keys[pos])
+
+        # Trigram candidates scored with the Dice coefficient
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_index.get(gram, ()))
+        for i, count in shared.items():
+            if not in_region(i):
+                continue
+            score = 2 * count / (len(grams) + self.trigram_counts[i])
+            if score >= MIN_FUZZY_SCORE and score > results.get(i, 0):
+                results[i] = score
+
+        ranked = sorted(((score, i) for i, score in results.items()),
+                        key=lambda item: (-item[0], -self.places[item[1]].get("population", 0)))
+        return ranked[:limit]
+
+
+class Geocoder:
+    """
+    Offline geocoder for free-text locations, fronted by an LRU cache
+    """
+
+    def __init__(self, path: str = None, cache_size: int = None):
+        places = self._default_places()
+        path = path or GAZETTEER_PATH
+        if path:
+            try:
+                places.extend(self._read(path))
+                print(f"✅ Gazetteer loaded: {len(places):,} places")
+            except Exception as e:
+                print(f"❌ Failed to load gazetteer: {e}")
+        self.gazetteer = Gazetteer(places)
+        self.regions = {normalize(name): name for name in REGION_CENTROIDS}
+        self.regions.update({normalize(p["region"]): p["region"] for p in places if p.get("region")})
+        self._lookup = lru_cache(maxsize=cache_size or GEOCODER_CACHE_SIZE)(self._geocode)
+
+    @staticmethod
+    def _default_places() -> List[Dict[str, Any]]:
+        places = []
+        for region, (lat, lon) in REGION_CENTROIDS.items():
+            places.append({"name": region, "lat": lat, "lon": lon, "region": region, "kind": "city"})
+            places.append({"name": "City Center", "lat": lat, "lon": lon, "region": region, "kind": "city_center"})
+        for center in evacuation_centers.centers:
+            if "lat" not in center or "lon" not in center:
+                continue
+            for name in {center["name"], center.get("address") or center["name"]}:
+                places.append({"name": name, "lat": center["lat"], "lon": center["lon"],
+                               "region": center.get("region"), "kind": "evacuation_center"})
+        return places
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        """
+        Read places from CSV (header: name,lat,lon[,region][,population])
+        or a JSON list of objects with the same fields
+        """
+        if path.endswith(".json"):
+            with open(path, "r") as f:
+                rows = json.load(f)
+        else:
+            with open(path, "r", newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+        places = []
+        for row in rows:
+            places.append({
+                "name": row["name"],
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"]),
+                "region": row.get("region") or None,
+                "kind": row.get("kind") or "place",
+                "population": int(float(row.get("population") or 0))
+            })
+        return places
+
+    def geocode(self, query: str, region: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a free-text location to coordinates
+
+        Args:
+            query: "lat,lon", a place name, or "place, region"
+            region: Region to search in when the query does not name one;
+                places outside it are not matched
+
+        Returns:
+            Dict with lat, lon, name, region, score and match type, or None
+        """
+        if not query:
+            return None
+        return self._lookup(query.strip(), region)
+
+    def batch_geocode(self, queries: List[str], region: str = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Geocode many queries, resolving each distinct query once
+        """
+        resolved = {q: self.geocode(q, region) for q in set(queries)}
+        return [resolved[q] for q in queries]
+
+    def region_places(self, region: str, limit: int = 10) -> List[str]:
+        """
+        Names of a region's gazetteer places (not its evacuation centers or
+        the region itself), most populous first
+        """
+        places = [p for p in self.gazetteer.places if p.get("region") == region and p["kind"] not in
+                  ("city", "city_center", "evacuation_center")]
+        places.sort(key=lambda p: -p.get("population", 0))
+        return list(dict.fromkeys(p["name"] for p in places))[:limit]
+
+    def cache_info(self) -> Dict[str, Any]:
+        info = self._lookup.cache_info()
+        total = info.hits + info.misses
+        return {
+            "entries": info.currsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_ratio": round(info.hits / total, 3) if total else 0.0
+        }
+
+    def _geocode(self, query: str, region: str = None) -> Optional[Dict[str, Any]]:
+        point = parse_coordinates(query)
+        if point:
+            return {"lat": point[0], "lon": point[1], "name": query, "region": region,
+                    "score": 1.0, "match": "coordinates"}
+
+        # "Main Market, Kano": a trailing region name scopes the search
+        place = query
+        if "," in query:
+            head, tail = query.rsplit(",", 1)
+            if normalize(tail) in self.regions:
+                place, region = head, self.regions[normalize(tail)]
+
+        if region is not None:
+            region = self.regions.get(normalize(region), region)
+        matches = self.gazetteer.search(place, region=region, limit=1)
+        if not matches and region is not None and region not in self.regions.values():
+            # Only a region the gazetteer knows nothing about widens the
+            # search: a place in another region is worse than none
+            matches = self.gazetteer.search(place, limit=1)
+        if matches:
+            score, i = matches[0]
+            found = self.gazetteer.places[i]
+            return {"lat": found["lat"], "lon": found["lon"], "name": found["name"],
+                    "region": found.get("region"), "score": round(score, 3),
+                    "match": "exact" if score == 1.0 else "fuzzy"}
+
+        # The query names a region itself: use the region's centre. Any other
+        # unknown place is not found rather than guessed.
+        named = self.regions.get(normalize(place))
+        if named in REGION_CENTROIDS:
+            lat, lon = REGION_CENTROIDS[named]
+            return {"lat": lat, "lon": lon, "name": named, "region": named,
+                    "score": 1.0, "match": "region"}
+        return None
+
+
+# Create a global instance
+geocoder = Geocoder()
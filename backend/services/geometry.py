@@ -0,0 +1,87 @@
+import math
+from typing import Optional
+import numpy as np
+
+# Encoded polyline precision (decimal places), as used by Google/OSRM polylines
+POLYLINE_PRECISION = 5
+# Simplification tolerance in screen pixels at the requested zoom level
+SIMPLIFY_TOLERANCE_PX = 1.0
+
+
+def encode_polyline(lat: np.ndarray, lon: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """
+    Encode coordinates with the encoded polyline algorithm: zig-zag deltas
+    between consecutive rounded points, written as 5-bit chunks offset by 63
+    """
+    if len(lat) == 0:
+        return ""
+    factor = 10 ** precision
+    points = np.column_stack((np.round(np.asarray(lat) * factor), np.round(np.asarray(lon) * factor))).astype(np.int64)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+
+    chars = []
+    for value in values:
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def zoom_tolerance_deg(zoom: int) -> float:
+    """
+    Degrees covered by SIMPLIFY_TOLERANCE_PX at a web-map zoom level
+    (256-pixel tiles); detail below this cannot be seen on screen
+    """
+    return SIMPLIFY_TOLERANCE_PX * 360.0 / (256 * 2 ** zoom)
+
+
+def simplify(lat: np.ndarray, lon: np.ndarray, tolerance_deg: float) -> np.ndarray:
+    """
+    Douglas-Peucker simplification; returns a boolean mask of points to keep.
+
+    Longitudes are scaled by cos(latitude) so the tolerance is roughly the
+    same distance in every direction. The endpoints are always kept.
+    """
+    n = len(lat)
+    keep = np.zeros(n, dtype=bool)
+    if n <= 2:
+        keep[:] = True
+        return keep
+
+    y = np.asarray(lat, dtype=np.float64)
+    x = np.asarray(lon, dtype=np.float64) * math.cos(math.radians(float(np.mean(y))))
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            dist = np.hypot(px, py)
+        else:
+            dist = np.abs(px * dy - py * dx) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance_deg:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def route_polyline(lat: np.ndarray, lon: np.ndarray, zoom: Optional[int] = None) -> str:
+    """
+    Encoded polyline for a route, simplified for ``zoom`` when given
+    """
+    if zoom is not None and len(lat) > 2:
+        # A Mercator pixel covers cos(latitude) times fewer degrees of latitude-equivalent distance
+        tolerance = zoom_tolerance_deg(zoom) * math.cos(math.radians(float(np.mean(lat))))
+        keep = simplify(lat, lon, tolerance)
+        lat, lon = lat[keep], lon[keep]
+    return encode_polyline(lat, lon)
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+import httpx
+from starlette.concurrency import run_in_threadpool
+from config import HEALTH_PROBE_INTERVAL_SECONDS, HEALTH_PROBE_TIMEOUT_SECONDS, HEALTH_SLOW_MS
+
+# Dependency states: reachable, reachable but slower than HEALTH_SLOW_MS,
+# unreachable, and not configured (the service runs on simulated data)
+OK, SLOW, DOWN, SIMULATED = "ok", "slow", "down", "simulated"
+
+# Without these the API cannot serve its core endpoints
+CRITICAL_DEPENDENCIES = ("database",)
+
+# Probe intervals a report may age by before the probe loop counts as stuck
+STALE_INTERVALS = 3
+
+
+class NotConfigured(Exception):
+    pass
+
+
+class HealthMonitor:
+    """
+    Dependency health checked in the background and served from memory.
+
+    Every HEALTH_PROBE_INTERVAL_SECONDS each dependency is probed
+    concurrently (a one-row database read, an Earth-2 request, a Twilio
+    account fetch, the loaded road graph) and the results are folded into a
+    report. /health and /ready only read that report, so load balancers can
+    poll them as often as they like without touching the dependencies.
+    """
+
+    def __init__(self, interval_seconds: float = None, timeout_seconds: float = None, slow_ms: float = None):
+        self.interval_seconds = interval_seconds or HEALTH_PROBE_INTERVAL_SECONDS
+        self.timeout_seconds = timeout_seconds or HEALTH_PROBE_TIMEOUT_SECONDS
+        self.slow_ms = slow_ms or HEALTH_SLOW_MS
+        self.report: Optional[Dict[str, Any]] = None
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe_database(self):
+        from database import repository
+        await repository.ping()
+
+    async def _probe_earth2(self):
+        from services.earth2_service import earth2_service
+        if earth2_service.uses_mock:
+            raise NotConfigured()
+        # Any HTTP answer means the API is reachable; only server errors count against it
+        async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
+            response = await client.head(earth2_service.base_url)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    async def _probe_sms(self):
+        from services.sms_service import sms_service
+        if not sms_service.client:
+            raise NotConfigured()
+        await run_in_threadpool(sms_service.client.api.accounts(sms_service.account_sid).fetch)
+
+    async def _probe_routing(self):
+        from services.routing_service import routing_service
+        if routing_service.graph is None:
+            raise NotConfigured()
+
+    async def _check(self, probe) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), timeout=self.timeout_seconds)
+        except NotConfigured:
+            return {"status": SIMULATED}
+        except asyncio.TimeoutError:
+            return {"status": DOWN, "error": f"No response within {self.timeout_seconds:g}s"}
+        except Exception as e:
+            return {"status": DOWN, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+        latency_ms = (time.perf_counter() - start) * 1000
+        return {"status": SLOW if latency_ms > self.slow_ms else OK, "latency_ms": round(latency_ms, 1)}
+
+    async def probe(self) -> Dict[str, Any]:
+        """
+        Check every dependency now and replace the cached report
+        """
+        probes = {
+            "database": self._probe_database,
+            "earth2": self._probe_earth2,
+            "sms": self._probe_sms,
+            "routing": self._probe_routing
+        }
+        results = await asyncio.gather(*(self._check(p) for p in probes.values()))
+        services = dict(zip(probes, results))
+
+        if any(services[name]["status"] == DOWN for name in CRITICAL_DEPENDENCIES):
+            status = "unhealthy"
+        elif any(s["status"] in (DOWN, SLOW) for s in services.values()):
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        self.checked_at = time.time()
+        self.report = {
+            "status": status,
+            "timestamp": datetime.fromtimestamp(self.checked_at, timezone.utc).isoformat(),
+            "services": services
+        }
+        return self.report
+
+    def health(self) -> Dict[str, Any]:
+        """
+        The latest report. A report older than STALE_INTERVALS probe intervals
+        (plus one probe timeout) means the probe loop itself is stuck or dead,
+        so nothing is known about the dependencies any more: it is reported
+        as stale, whatever it said.
+        """
+        if self.report is None:
+            return {"status": "starting", "timestamp": None, "services": {}}
+        age = time.time() - self.checked_at
+        if age > STALE_INTERVALS * self.interval_seconds + self.timeout_seconds:
+            return {**self.report, "status": "stale", "stale_seconds": round(age, 1)}
+        return self.report
+
+    def ready(self) -> bool:
+        """
+        Whether this worker should receive traffic: probed recently and no
+        critical dependency down. Degraded workers stay in rotation.
+        """
+        return self.health()["status"] in ("healthy", "degraded")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"❌ Health probe failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create a global instance
+health_monitor = HealthMonitor()
@@ -0,0 +1,77 @@
+from typing import Dict, Any, List, Tuple
+import numpy as np
+from services.road_graph import RoadGraph
+
+# Travel-time bands (minutes) reported when the caller does not choose any
+DEFAULT_BANDS_MIN = (15, 30, 60)
+# Grid cell size (degrees, ~550 m) that reachable road nodes are binned into
+DEFAULT_CELL_DEG = 0.005
+# Bounds on what callers may ask for: cell sizes (degrees, ~55 m to ~11 km),
+# the largest band (minutes) and the number of bands
+MIN_CELL_DEG = 0.0005
+MAX_CELL_DEG = 0.1
+MAX_BAND_MIN = 240
+MAX_BANDS = 12
+
+
+def band_runs(graph: RoadGraph, dist: np.ndarray, bands_min: Tuple[int, ...],
+              cell_deg: float = DEFAULT_CELL_DEG) -> List[List[Tuple[int, int, int]]]:
+    """
+    Bin reachable road nodes into grid cells and group the cells by travel-time band.
+
+    A cell takes the shortest travel time of any node inside it and belongs
+    to the first band that time fits in (bands are exclusive: 0-15, 15-30,
+    30-60 minutes). Each band is returned as row runs (row, first col, last
+    col) of grid indices, where row = floor(lat / cell_deg) and
+    col = floor(lon / cell_deg); adjacent cells in a row collapse into one run.
+    """
+    limits = np.asarray(bands_min, dtype=np.float64) * 60.0
+    reached = np.nonzero(dist <= limits[-1])[0]
+    if reached.size == 0:
+        return [[] for _ in bands_min]
+
+    rows = np.floor(np.asarray(graph.node_lat)[reached] / cell_deg).astype(np.int64)
+    cols = np.floor(np.asarray(graph.node_lon)[reached] / cell_deg).astype(np.int64)
+    times = dist[reached]
+
+    # Minimum time per cell: sort by (cell, time) and keep each cell's first entry
+    order = np.lexsort((times, cols, rows))
+    rows, cols, times = rows[order], cols[order], times[order]
+    first = np.ones(rows.size, dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    rows, cols, times = rows[first], cols[first], times[first]
+    band = np.searchsorted(limits, times, side="left")
+
+    runs: List[List[Tuple[int, int, int]]] = [[] for _ in bands_min]
+    for b in range(len(bands_min)):
+        r, c = rows[band == b], cols[band == b]
+        if r.size == 0:
+            continue
+        # Cells are already sorted by row then column; a run breaks on a new row or a gap
+        breaks = np.nonzero((r[1:] != r[:-1]) | (c[1:] != c[:-1] + 1))[0] + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [r.size])) - 1
+        runs[b] = list(zip(r[starts].tolist(), c[starts].tolist(), c[ends].tolist()))
+    return runs
+
+
+def runs_to_geojson(runs: List[List[Tuple[int, int, int]]], bands_min: Tuple[int, ...],
+                    cell_deg: float = DEFAULT_CELL_DEG) -> Dict[str, Any]:
+    """
+    FeatureCollection with one MultiPolygon per band, one rectangle per row run
+    """
+    features = []
+    lower = 0
+    for upper, band in zip(bands_min, runs):
+        polygons = []
+        for row, first, last in band:
+            south, north = round(row * cell_deg, 6), round((row + 1) * cell_deg, 6)
+            west, east = round(first * cell_deg, 6), round((last + 1) * cell_deg, 6)
+            polygons.append([[[west, south], [east, south], [east, north], [west, north], [west, south]]])
+        features.append({
+            "type": "Feature",
+            "properties": {"min_minutes": lower, "max_minutes": upper},
+            "geometry": {"type": "MultiPolygon", "coordinates": polygons}
+        })
+        lower = upper
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,281 @@
+import json
+import os
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+from config import POPULATION_GRID_PATH, REGION_BOUNDARIES_PATH
+
+# A ring is a sequence of [lon, lat] pairs (GeoJSON order); a polygon is a
+# list of rings (outer ring first, then holes)
+Ring = Sequence[Sequence[float]]
+Polygon = Sequence[Ring]
+
+
+class RegionIndex:
+    """
+    Cached set of grid cells covered by a region polygon.
+
+    Cells are stored as one column span [start, stop) per covered row and
+    polygon, plus the sorted, de-duplicated flat cell indices derived from
+    those spans, so a population query is a single gather and sum over the
+    memory-mapped grid and overlapping polygons count each cell once.
+    """
+
+    def __init__(self, rows: np.ndarray, starts: np.ndarray, stops: np.ndarray, n_cols: int):
+        self.rows = rows
+        self.starts = starts
+        self.stops = stops
+        lengths = stops - starts
+        # Expand spans into flat indices without a Python loop
+        offsets = np.repeat(rows * n_cols + starts - np.cumsum(lengths) + lengths, lengths)
+        self.flat_index = np.unique(offsets + np.arange(int(lengths.sum()), dtype=np.int64))
+        self.total: Optional[float] = None
+
+    @property
+    def cell_count(self) -> int:
+        return int(self.flat_index.size)
+
+
+class PopulationGrid:
+    """
+    Gridded population dataset used to estimate how many people a flood affects
+    """
+
+    def __init__(self, grid_path: str = None, boundaries_path: str = None):
+        self.grid: Optional[np.ndarray] = None
+        self.north = 0.0
+        self.west = 0.0
+        self.cell_size = 0.0
+        self.nodata: Optional[float] = None
+        self.region_polygons: Dict[str, List[Polygon]] = {}
+        self._region_index: Dict[str, RegionIndex] = {}
+
+        grid_path = grid_path or POPULATION_GRID_PATH
+        boundaries_path = boundaries_path or REGION_BOUNDARIES_PATH
+
+        if grid_path:
+            try:
+                self.load_grid(grid_path)
+                print(f"✅ Population grid loaded: {self.grid.shape[0]}x{self.grid.shape[1]} cells")
+            except Exception as e:
+                print(f"❌ Failed to load population grid: {e}")
+                self.grid = None
+
+        if boundaries_path:
+            try:
+                self.load_region_boundaries(boundaries_path)
+            except Exception as e:
+                print(f"❌ Failed to load region boundaries: {e}")
+
+    @property
+    def available(self) -> bool:
+        return self.grid is not None
+
+    def load_grid(self, path: str):
+        """
+        Memory-map a population grid stored as a 2-D .npy array.
+
+        The sidecar file ``<path without .npy>.json`` must provide ``north``
+        and ``west`` (the outer corner of cell [0, 0]) and ``cell_size`` in
+        degrees. Optional ``nodata`` cells are treated as zero population;
+        they are masked on the cells a query reads, so the grid stays mapped.
+        """
+        meta_path = os.path.splitext(path)[0] + ".json"
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+
+        grid = np.load(path, mmap_mode="r")
+        if grid.ndim != 2:
+            raise ValueError(f"Population grid must be 2-D, got shape {grid.shape}")
+
+        self.grid = grid
+        self.nodata = meta.get("nodata")
+        self.north = float(meta["north"])
+        self.west = float(meta["west"])
+        self.cell_size = float(meta["cell_size"])
+        self._region_index.clear()
+
+    def load_region_boundaries(self, path: str):
+        """
+        Load region polygons from a GeoJSON FeatureCollection keyed by ``properties.name``
+        """
+        with open(path, "r") as f:
+            collection = json.load(f)
+
+        for feature in collection.get("features", []):
+            name = (feature.get("properties") or {}).get("name")
+            geometry = feature.get("geometry") or {}
+            if not name:
+                continue
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            self.region_polygons[name] = polygons
+
+        self._region_index.clear()
+
+    def has_region(self, region: str) -> bool:
+        return self.available and region in self.region_polygons
+
+    def cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        """
+        Grid (row, col) containing a coordinate
+        """
+        row = int((self.north - lat) // self.cell_size)
+        col = int((lon - self.west) // self.cell_size)
+        return row, col
+
+    def region_index(self, region: str) -> RegionIndex:
+        """
+        Cell index for a named region, built on first use and cached
+        """
+        index = self._region_index.get(region)
+        if index is None:
+            index = self._index_polygons(self.region_polygons[region])
+            self._region_index[region] = index
+        return index
+
+    def region_population(self, region: str) -> float:
+        """
+        Total population living inside a region
+        """
+        index = self.region_index(region)
+        if index.total is None:
+            index.total = self._sum(index.flat_index)
+        return index.total
+
+    def region_cells(self, region: str, cell_factor: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Populated cells of a region as (lat, lon, population) arrays.
+
+        ``cell_factor`` > 1 aggregates blocks of cell_factor x cell_factor
+        grid cells into one, to keep the number of origins manageable.
+        """
+        flat_index = self.region_index(region).flat_index
+        n_cols = self.grid.shape[1]
+        population = self._values(flat_index)
+        rows, cols = flat_index // n_cols // cell_factor, flat_index % n_cols // cell_factor
+
+        blocks, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+        totals = np.bincount(inverse, weights=population)
+        keep = totals > 0
+        blocks, totals = blocks[keep], totals[keep]
+
+        size = self.cell_size * cell_factor
+        lat = self.north - (blocks // n_cols + 0.5) * size
+        lon = self.west + (blocks % n_cols + 0.5) * size
+        return lat, lon, totals
+
+    def population_in_polygons(self, polygons: List[Polygon], region: str = None) -> float:
+        """
+        Population inside flood-extent polygons, optionally clipped to a region
+        """
+        flat_index = self._index_polygons(polygons).flat_index
+        if region and self.has_region(region):
+            flat_index = np.intersect1d(flat_index, self.region_index(region).flat_index, assume_unique=True)
+        return self._sum(flat_index)
+
+    def population_in_mask(self, mask: np.ndarray, region: str = None) -> float:
+        """
+        Population under a boolean flood-extent mask with the same shape as the grid
+        """
+        if mask.shape != self.grid.shape:
+            raise ValueError(f"Mask shape {mask.shape} does not match grid shape {self.grid.shape}")
+
+        if region and self.has_region(region):
+            flat_index = self.region_index(region).flat_index
+            return self._sum(flat_index[mask.reshape(-1)[flat_index]])
+
+        return self._sum(np.flatnonzero(mask))
+
+    def affected_population(self, region: str, flood_extent: Any = None) -> Optional[int]:
+        """
+        Affected population for a region given a flood extent.
+
+        ``flood_extent`` may be a boolean mask aligned with the grid or a list
+        of GeoJSON-style polygons. Returns None when the grid cannot answer.
+        """
+        if not self.available or flood_extent is None:
+            return None
+
+        if isinstance(flood_extent, np.ndarray):
+            return int(self.population_in_mask(flood_extent, region))
+
+        if isinstance(flood_extent, dict):
+            # Accept a bare GeoJSON geometry as well
+            if flood_extent.get("type") == "Polygon":
+                flood_extent = [flood_extent["coordinates"]]
+            else:
+                flood_extent = flood_extent.get("coordinates", [])
+
+        return int(self.population_in_polygons(flood_extent, region))
+
+    def _values(self, flat_index: np.ndarray) -> np.ndarray:
+        """
+        Population of the given cells, with nodata cells as zero
+        """
+        values = self.grid.reshape(-1)[flat_index].astype(np.float64)
+        if self.nodata is not None:
+            nodata = np.isnan(values) if np.isnan(self.nodata) else values == self.nodata
+            values[nodata] = 0.0
+        return values
+
+    def _sum(self, flat_index: np.ndarray) -> float:
+        if flat_index.size == 0:
+            return 0.0
+        return float(self._values(flat_index).sum())
+
+    def _index_polygons(self, polygons: List[Polygon]) -> RegionIndex:
+        """
+        Rasterize polygons onto the grid with a vectorized even-odd scanline.
+
+        A cell belongs to a polygon when its centre does. For every ring edge
+        we find the row centres it crosses, compute the crossing longitudes,
+        then pair up sorted crossings per polygon and row into column spans.
+        Pairing within each polygon keeps overlapping polygons from
+        cancelling out; RegionIndex unions their cells.
+        """
+        n_rows, n_cols = self.grid.shape
+
+        edges, owners = [], []
+        for polygon_id, polygon in enumerate(polygons):
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=np.float64)[:, :2]
+                edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+                owners.append(np.full(len(ring), polygon_id, dtype=np.int64))
+        if not edges:
+            empty = np.zeros(0, dtype=np.int64)
+            return RegionIndex(empty, empty, empty, n_cols)
+
+        x1, y1, x2, y2 = np.vstack(edges).T
+        owner = np.concatenate(owners)
+        # Work in fractional row units; row r has its centre at r + 0.5
+        r1 = (self.north - y1) / self.cell_size - 0.5
+        r2 = (self.north - y2) / self.cell_size - 0.5
+        lo = np.clip(np.ceil(np.minimum(r1, r2)), 0, n_rows)
+        hi = np.clip(np.ceil(np.maximum(r1, r2)), 0, n_rows)
+        counts = (hi - lo).astype(np.int64)
+
+        edge_ids = np.repeat(np.arange(counts.size), counts)
+        rows = np.repeat(lo.astype(np.int64), counts)
+        rows += np.arange(rows.size) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        t = (rows - r1[edge_ids]) / (r2[edge_ids] - r1[edge_ids])
+        xs = x1[edge_ids] + t * (x2[edge_ids] - x1[edge_ids])
+        cols = (xs - self.west) / self.cell_size - 0.5
+
+        order = np.lexsort((cols, rows, owner[edge_ids]))
+        rows, cols = rows[order], cols[order]
+        # Crossings alternate in/out along each row of each polygon
+        rows = rows[0::2]
+        starts = np.clip(np.ceil(cols[0::2]), 0, n_cols).astype(np.int64)
+        stops = np.clip(np.floor(cols[1::2]) + 1, 0, n_cols).astype(np.int64)
+
+        keep = stops > starts
+        return RegionIndex(rows[keep], starts[keep], stops[keep], n_cols)
+
+
+# Create a global instance
+population_grid = PopulationGrid()
@@ -1,5 +1,7 @@
 from typing import Dict, Any, List
-from database import supabase
+from database import blocking_repository
+from services.population_grid import population_grid
+from tracing import traced
 
 class ResourceAllocator:
     """
@@ -16,7 +18,9 @@ class ResourceAllocator:
             "shelters": {"unit": "tents", "per_10_people": 1}
         }
     
-    def allocate_resources(self, region: str, affected_population: int = None, severity: float = 0.5) -> Dict[str, Any]:
+    @traced()
+    def allocate_resources(self, region: str, affected_population: int = None, severity: float = 0.5,
+                           flood_extent: Any = None) -> Dict[str, Any]:
         """
         Calculate and allocate resources for a region based on flood severity
         
@@ -24,6 +28,7 @@ class ResourceAllocator:
             region: Name of the region
             affected_population: Number of people affected
             severity: Flood severity (0.0 to 1.0)
+            flood_extent: Flood-extent polygons or grid mask (optional)
             
         Returns:
             Dict containing resource allocation details
@@ -31,7 +36,7 @@ class ResourceAllocator:
         try:
             # Estimate affected population if not provided
             if not affected_population:
-                affected_population = self._estimate_population(region, severity)
+                affected_population = self._estimate_population(region, severity, flood_extent)
             
             # Calculate resource needs
             resources = self._calculate_resource_needs(affected_population, severity)
@@ -46,12 +51,12 @@ class ResourceAllocator:
             }
             
             # Store in database
-            result = supabase.table("resources").insert({
+            blocking_repository.insert_resource({
                 "region": region,
                 "resource_type": "allocation_summary",
                 "quantity": affected_population,
                 "details": allocation_record
-            }).execute()
+            })
             
             return {
                 "region": region,
@@ -65,10 +70,18 @@ class ResourceAllocator:
         except Exception as e:
             return {"error": f"Resource allocation failed: {str(e)}"}
     
-    def _estimate_population(self, region: str, severity: float) -> int:
+    def _estimate_population(self, region: str, severity: float, flood_extent: Any = None) -> int:
         """
         Estimate affected population based on region and severity
         """
+        # Prefer the population grid: exact count under the flood extent, or a
+        # severity share of the region's gridded population
+        if population_grid.has_region(region):
+            if flood_extent is not None:
+                return population_grid.affected_population(region, flood_extent)
+            affected_percentage = min(severity * 0.3, 0.25)
+            return int(population_grid.region_population(region) * affected_percentage)
+        
         # Regional population estimates (simplified)
         regional_populations = {
             "Abuja": 3500000,
@@ -131,13 +144,13 @@ class ResourceAllocator:
         
         return round(total_cost, 2)
     
+    @traced()
     def get_resource_status(self, region: str) -> List[Dict[str, Any]]:
         """
         Get current resource allocation status for a region
         """
         try:
-            result = supabase.table("resources").select("*").eq("region", region).execute()
-            return result.data
+            return blocking_repository.resources(region)
         except Exception as e:
             return [{"error": f"Failed to get resource status: {str(e)}"}]
 
@@ -0,0 +1,492 @@
+import bz2
+import gzip
+import heapq
+import json
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# Default travel speeds (km/h) by OSM highway class, used when a way has no
+# usable maxspeed tag. Anything not listed is not routable by car.
+HIGHWAY_SPEEDS_KMH = {
+    "motorway": 100, "motorway_link": 60,
+    "trunk": 80, "trunk_link": 50,
+    "primary": 60, "primary_link": 40,
+    "secondary": 50, "secondary_link": 35,
+    "tertiary": 40, "tertiary_link": 30,
+    "unclassified": 30,
+    "residential": 25,
+    "living_street": 10,
+    "service": 15,
+    "road": 25,
+}
+
+# Size of the lat/lon buckets used to snap coordinates to graph nodes
+SNAP_BUCKET_DEG = 0.01
+
+# Files making up a compiled graph directory. Every array is a plain .npy so
+# workers can memory-map them and share pages.
+GRAPH_ARRAYS = ("node_lat", "node_lon", "indptr", "indices", "weight", "length", "edge_name")
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two coordinates in metres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _parse_maxspeed(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip().lower()
+    try:
+        if value.endswith("mph"):
+            return float(value[:-3].strip()) * 1.609344
+        return float(value.split()[0])
+    except ValueError:
+        return None
+
+
+class RoadGraph:
+    """
+    Directed road network stored as CSR adjacency arrays.
+
+    Edges leaving node ``u`` are ``indptr[u]:indptr[u + 1]``; for each edge
+    ``indices`` holds the head node, ``weight`` the travel time in seconds,
+    ``length`` the distance in metres and ``edge_name`` an index into
+    ``names``.
+
+    Searches run on ``cost``, which is ``weight`` until flood conditions
+    scale or close individual edges via ``set_cost_factors``.
+    """
+
+    def __init__(self, node_lat: np.ndarray, node_lon: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, weight: np.ndarray, length: np.ndarray,
+                 edge_name: np.ndarray, names: List[str], version: str = "0"):
+        self.node_lat = node_lat
+        self.node_lon = node_lon
+        self.indptr = indptr
+        self.indices = indices
+        self.weight = weight
+        self.length = length
+        self.edge_name = edge_name
+        self.names = names
+        self.version = version
+        self.cost = weight
+        self.cost_factors: Dict[int, float] = {}
+        self.cost_revision = 0
+        self._max_speed_mps = self._compute_max_speed()
+        self._views = None
+        self._reverse = None
+        self._midpoints = None
+        self._snap = None
+
+    @property
+    def node_count(self) -> int:
+        return int(self.node_lat.size)
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.indices.size)
+
+    # ------------------------------------------------------------------
+    # Construction and persistence
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_osm(cls, path: str) -> "RoadGraph":
+        """
+        Build a graph from an OSM XML extract (.osm, .osm.gz or .osm.bz2)
+        """
+        opener = gzip.open if path.endswith(".gz") else bz2.open if path.endswith(".bz2") else open
+
+        coords: Dict[int, Tuple[float, float]] = {}
+        ways: List[Tuple[List[int], float, int, str]] = []
+        names: List[str] = [""]
+        name_ids: Dict[str, int] = {"": 0}
+
+        with opener(path, "rb") as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag == "node":
+                    coords[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+                    elem.clear()
+                elif elem.tag == "way":
+                    tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                    highway = tags.get("highway")
+                    if highway in HIGHWAY_SPEEDS_KMH and tags.get("access") not in ("no", "private"):
+                        refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                        speed = _parse_maxspeed(tags.get("maxspeed")) or HIGHWAY_SPEEDS_KMH[highway]
+                        oneway = tags.get("oneway")
+                        if oneway in ("yes", "true", "1") or highway in ("motorway", "motorway_link") \
+                                or tags.get("junction") == "roundabout":
+                            direction = 1
+                        elif oneway == "-1":
+                            direction = -1
+                        else:
+                            direction = 0
+                        name = tags.get("name") or tags.get("ref") or ""
+                        if name not in name_ids:
+                            name_ids[name] = len(names)
+                            names.append(name)
+                        ways.append((refs, speed, direction, name_ids[name]))
+                    elem.clear()
+
+        # Keep only nodes that routable ways actually reference
+        node_ids: Dict[int, int] = {}
+        for refs, _, _, _ in ways:
+            for ref in refs:
+                if ref in coords and ref not in node_ids:
+                    node_ids[ref] = len(node_ids)
+
+        node_lat = np.empty(len(node_ids), dtype=np.float64)
+        node_lon = np.empty(len(node_ids), dtype=np.float64)
+        for osm_id, idx in node_ids.items():
+            node_lat[idx], node_lon[idx] = coords[osm_id]
+
+        tails, heads, weights, lengths, edge_names = [], [], [], [], []
+        for refs, speed_kmh, direction, name_id in ways:
+            speed_mps = speed_kmh / 3.6
+            refs = [node_ids[r] for r in refs if r in node_ids]
+            for a, b in zip(refs, refs[1:]):
+                dist = haversine_m(node_lat[a], node_lon[a], node_lat[b], node_lon[b])
+                pairs = [(a, b)] if direction == 1 else [(b, a)] if direction == -1 else [(a, b), (b, a)]
+                for u, v in pairs:
+                    tails.append(u)
+                    heads.append(v)
+                    lengths.append(dist)
+                    weights.append(dist / speed_mps)
+                    edge_names.append(name_id)
+
+        graph = cls.from_edges(node_lat, node_lon, np.asarray(tails, dtype=np.int64),
+                               np.asarray(heads, dtype=np.int64), np.asarray(weights),
+                               np.asarray(lengths), np.asarray(edge_names), names)
+        stat = os.stat(path)
+        graph.version = f"{int(stat.st_mtime)}-{stat.st_size}"
+        return graph
+
+    @classmethod
+    def from_edges(cls, node_lat: np.ndarray, node_lon: np.ndarray, tails: np.ndarray,
+                   heads: np.ndarray, weights: np.ndarray, lengths: np.ndarray,
+                   edge_names: np.ndarray, names: List[str], version: str = "0") -> "RoadGraph":
+        """
+        Build CSR arrays from an edge list
+        """
+        n = int(node_lat.size)
+        order = np.argsort(tails, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=n), out=indptr[1:])
+        return cls(
+            np.ascontiguousarray(node_lat, dtype=np.float64),
+            np.ascontiguousarray(node_lon, dtype=np.float64),
+            indptr,
+            heads[order].astype(np.int32),
+            weights[order].astype(np.float32),
+            lengths[order].astype(np.float32),
+            edge_names[order].astype(np.int32),
+            list(names),
+            version,
+        )
+
+    def save(self, directory: str):
+        """
+        Write the graph as a directory of .npy arrays plus meta.json
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in GRAPH_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"version": self.version, "names": self.names}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> "RoadGraph":
+        """
+        Memory-map a graph directory written by ``save``
+        """
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in GRAPH_ARRAYS]
+        return cls(*arrays, names=meta["names"], version=meta["version"])
+
+    @classmethod
+    def open(cls, path: str) -> "RoadGraph":
+        """
+        Load a compiled graph directory, or build one from an OSM extract
+        """
+        if os.path.isdir(path):
+            return cls.load(path)
+        return cls.from_osm(path)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def nearest_node(self, lat: float, lon: float) -> int:
+        """
+        Closest graph node to a coordinate (equirectangular approximation).
+
+        Only the 3x3 block of snap buckets around the point is searched; the
+        whole graph is scanned when those buckets are empty.
+        """
+        keys, order = self._snap_index()
+        row = int(math.floor(lat / SNAP_BUCKET_DEG)) + 10000
+        col = int(math.floor(lon / SNAP_BUCKET_DEG)) + 20000
+        spans = [(np.searchsorted(keys, r * 40000 + col - 1, side="left"),
+                  np.searchsorted(keys, r * 40000 + col + 1, side="right")) for r in (row - 1, row, row + 1)]
+        candidates = np.concatenate([order[lo:hi] for lo, hi in spans])
+        if candidates.size == 0:
+            candidates = None
+
+        node_lat = self.node_lat if candidates is None else self.node_lat[candidates]
+        node_lon = self.node_lon if candidates is None else self.node_lon[candidates]
+        scale = math.cos(math.radians(lat))
+        d2 = (node_lat - lat) ** 2 + ((node_lon - lon) * scale) ** 2
+        best = int(np.argmin(d2))
+        return best if candidates is None else int(candidates[best])
+
+    def shortest_path(self, source: int, target: int) -> Optional[Tuple[float, List[int]]]:
+        """
+        A* search for the fastest path between two nodes.
+
+        Returns (travel time in seconds, list of edge ids) or None when the
+        target is unreachable.
+        """
+        if source == target:
+            return 0.0, []
+
+        indptr, indices, weight, lat, lon = self._adjacency()
+        target_lat, target_lon = lat[target], lon[target]
+        inv_speed = 1.0 / self._max_speed_mps
+
+        def heuristic(node: int) -> float:
+            return haversine_m(lat[node], lon[node], target_lat, target_lon) * inv_speed
+
+        dist = {source: 0.0}
+        parent_edge: Dict[int, int] = {}
+        closed = set()
+        heap = [(heuristic(source), source)]
+
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            if u == target:
+                return dist[u], self._unwind(parent_edge, target)
+            closed.add(u)
+
+            du = dist[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v in closed:
+                    continue
+                nd = du + weight[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent_edge[v] = e
+                    heapq.heappush(heap, (nd + heuristic(v), v))
+
+        return None
+
+    def set_cost_factors(self, edges: np.ndarray, factors: np.ndarray) -> int:
+        """
+        Scale the travel time of edges relative to their base weight.
+
+        A factor of 1 restores the edge, ``inf`` closes it. Factors below 1
+        are rejected so the A* heuristic stays admissible. Returns the new
+        cost revision.
+        """
+        edges = np.asarray(edges, dtype=np.int64)
+        factors = np.asarray(factors, dtype=np.float64)
+        if np.any(factors < 1):
+            raise ValueError("Edge cost factors must be >= 1")
+
+        if self.cost is self.weight:
+            # Base weights may be a read-only memory map; copy on first override
+            self.cost = np.array(self.weight, dtype=np.float32)
+        self.cost[edges] = self.weight[edges] * factors
+
+        for e, f in zip(edges.tolist(), factors.tolist()):
+            if f == 1:
+                self.cost_factors.pop(e, None)
+            else:
+                self.cost_factors[e] = f
+
+        self.cost_revision += 1
+        self._views = None
+        return self.cost_revision
+
+    def edge_midpoints(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (lat, lon) arrays with the midpoint of every edge
+        """
+        if self._midpoints is None:
+            tails = np.repeat(np.arange(self.node_count, dtype=np.int64), np.diff(self.indptr))
+            heads = np.asarray(self.indices, dtype=np.int64)
+            self._midpoints = ((self.node_lat[tails] + self.node_lat[heads]) / 2,
+                               (self.node_lon[tails] + self.node_lon[heads]) / 2)
+        return self._midpoints
+
+    def reverse_search(self, targets: List[int], max_cost: float = math.inf) -> "RouteTree":
+        """
+        Multi-source Dijkstra over reversed edges from every target at once.
+
+        One search yields, for every node, the travel time to its nearest
+        target and the first edge of that route, i.e. a shortest-path tree
+        rooted at the targets. ``max_cost`` bounds the search in seconds.
+        """
+        n = self.node_count
+        rev_indptr, rev_tail, rev_edge = self._reverse_adjacency()
+        weight = self._adjacency()[2]
+
+        dist = np.full(n, np.inf)
+        next_edge = np.full(n, -1, dtype=np.int64)
+        label = np.full(n, -1, dtype=np.int32)
+        heap = []
+        for i, t in enumerate(targets):
+            if dist[t] > 0:
+                dist[t] = 0.0
+                label[t] = i
+                heap.append((0.0, t))
+        heapq.heapify(heap)
+
+        # Plain lists are faster to update than numpy arrays inside the loop
+        best = dist.tolist()
+        nxt = next_edge.tolist()
+        lab = label.tolist()
+        settled = bytearray(n)
+        while heap:
+            d, v = heapq.heappop(heap)
+            if settled[v]:
+                continue
+            settled[v] = 1
+            for a in range(rev_indptr[v], rev_indptr[v + 1]):
+                u = rev_tail[a]
+                if settled[u]:
+                    continue
+                e = rev_edge[a]
+                nd = d + weight[e]
+                if nd < best[u] and nd <= max_cost:
+                    best[u] = nd
+                    nxt[u] = e
+                    lab[u] = lab[v]
+                    heapq.heappush(heap, (nd, u))
+
+        return RouteTree(self, list(targets), np.asarray(best), np.asarray(nxt, dtype=np.int64),
+                         np.asarray(lab, dtype=np.int32))
+
+    def edge_tail(self, edge: int) -> int:
+        """
+        Source node of an edge (binary search over indptr)
+        """
+        return int(np.searchsorted(self.indptr, edge, side="right") - 1)
+
+    def path_nodes(self, source: int, edges: List[int]) -> List[int]:
+        """
+        Node sequence visited by a path of edge ids starting at ``source``
+        """
+        return [source] + [int(self.indices[e]) for e in edges]
+
+    def _unwind(self, parent_edge: Dict[int, int], node: int) -> List[int]:
+        edges = []
+        while node in parent_edge:
+            e = parent_edge[node]
+            edges.append(e)
+            node = self.edge_tail(e)
+        edges.reverse()
+        return edges
+
+    def _adjacency(self):
+        # memoryviews give plain Python scalars on indexing, which is much
+        # faster than numpy scalar access inside the search loop
+        if self._views is None:
+            self._views = tuple(memoryview(a) for a in (self.indptr, self.indices, self.cost,
+                                                        self.node_lat, self.node_lon))
+        return self._views
+
+    def _snap_index(self):
+        # Nodes sorted by snap bucket key (row * 40000 + col), for nearest_node
+        if self._snap is None:
+            rows = np.floor(np.asarray(self.node_lat) / SNAP_BUCKET_DEG).astype(np.int64) + 10000
+            cols = np.floor(np.asarray(self.node_lon) / SNAP_BUCKET_DEG).astype(np.int64) + 20000
+            keys = rows * 40000 + cols
+            order = np.argsort(keys, kind="stable")
+            self._snap = (keys[order], order)
+        return self._snap
+
+    def _reverse_adjacency(self):
+        # Transposed CSR: edges entering node v are rev_edge[rev_indptr[v]:rev_indptr[v + 1]]
+        if self._reverse is None:
+            n = self.node_count
+            tails = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind="stable")
+            rev_indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=n), out=rev_indptr[1:])
+            self._reverse = (memoryview(rev_indptr), memoryview(tails[order]), memoryview(order))
+        return self._reverse
+
+    def _compute_max_speed(self) -> float:
+        if self.weight.size == 0:
+            return 1.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = np.asarray(self.length, dtype=np.float64) / np.asarray(self.weight, dtype=np.float64)
+        speeds = speeds[np.isfinite(speeds)]
+        return float(speeds.max()) if speeds.size else 1.0
+
+
+class RouteTree:
+    """
+    Shortest-path tree towards a set of targets, produced by RoadGraph.reverse_search.
+
+    Per-node paths are not materialised; ``path`` walks ``next_edge`` from
+    an origin only when that origin's route is actually requested.
+    """
+
+    def __init__(self, graph: RoadGraph, targets: List[int], dist: np.ndarray,
+                 next_edge: np.ndarray, label: np.ndarray):
+        self.graph = graph
+        self.targets = targets
+        self.dist = dist
+        self.next_edge = next_edge
+        self.label = label
+
+    def reachable(self, node: int) -> bool:
+        return bool(np.isfinite(self.dist[node]))
+
+    def target_index(self, node: int) -> int:
+        """
+        Index into ``targets`` of the target nearest to ``node`` (-1 if unreachable)
+        """
+        return int(self.label[node])
+
+    def path(self, node: int) -> Optional[Tuple[float, List[int]]]:
+        """
+        (travel time in seconds, edge ids) from ``node`` to its nearest target
+        """
+        if not self.reachable(node):
+            return None
+        edges = []
+        e = int(self.next_edge[node])
+        while e >= 0:
+            edges.append(e)
+            e = int(self.next_edge[self.graph.indices[e]])
+        return float(self.dist[node]), edges
+
+
+if __name__ == "__main__":
+    # Compile an OSM extract once so workers can memory-map it:
+    #   python services/road_graph.py extract.osm.bz2 data/road_graph
+    if len(sys.argv) != 3:
+        print("Usage: python services/road_graph.py <extract.osm[.gz|.bz2]> <output_dir>")
+        sys.exit(1)
+    graph = RoadGraph.from_osm(sys.argv[1])
+    graph.save(sys.argv[2])
+    print(f"✅ Road graph compiled: {graph.node_count:,} nodes, {graph.edge_count:,} edges -> {sys.argv[2]}")
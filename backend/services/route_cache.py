@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, List, Optional, Set, Tuple
+from config import ROUTE_CACHE_SIZE, ROUTE_CACHE_PATH
+
+# Origins are snapped to a grid cell of this size (degrees, ~110 m) so nearby
+# requests share one cached route
+ORIGIN_CELL_DEG = 0.001
+
+
+def origin_cell(lat: float, lon: float) -> Tuple[int, int]:
+    return (int(round(lat / ORIGIN_CELL_DEG)), int(round(lon / ORIGIN_CELL_DEG)))
+
+
+def _as_key(value: Any) -> Hashable:
+    # JSON turns tuple keys into lists; turn them back
+    if isinstance(value, list):
+        return tuple(_as_key(v) for v in value)
+    return value
+
+
+class RouteCache:
+    """
+    Size-bounded LRU cache of computed road-graph paths with an edge -> route
+    reverse index.
+
+    When flood conditions change the cost of some edges, only the cached
+    routes that traverse one of those edges are dropped. Entries belong to
+    one road graph version; routes computed on base (unflooded) costs can be
+    saved to disk and reloaded after a restart.
+    """
+
+    def __init__(self, max_entries: int = None, path: str = None, graph_version: str = None):
+        # key -> (travel time in seconds, edge ids, cost revision when computed, computed on base costs)
+        self._routes: "OrderedDict[Hashable, Tuple[float, List[int], int, bool]]" = OrderedDict()
+        self._by_edge: Dict[int, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.max_entries = max_entries or ROUTE_CACHE_SIZE
+        self.path = path if path is not None else ROUTE_CACHE_PATH
+        self.graph_version = graph_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, List[int]]]:
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._routes.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: Hashable, duration_s: float, edges: List[int], revision: int, base_costs: bool = False):
+        with self._lock:
+            self._remove(key)
+            self._routes[key] = (duration_s, edges, revision, base_costs)
+            for e in edges:
+                self._by_edge.setdefault(e, set()).add(key)
+            while len(self._routes) > self.max_entries:
+                self._remove(next(iter(self._routes)))
+                self.evictions += 1
+
+    def invalidate_edges(self, edges: List[int], stale_since: int = None) -> int:
+        """
+        Drop routes that traverse any of ``edges``, plus every route computed
+        at or after cost revision ``stale_since`` when given. Returns the
+        number of routes dropped.
+        """
+        with self._lock:
+            doomed: Set[Hashable] = set()
+            for e in edges:
+                doomed.update(self._by_edge.get(e, ()))
+            if stale_since is not None:
+                doomed.update(k for k, entry in self._routes.items() if entry[2] >= stale_since)
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def bind(self, graph_version: str):
+        """
+        Attach the cache to a road graph version, dropping routes from any other
+        """
+        with self._lock:
+            if graph_version != self.graph_version:
+                self._routes.clear()
+                self._by_edge.clear()
+            self.graph_version = graph_version
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+            self._by_edge.clear()
+
+    def save(self, path: str = None) -> int:
+        """
+        Write routes computed on base costs to disk; flood-dependent routes
+        are not kept because overlays start empty after a restart. Returns
+        the number of routes written.
+        """
+        path = path or self.path
+        if not path or self.graph_version is None:
+            return 0
+        with self._lock:
+            routes = [[key, duration_s, edges] for key, (duration_s, edges, _, base) in self._routes.items() if base]
+        # Per-process temporary file: every API worker saves on shutdown
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"graph_version": self.graph_version, "routes": routes}, f)
+        os.replace(tmp, path)
+        return len(routes)
+
+    def load(self, path: str = None) -> int:
+        """
+        Restore routes saved for the current graph version. Returns the
+        number of routes loaded.
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("graph_version") != self.graph_version:
+            return 0
+        # Saved in LRU order, so the most recently used survive a smaller limit
+        for key, duration_s, edges in data.get("routes", []):
+            self.put(_as_key(key), duration_s, edges, 0, base_costs=True)
+        return len(self._routes)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._routes),
+            "max_entries": self.max_entries,
+            "graph_version": self.graph_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+    def _remove(self, key: Hashable):
+        entry = self._routes.pop(key, None)
+        if entry is None:
+            return
+        for e in entry[1]:
+            keys = self._by_edge.get(e)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_edge[e]
@@ -1,105 +1,645 @@
-import requests
-from typing import Dict, List, Any
-from config import MAPS_API_KEY
+import json
+import math
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from config import MAPS_API_KEY, ROAD_GRAPH_PATH, CONTRACTION_HIERARCHY_PATH
+from services.road_graph import RoadGraph, RouteTree, haversine_m
+from services.contraction_hierarchy import ContractionHierarchy
+from services.flood_overlay import FloodOverlay
+from services.route_cache import RouteCache, origin_cell
+from services.shared_cache import shared_cache
+from services.evacuee_assignment import evacuee_assignment
+from services.population_grid import population_grid
+from services.evacuation_centers import evacuation_centers
+from services.geocoder import geocoder
+from services.geometry import route_polyline
+from services.isochrones import DEFAULT_BANDS_MIN, DEFAULT_CELL_DEG, band_runs, runs_to_geojson
+from metrics import upstream_timer
+from tracing import traced
+import numpy as np
+
+# Isochrone results kept (one per region, bands and cell size), least recently used dropped first
+ISOCHRONE_CACHE_SIZE = 32
+# With a shared cache, flood overlays published by any process are picked up
+# by every worker within this many seconds
+FLOOD_SYNC_SECONDS = 1.0
+# Shared flood state: the index holds the overall revision and, per region,
+# the revision at which its extent last changed and that extent's id
+FLOOD_INDEX_KEY = "state:flood:index"
+
+
+def flood_region_key(region: str) -> str:
+    return f"state:flood:region:{region}"
+
+
+def format_distance(meters: float) -> str:
+    return f"{meters / 1000:.1f} km" if meters >= 1000 else f"{int(round(meters))} m"
+
+def format_duration(seconds: float) -> str:
+    return f"{max(1, int(round(seconds / 60)))} mins"
+
+def match_info(place: Dict[str, Any]) -> Dict[str, Any]:
+    return {"name": place["name"], "match": place["match"], "score": place["score"]}
 
 class RoutingService:
     """
-    Service to provide evacuation routes using OpenRouteService (free alternative to Google Maps)
+    Service to provide evacuation routes from a local road graph
     """
     
     def __init__(self):
         self.api_key = MAPS_API_KEY
-        # Use OpenRouteService instead of Google Maps (free tier available)
-        self.base_url = "https://api.openrouteservice.org/v2"
+        self.graph: Optional[RoadGraph] = None
+        self.hierarchy: Optional[ContractionHierarchy] = None
+        self.flood_overlay: Optional[FloodOverlay] = None
+        self.route_cache = RouteCache()
+        self._overlay_lock = threading.Lock()
+        # Shared flood index revision this process has applied, and when it last checked
+        self._flood_revision = 0
+        self._flood_checked = 0.0
+        self._flood_sync_lock = threading.Lock()
+        # Off once this process's overlay may differ from the shared one
+        self._shared_floods = True
+        # Set while a sync is half applied
+        self._shared_routes_paused = False
+        # (region, bands, cell size) -> (graph version, cost revision, band runs)
+        self._isochrones: "OrderedDict[Tuple, Tuple[str, int, list]]" = OrderedDict()
+        self._isochrones_lock = threading.Lock()
+        
+        # Routing runs in-process on a local OSM extract; without one we fall back to mock routes
+        if ROAD_GRAPH_PATH:
+            try:
+                self.graph = RoadGraph.open(ROAD_GRAPH_PATH)
+                print(f"✅ Road graph loaded: {self.graph.node_count:,} nodes, {self.graph.edge_count:,} edges")
+                self.flood_overlay = FloodOverlay(self.graph)
+                self.route_cache.bind(self.graph.version)
+            except Exception as e:
+                print(f"❌ Failed to load road graph: {e}")
+        else:
+            print("⚠️  ROAD_GRAPH_PATH not configured - routes will be simulated")
+        
+        if self.graph is not None and CONTRACTION_HIERARCHY_PATH:
+            try:
+                hierarchy = ContractionHierarchy.load(CONTRACTION_HIERARCHY_PATH)
+                if hierarchy.graph_version == self.graph.version:
+                    self.hierarchy = hierarchy
+                    print("✅ Contraction hierarchy loaded")
+                else:
+                    print("⚠️  Contraction hierarchy was built for a different road graph - ignoring it")
+            except Exception as e:
+                print(f"❌ Failed to load contraction hierarchy: {e}")
+        
+        if self.graph is not None and self.route_cache.path:
+            try:
+                loaded = self.route_cache.load()
+                if loaded:
+                    print(f"✅ Route cache restored: {loaded:,} routes")
+            except Exception as e:
+                print(f"❌ Failed to restore route cache: {e}")
     
-    def get_evacuation_route(self, origin: str, destination: str = None, region: str = None) -> Dict[str, Any]:
+    @traced()
+    def get_evacuation_route(self, origin: str, destination: str = None, region: str = None,
+                             zoom: int = None) -> Dict[str, Any]:
         """
         Get evacuation route from origin to safe destination
         
         Args:
-            origin: Starting point (address or coordinates)
+            origin: Starting point (address or "lat,lon" coordinates)
             destination: Safe destination (optional)
             region: Region name for context (optional)
+            zoom: Map zoom level to simplify the route geometry for (optional)
             
         Returns:
             Dict containing route information
         """
         try:
-            # For now, use mock data since we don't have a routing API key
-            # In production, you could use OpenRouteService (free tier) or other alternatives
-            return self._get_mock_route(origin, destination or "Safe Zone")
+            if self.graph is not None:
+                self.sync_flood_overlays()
+                origin_place = geocoder.geocode(origin, region)
+                if origin_place is None:
+                    return {"error": f"Origin not found: {origin}", "not_found": True}
+                origin_point = (origin_place["lat"], origin_place["lon"])
+                if destination:
+                    destination_point, end_address = self.locate(destination, region), destination
+                    if destination_point is None:
+                        return {"error": f"Destination not found: {destination}", "not_found": True}
+                else:
+                    center = self._find_nearest_evacuation_center(origin_point, region)
+                    destination_point = (center["lat"], center["lon"]) if center else None
+                    end_address = center["address"] if center else "Safe Zone"
+                if destination_point:
+                    route = self._route_on_graph(origin, end_address, origin_point, destination_point, zoom)
+                    if "error" not in route:
+                        # How the origin was understood (fuzzy matches may be wrong)
+                        route["origin_match"] = match_info(origin_place)
+                    return route
             
-            # Future implementation with OpenRouteService:
-            # if not self.api_key or self.api_key == "your-maps-api-key":
-            #     return self._get_mock_route(origin, destination or "Safe Zone")
-            # 
-            # # If no destination provided, find nearest evacuation center
-            # if not destination:
-            #     destination = self._find_nearest_evacuation_center(origin, region)
-            # 
-            # headers = {"Authorization": f"Bearer {self.api_key}"}
-            # body = {
-            #     "coordinates": [[origin_lng, origin_lat], [dest_lng, dest_lat]],
-            #     "profile": "driving-car",
-            #     "format": "json"
-            # }
-            # 
-            # url = f"{self.base_url}/directions/driving-car/json"
-            # response = requests.post(url, json=body, headers=headers)
-            # 
-            # if response.status_code == 200:
-            #     data = response.json()
-            #     return self._process_ors_route_response(data)
-            # else:
-            #     return {"error": f"Routing API failed with status {response.status_code}"}
+            # No road graph, or no evacuation center to route to
+            return self._get_mock_route(origin, destination or "Safe Zone")
                 
         except Exception as e:
             return {"error": f"Routing service error: {str(e)}"}
     
-    def get_multiple_evacuation_routes(self, origins: List[str], region: str) -> List[Dict[str, Any]]:
+    @traced()
+    def get_multiple_evacuation_routes(self, origins: List[str], region: str, zoom: int = None) -> List[Dict[str, Any]]:
         """
         Get evacuation routes for multiple origins
+        
+        With a road graph, one reverse search from all of the region's
+        evacuation centers yields the nearest-center route for every origin;
+        individual paths are only extracted for the origins requested.
         """
-        routes = []
-        for origin in origins:
-            route = self.get_evacuation_route(origin, region=region)
-            routes.append(route)
-        return routes
+        route = self.bulk_router(region, zoom)
+        return [route(origin) for origin in origins]
     
-    def _find_nearest_evacuation_center(self, origin: str, region: str = None) -> str:
+    def bulk_router(self, region: str, zoom: int = None) -> Callable[[str], Dict[str, Any]]:
         """
-        Find the nearest evacuation center (placeholder implementation)
+        Function routing one origin to its nearest evacuation center in a region
+        
+        Calls share one lazily built reverse search, so a batch can be routed
+        one origin at a time (e.g. while streaming) and from several threads.
         """
-        # In a real implementation, this would query a database of evacuation centers
-        evacuation_centers = {
-            "Abuja": "National Stadium, Abuja",
-            "Lagos": "Tafawa Balewa Square, Lagos",
-            "Kano": "Sani Abacha Stadium, Kano",
-            "Port Harcourt": "Liberation Stadium, Port Harcourt"
+        centers = self._routable_centers(region)
+        if self.graph is None or not centers:
+            return lambda origin: self.get_evacuation_route(origin, region=region, zoom=zoom)
+        self.sync_flood_overlays()
+        # Route to centers with room left while any have it
+        centers = [c for c in centers if evacuation_centers.is_open(c)] or centers
+        
+        center_by_node = {self.graph.nearest_node(c["lat"], c["lon"]): c for c in centers}
+        # Cached nearest-center paths are only valid for the centers they were
+        # searched from: a center closing or filling up changes the key
+        center_set = zlib.crc32(json.dumps(sorted([c["name"], int(node)] for node, c in center_by_node.items())).encode())
+        tree, tree_revision = None, None
+        tree_lock = threading.Lock()
+        
+        def route(origin: str) -> Dict[str, Any]:
+            try:
+                # Repeated free-text origins hit the geocoder cache
+                place = geocoder.geocode(origin, region)
+                if place is None:
+                    return {"error": f"Origin not found: {origin}", "not_found": True}
+                point = (place["lat"], place["lon"])
+                
+                source = self.graph.nearest_node(*point)
+                
+                def compute():
+                    # The reverse search only runs once, on the first cache miss
+                    # (again if road costs have changed since)
+                    nonlocal tree, tree_revision
+                    with tree_lock:
+                        if tree is None or tree_revision != self.graph.cost_revision:
+                            tree_revision = self.graph.cost_revision
+                            tree = self.graph.reverse_search(list(center_by_node))
+                        return tree.path(source)
+                
+                result = self._cached_path(("nearest", region, center_set, origin_cell(*point)), compute)
+                if result is None:
+                    return {"error": f"No evacuation center reachable from {origin}"}
+                
+                duration_s, edges, cached = result
+                end_node = int(self.graph.indices[edges[-1]]) if edges else source
+                route = self._build_route(origin, center_by_node[end_node]["address"], source, edges,
+                                          duration_s, cached, zoom)
+                route["origin_match"] = match_info(place)
+                return route
+            except Exception as e:
+                return {"error": f"Routing service error: {str(e)}"}
+        
+        return route
+    
+    @traced()
+    def evacuation_tree(self, region: str) -> Optional[RouteTree]:
+        """
+        Shortest-path tree from every graph node to the region's nearest evacuation center
+        """
+        centers = self._routable_centers(region)
+        if self.graph is None or not centers:
+            return None
+        self.sync_flood_overlays()
+        targets = [self.graph.nearest_node(c["lat"], c["lon"]) for c in centers]
+        return self.graph.reverse_search(targets)
+    
+    @traced()
+    def get_isochrones(self, region: str, bands_min: Tuple[int, ...] = DEFAULT_BANDS_MIN,
+                       cell_deg: float = DEFAULT_CELL_DEG, output: str = "cells") -> Dict[str, Any]:
+        """
+        Areas of a region that can reach an evacuation center within each travel-time band
+        
+        One reverse search from all of the region's centers, bounded by the
+        largest band, covers every band. Results are cached until the road
+        graph or its flood costs change.
+        
+        Args:
+            region: Region name
+            bands_min: Increasing band limits in minutes
+            cell_deg: Grid cell size in degrees
+            output: "cells" for row runs of grid cells, "geojson" for band polygons
+            
+        Returns:
+            Dict with the bands in the requested format
+        """
+        if self.graph is None:
+            return {"error": "Isochrones require a road graph (ROAD_GRAPH_PATH)"}
+        centers = self._routable_centers(region)
+        if not centers:
+            return {"error": f"No evacuation centers with coordinates for region: {region}"}
+        
+        self.sync_flood_overlays()
+        bands_min = tuple(sorted(set(int(b) for b in bands_min)))
+        key = (region, bands_min, cell_deg)
+        version, revision = self.graph.version, self.graph.cost_revision
+        with self._isochrones_lock:
+            cached = self._isochrones.get(key)
+            hit = cached is not None and cached[:2] == (version, revision)
+            if hit:
+                self._isochrones.move_to_end(key)
+        if hit:
+            runs = cached[2]
+        else:
+            targets = [self.graph.nearest_node(c["lat"], c["lon"]) for c in centers]
+            with upstream_timer("routing", "isochrones"):
+                tree = self.graph.reverse_search(targets, max_cost=bands_min[-1] * 60.0)
+                runs = band_runs(self.graph, tree.dist, bands_min, cell_deg)
+            with self._isochrones_lock:
+                self._isochrones[key] = (version, revision, runs)
+                self._isochrones.move_to_end(key)
+                while len(self._isochrones) > ISOCHRONE_CACHE_SIZE:
+                    self._isochrones.popitem(last=False)
+        
+        result = {
+            "status": "success",
+            "region": region,
+            "centers": [c["name"] for c in centers],
+            "cell_size_deg": cell_deg,
+            "cached": hit
         }
+        if output == "geojson":
+            result["isochrones"] = runs_to_geojson(runs, bands_min, cell_deg)
+        else:
+            lower = 0
+            result["bands"] = []
+            for upper, band in zip(bands_min, runs):
+                result["bands"].append({
+                    "min_minutes": lower,
+                    "max_minutes": upper,
+                    "cell_count": sum(last - first + 1 for _, first, last in band),
+                    "runs": band
+                })
+                lower = upper
+        return result
+    
+    def locate(self, location: Optional[str], region: str = None) -> Optional[Tuple[float, float]]:
+        """
+        Resolve "lat,lon" coordinates or a place name to a coordinate pair
+        """
+        place = geocoder.geocode(location, region)
+        return (place["lat"], place["lon"]) if place else None
+    
+    def _routable_centers(self, region: str) -> List[Dict[str, Any]]:
+        return [c for c in evacuation_centers.for_region(region)
+                if "lat" in c and "lon" in c and c.get("status") == "open"]
+    
+    @traced()
+    def apply_flood_prediction(self, region: str, prediction: Dict[str, Any]) -> int:
+        """
+        Update road costs from a region-wide prediction's flood extent and drop
+        the cached routes that are affected. Predictions without a flood
+        extent (mock or point predictions) leave the overlay as it is; an
+        empty extent clears it.
+        
+        With a shared cache the extent is published there, and every worker
+        (this one included) applies it from there, so all of them route
+        around the same flooded roads. Blocks on the shared cache's write
+        lock: call it from a worker thread.
         
-        return evacuation_centers.get(region, "Nearest Safe Zone")
+        Returns:
+            Number of cached routes invalidated
+        """
+        if self.flood_overlay is None or prediction.get("flood_extent") is None:
+            return 0
+        
+        flood_extent, water_level_m = prediction.get("flood_extent"), prediction.get("water_level_m")
+        if shared_cache.enabled and self._shared_floods:
+            state = {"id": uuid.uuid4().hex, "flood_extent": flood_extent, "water_level_m": water_level_m}
+            
+            def publish(index):
+                index = index or {"revision": 0, "regions": {}}
+                index["revision"] += 1
+                index["regions"][region] = [index["revision"], state["id"]]
+                return index
+            
+            # The region's state is written before the index points at it
+            if (shared_cache.update(flood_region_key(region), lambda _: state) is not None
+                    and shared_cache.update(FLOOD_INDEX_KEY, publish) is not None):
+                return self.sync_flood_overlays(force=True)
+            print("⚠️ Could not share the flood overlay - this worker stops sharing routes")
+            self._shared_floods = False
+        return self._apply_overlay(region, flood_extent, water_level_m)
     
-    def _process_route_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def sync_flood_overlays(self, force: bool = False) -> int:
         """
-        Process Google Maps API response into our format
+        Apply flood extents other processes have published to the shared
+        cache since this one last looked (at most every FLOOD_SYNC_SECONDS
+        unless forced)
+        
+        Returns:
+            Number of cached routes invalidated
         """
-        if data.get("status") != "OK" or not data.get("routes"):
-            return {"error": "No routes found"}
+        if self.flood_overlay is None or not shared_cache.enabled or not self._shared_floods:
+            return 0
+        now = time.monotonic()
+        if not force and now - self._flood_checked < FLOOD_SYNC_SECONDS:
+            return 0
+        self._flood_checked = now
+        index = shared_cache.get(FLOOD_INDEX_KEY)
+        if not index or index["revision"] <= self._flood_revision:
+            return 0
         
-        route = data["routes"][0]  # Get the first route
-        leg = route["legs"][0]
+        invalidated = 0
+        with self._flood_sync_lock:
+            if index["revision"] <= self._flood_revision:
+                return 0
+            for region, (revision, state_id) in index["regions"].items():
+                if revision <= self._flood_revision:
+                    continue
+                state = shared_cache.get(flood_region_key(region))
+                if state is None or state["id"] != state_id:
+                    # Busy, or a newer extent is being published: look again
+                    # on the next call, so routes are never shared under a
+                    # revision whose costs this process does not have
+                    self._flood_checked = 0.0
+                    self._shared_routes_paused = True
+                    return invalidated
+                invalidated += self._apply_overlay(region, state["flood_extent"], state["water_level_m"])
+            self._flood_revision = index["revision"]
+            self._shared_routes_paused = False
+        return invalidated
+    
+    def _apply_overlay(self, region: str, flood_extent: Any, water_level_m: Optional[float]) -> int:
+        # Costs change and affected routes go in one step, so a route
+        # computed on the old costs cannot be stored in between
+        with self._overlay_lock:
+            changed, stale_since = self.flood_overlay.update_region(region, flood_extent, water_level_m)
+            if not changed:
+                return 0
+            return self.route_cache.invalidate_edges(changed, stale_since)
+    
+    def _store_path(self, key, duration_s: float, edges: List[int], revision: int, base_costs: bool) -> bool:
+        """
+        Cache a path computed at cost revision ``revision``, unless the costs
+        have changed since (its invalidation has already run)
+        """
+        with self._overlay_lock:
+            if self.graph.cost_revision != revision:
+                return False
+            self.route_cache.put(key, duration_s, edges, revision, base_costs)
+            return True
+    
+    def _cached_path(self, key, compute) -> Optional[Tuple[float, List[int], bool]]:
+        """
+        Serve a path from the route cache, computing and storing it on a miss
+        
+        Returns:
+            (travel time in seconds, edge ids, served from cache) or None if unreachable
+        """
+        cached = self.route_cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1], True
+        
+        revision = self.graph.cost_revision
+        base_costs = not self.graph.cost_factors
+        # Workers share routes computed on the same flood overlays, which
+        # the shared flood revision names
+        shared_key = None
+        if self._shared_floods and not self._shared_routes_paused:
+            shared_key = f"route:{self.graph.version}:{self._flood_revision}:{json.dumps(key, default=int)}"
+        if shared_key is not None:
+            shared = shared_cache.get(shared_key)
+            if shared is not None:
+                self._store_path(key, shared[0], shared[1], revision, base_costs)
+                return shared[0], shared[1], True
+        
+        with upstream_timer("routing", key[0]):
+            result = compute()
+        if result is None:
+            return None
+        if not len(result[1]):
+            # The origin is the target itself. Keys cover a whole origin
+            # cell, where other origins would need a real path: not cached.
+            return result[0], result[1], False
+        # Not if the overlay changed while the path was computed
+        if self._store_path(key, result[0], result[1], revision, base_costs) and shared_key is not None:
+            shared_cache.set(shared_key, [float(result[0]), [int(e) for e in result[1]]])
+        return result[0], result[1], False
+    
+    @traced()
+    def assign_evacuees(self, region: str, origins: List[Dict[str, Any]] = None,
+                        cell_factor: int = 10) -> Dict[str, Any]:
+        """
+        Spread evacuees across the region's evacuation centers by travel time
+        under center capacity
+        
+        Args:
+            region: Region name
+            origins: [{"location": "lat,lon" or place name, "population": n}, ...]; when
+                omitted, populated cells of the population grid are used
+            cell_factor: Population grid cells aggregated per origin side
+            
+        Returns:
+            Assignment summary per center and per origin
+        """
+        centers = self._routable_centers(region)
+        if self.graph is None:
+            return {"error": "Evacuee assignment requires a road graph (ROAD_GRAPH_PATH)"}
+        if not centers:
+            return {"error": f"No evacuation centers with coordinates for region: {region}"}
+        
+        self.sync_flood_overlays()
+        if origins:
+            located = geocoder.batch_geocode([o["location"] for o in origins], region)
+            unknown = [o["location"] for o, place in zip(origins, located) if place is None]
+            if unknown:
+                return {"error": f"Could not locate origins: {', '.join(unknown)}"}
+            points = [(place["lat"], place["lon"]) for place in located]
+            labels = [o["location"] for o in origins]
+            points = np.asarray(points, dtype=np.float64)
+            population = np.asarray([o["population"] for o in origins], dtype=np.float64)
+        elif population_grid.has_region(region):
+            lat, lon, population = population_grid.region_cells(region, cell_factor)
+            points = np.column_stack([lat, lon])
+            labels = [f"{a:.5f},{b:.5f}" for a, b in points]
+        else:
+            return {"error": f"No origins given and no population grid for region: {region}"}
+        
+        plan = evacuee_assignment.plan(region, self.graph, centers, labels, points, population)
+        return plan.summary(include_origins=bool(origins))
+    
+    @traced()
+    def update_center_capacity(self, region: str, center_name: str, capacity: int = None,
+                               occupancy: int = None) -> Dict[str, Any]:
+        """
+        Record a center filling up (or gaining room) and repair the region's
+        current assignment plan incrementally. Centers live in this process's
+        memory, so other API workers do not see the change.
+        """
+        center = evacuation_centers.get(region, center_name)
+        if center is None:
+            return {"error": f"Unknown evacuation center: {center_name}"}
+        if capacity is not None:
+            center["capacity"] = capacity
+        if occupancy is not None:
+            center["occupancy"] = occupancy
+        remaining = max(0, center["capacity"] - center.get("occupancy", 0))
+        
+        plan = evacuee_assignment.plans.get(region)
+        index = plan.center_index(center_name) if plan else None
+        if index is None:
+            return {"center": center_name, "remaining": remaining, "plan_updated": False}
+        
+        changes = plan.set_capacity(index, remaining)
+        return {
+            "center": center_name,
+            "remaining": remaining,
+            "plan_updated": True,
+            **changes,
+            "plan": plan.summary(include_origins=False)
+        }
+    
+    def _find_nearest_evacuation_center(self, origin_point: Optional[Tuple[float, float]],
+                                        region: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Closest open evacuation center (straight-line) that still has room,
+        taking the region's current assignment plan into account
+        """
+        if not origin_point:
+            return None
+        
+        plan = evacuee_assignment.plans.get(region)
+        remaining = {}
+        if plan is not None:
+            for k, load in enumerate(plan.load.tolist()):
+                remaining[plan.centers[k]["name"]] = int(plan.capacity[k]) - load
+        
+        def has_room(center: Dict[str, Any]) -> bool:
+            return remaining.get(center["name"], center.get("capacity", 0) - center.get("occupancy", 0)) > 0
+        
+        lat, lon = origin_point
+        nearest = evacuation_centers.nearest(lat, lon, k=1, region=region, open_only=True, predicate=has_room) \
+            or evacuation_centers.nearest(lat, lon, k=1, region=region)
+        return nearest[0] if nearest else None
+    
+    def _route_on_graph(self, origin: str, destination: str, origin_point: Tuple[float, float],
+                        destination_point: Tuple[float, float], zoom: int = None) -> Dict[str, Any]:
+        """
+        Route between two coordinates on the local road graph
+        """
+        source = self.graph.nearest_node(*origin_point)
+        target = self.graph.nearest_node(*destination_point)
+        
+        def compute():
+            # The hierarchy is built on base weights, so it only applies while no edge is flooded
+            if self.hierarchy is not None and not self.graph.cost_factors:
+                return self.hierarchy.shortest_path(source, target)
+            return self.graph.shortest_path(source, target)
+        
+        # Origins within the same small grid cell share a cached route
+        result = self._cached_path(("pair", origin_cell(*origin_point), target), compute)
+        if result is None:
+            return {"error": f"No route found from {origin} to {destination}"}
+        
+        duration_s, edges, cached = result
+        return self._build_route(origin, destination, source, edges, duration_s, cached, zoom)
+    
+    def _build_route(self, origin: str, destination: str, source: int, edges: List[int],
+                     duration_s: float, cached: bool = False, zoom: int = None) -> Dict[str, Any]:
+        """
+        Turn a path of edge ids into our route response format
+        
+        Geometry is gathered from the graph's coordinate arrays in one step
+        and returned as an encoded polyline, simplified for ``zoom`` if given.
+        """
+        graph = self.graph
+        if edges:
+            # A cached path may start from another node in the origin's cell
+            source = graph.edge_tail(edges[0])
+        nodes = graph.path_nodes(source, edges)
+        node_ids = np.asarray(nodes, dtype=np.int64)
+        distance_m = float(np.asarray(graph.length)[np.asarray(edges, dtype=np.int64)].sum()) if edges else 0.0
         
         return {
             "status": "success",
-            "distance": leg["distance"]["text"],
-            "duration": leg["duration"]["text"],
-            "start_address": leg["start_address"],
-            "end_address": leg["end_address"],
-            "steps": [step["html_instructions"] for step in leg["steps"]],
-            "polyline": route["overview_polyline"]["points"]
+            "distance": format_distance(distance_m),
+            "duration": format_duration(duration_s),
+            "distance_m": round(distance_m, 1),
+            "duration_s": round(float(duration_s), 1),
+            "start_address": origin,
+            "end_address": destination,
+            "steps": self._build_steps(edges, nodes),
+            "polyline": route_polyline(np.asarray(graph.node_lat)[node_ids], np.asarray(graph.node_lon)[node_ids], zoom),
+            "cached": cached
         }
     
+    def _build_steps(self, edges: List[int], nodes: List[int]) -> List[str]:
+        """
+        Group consecutive edges on the same road into turn-by-turn instructions
+        """
+        graph = self.graph
+        if not edges:
+            return ["Arrive at destination"]
+        
+        # Split the path into legs of consecutive edges sharing a road name
+        legs = []
+        for i, e in enumerate(edges):
+            name = graph.names[int(graph.edge_name[e])]
+            if legs and legs[-1]["name"] == name:
+                legs[-1]["length"] += float(graph.length[e])
+                legs[-1]["end"] = i
+            else:
+                legs.append({"name": name, "length": float(graph.length[e]), "start": i, "end": i})
+        
+        steps = []
+        for k, leg in enumerate(legs):
+            road = leg["name"] or "unnamed road"
+            if k == 0:
+                action = f"Head {self._compass(nodes[0], nodes[1])} on {road}"
+            else:
+                action = f"{self._turn(nodes, leg['start'])} onto {road}"
+            steps.append(f"{action} for {format_distance(leg['length'])}")
+        
+        steps.append("Arrive at destination")
+        return steps
+    
+    def _bearing(self, a: int, b: int) -> float:
+        graph = self.graph
+        lat1, lat2 = math.radians(graph.node_lat[a]), math.radians(graph.node_lat[b])
+        dlon = math.radians(graph.node_lon[b] - graph.node_lon[a])
+        y = math.sin(dlon) * math.cos(lat2)
+        x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+        return math.degrees(math.atan2(y, x)) % 360
+    
+    def _compass(self, a: int, b: int) -> str:
+        directions = ["north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest"]
+        return directions[int((self._bearing(a, b) + 22.5) // 45) % 8]
+    
+    def _turn(self, nodes: List[int], edge_index: int) -> str:
+        """
+        Describe the turn taken at the start of path edge ``edge_index``
+        """
+        before = self._bearing(nodes[edge_index - 1], nodes[edge_index])
+        after = self._bearing(nodes[edge_index], nodes[edge_index + 1])
+        delta = (after - before + 540) % 360 - 180
+        if delta > 135 or delta < -135:
+            return "Make a U-turn"
+        if delta > 30:
+            return "Turn right"
+        if delta < -30:
+            return "Turn left"
+        return "Continue"
+    
     def _get_mock_route(self, origin: str, destination: str) -> Dict[str, Any]:
         """
         Mock route data for development/testing
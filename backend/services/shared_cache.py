@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+import orjson
+from config import SHARED_CACHE_PATH, SHARED_CACHE_MAX_ENTRIES
+
+# Expired and surplus entries are purged once every this many writes
+PURGE_EVERY = 1000
+# How long a lookup or write on the event loop waits for another worker's
+# write; past that the database counts as busy and the call as a miss
+BUSY_TIMEOUT_MS = 5
+# update() runs in worker threads and must not lose a write, so it waits longer
+UPDATE_TIMEOUT_MS = 2000
+# Keys under this prefix hold shared state rather than cached values: the
+# size bound never evicts them
+PINNED_PREFIX = "state:"
+
+
+class SharedCache:
+    """
+    Key-value cache shared by every API worker process on the host.
+
+    Entries live in a SQLite file in WAL mode, so reads never wait for
+    writers and a value one worker computes is a local read for all the
+    others. Lookups take tens of microseconds, which is cheap enough to run
+    on the event loop, and wait at most BUSY_TIMEOUT_MS for a writer in
+    another process before giving up as a miss. Values are JSON documents
+    with an optional expiry.
+    When SHARED_CACHE_PATH is unset, or the file cannot be used, every
+    lookup misses and each process relies on its own caches.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path if path is not None else SHARED_CACHE_PATH
+        self.max_entries = max_entries or SHARED_CACHE_MAX_ENTRIES
+        # sqlite3 connections may not be shared between threads
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.busy = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Setup may wait for another worker creating the file
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_stored_at ON cache(stored_at)")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        (value, unix time it was stored) or None when missing or expired
+        """
+        if not self.enabled:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT value, stored_at FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(row[0]), row[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float = None):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            self._store(conn, key, value, now, ttl_seconds)
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def update(self, key: str, fn: Callable[[Optional[Any]], Any], ttl_seconds: float = None) -> Optional[Any]:
+        """
+        Atomically replace the value at key with fn(current value, or None)
+        and return the new value; None when the cache is off or the write
+        failed. Holds the write lock across the read, so concurrent updates
+        from other workers are never lost. May wait up to UPDATE_TIMEOUT_MS:
+        call it from a worker thread, not the event loop.
+        """
+        if not self.enabled:
+            return None
+        conn = self._connection()
+        try:
+            conn.execute(f"PRAGMA busy_timeout={UPDATE_TIMEOUT_MS}")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+                ).fetchone()
+                value = fn(orjson.loads(row[0]) if row is not None else None)
+                self._store(conn, key, value, now, ttl_seconds)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return value
+        except sqlite3.Error as e:
+            self._failed("write", e)
+            return None
+        finally:
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+    def _store(self, conn: sqlite3.Connection, key: str, value: Any, now: float, ttl_seconds: Optional[float]):
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, orjson.dumps(value), now, now + ttl_seconds if ttl_seconds else None)
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self._purge(conn, now)
+
+    def delete(self, key: str):
+        if not self.enabled:
+            return
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        # Over the size bound: drop the oldest cached values
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE key NOT LIKE ? "
+            "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (PINNED_PREFIX + "%", self.max_entries)
+        )
+
+    def _failed(self, operation: str, error: Exception):
+        if isinstance(error, sqlite3.OperationalError) and "locked" in str(error):
+            # Another worker is writing: a miss, not a fault
+            self.busy += 1
+            self.misses += operation == "read"
+            return
+        self.errors += 1
+        if self.errors == 1 or self.errors % 1000 == 0:
+            print(f"⚠️ Shared cache {operation} failed ({self.errors} so far): {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "busy": self.busy,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+# Create a global instance
+shared_cache = SharedCache()
@@ -1,5 +1,7 @@
-from twilio.rest import Client
 from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+from metrics import upstream_timer
+from providers import Provider
+from tracing import traced
 
 class SMSService:
     """
@@ -17,6 +19,8 @@ class SMSService:
             self.account_sid != "your-account-sid-here" and 
             self.auth_token != "your-auth-token-here"):
             try:
+                # The Twilio SDK is only imported when SMS is configured
+                from twilio.rest import Client
                 self.client = Client(self.account_sid, self.auth_token)
                 print("✅ Twilio SMS service initialized successfully")
             except Exception as e:
@@ -24,6 +28,7 @@ class SMSService:
         else:
             print("⚠️  Twilio credentials not configured - SMS will be simulated")
     
+    @traced()
     def send_sms(self, phone: str, message: str, from_number: str = None) -> bool:
         """
         Send SMS to a phone number (for demo purposes, always sends to Twilio number)
@@ -45,11 +50,12 @@ class SMSService:
             # For demo purposes, always send to the Twilio number
             demo_message = f"[DEMO - Originally for {phone}] {message}"
             
-            message = self.client.messages.create(
-                body=demo_message,
-                from_=from_number or self.from_number,
-                to=self.from_number  # Always send to Twilio number for demo
-            )
+            with upstream_timer("twilio", "send_sms"):
+                message = self.client.messages.create(
+                    body=demo_message,
+                    from_=from_number or self.from_number,
+                    to=self.from_number  # Always send to Twilio number for demo
+                )
             
             print(f"SMS sent successfully to {self.from_number} (demo). SID: {message.sid}")
             return True
@@ -58,6 +64,7 @@ class SMSService:
             print(f"Failed to send SMS to {self.from_number}: {e}")
             return False
     
+    @traced()
     def send_bulk_sms(self, phone_numbers: list, message: str) -> dict:
         """
         Send SMS to multiple phone numbers (for demo purposes, sends to Twilio number)
@@ -85,5 +92,5 @@ class SMSService:
         
         return results
 
-# Create a global instance
-sms_service = SMSService()
+# Global instance, built (with its Twilio client) when an SMS is first sent
+sms_service = Provider("sms", SMSService)
@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import (TRACE_SAMPLE_RATE, TRACE_HONOR_PARENT, TRACE_EXPORT_PATH, TRACE_EXPORT_MAX_BYTES,
+                    TRACE_COLLECTOR_URL, TRACE_SERVICE_NAME)
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Finished traces waiting for the exporter; traces beyond this are dropped
+EXPORT_QUEUE_SIZE = 1000
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "tags", "timestamp_us", "duration_us", "_start")
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, kind: str = None,
+                 tags: Dict[str, Any] = None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.tags = tags or {}
+        self.timestamp_us = int(time.time() * 1_000_000)
+        self.duration_us: Optional[int] = None
+        self._start = time.perf_counter()
+
+    def finish(self):
+        self.duration_us = max(1, int((time.perf_counter() - self._start) * 1_000_000))
+
+    def to_zipkin(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": self.timestamp_us,
+            "duration": self.duration_us,
+            "localEndpoint": {"serviceName": TRACE_SERVICE_NAME},
+            "tags": {k: str(v) for k, v in self.tags.items()}
+        }
+        if self.parent_id:
+            span["parentId"] = self.parent_id
+        if self.kind:
+            span["kind"] = self.kind
+        return span
+
+
+class Trace:
+    """
+    The spans of one sampled request. Spans are appended from the event
+    loop and from worker threads alike (list.append is atomic).
+    """
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+
+
+# Innermost open span of the current request (None when not sampled)
+_current: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str, kind: str = None, **tags):
+    """
+    Time a block as a child of the current span. Outside a sampled request
+    this only costs a context variable lookup.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace_id, name, parent.span_id, kind, tags)
+    _trace.get().spans.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.tags["error"] = str(e) or type(e).__name__
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def traced(name: str = None):
+    """
+    Decorator: run every call of a function or coroutine in its own span,
+    named after the method (``RoutingService.get_evacuation_route``) by default
+    """
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TraceExporter:
+    """
+    Writes finished traces from a background thread so exporting never adds
+    to request latency: appended to TRACE_EXPORT_PATH as one JSON array of
+    Zipkin v2 spans per line, and/or POSTed to TRACE_COLLECTOR_URL. The file
+    is rotated to a single ".1" backup once it reaches TRACE_EXPORT_MAX_BYTES.
+    """
+
+    def __init__(self, path: str = None, collector_url: str = None, max_bytes: int = None):
+        self.path = path if path is not None else TRACE_EXPORT_PATH
+        self.max_bytes = max_bytes or TRACE_EXPORT_MAX_BYTES
+        self.collector_url = collector_url if collector_url is not None else TRACE_COLLECTOR_URL
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path or self.collector_url)
+
+    def submit(self, trace: Trace):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        client = None
+        if self.collector_url:
+            import httpx
+            client = httpx.Client(timeout=5)
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [[s.to_zipkin() for s in trace.spans] for trace in batch]
+            try:
+                if self.path:
+                    self._rotate()
+                    with open(self.path, "a") as f:
+                        for spans in traces:
+                            f.write(json.dumps(spans, separators=(",", ":")) + "\n")
+                if client is not None:
+                    client.post(self.collector_url, json=[s for spans in traces for s in spans]).raise_for_status()
+                self.exported += len(batch)
+            except Exception as e:
+                print(f"⚠️ Trace export failed: {e}")
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+        except FileNotFoundError:
+            pass
+
+
+class TracingMiddleware:
+    """
+    Traces a sample of requests (TRACE_SAMPLE_RATE) from the first byte
+    received to the last byte sent. An incoming traceparent header only
+    lends its ids, so traces join the caller's; it bypasses the sample rate
+    only with TRACE_HONOR_PARENT, as clients could otherwise force tracing
+    of every request.
+    Service calls made while handling the request, including those run in
+    worker threads, become child spans. Sampled responses carry a
+    traceparent header with the trace id.
+    """
+
+    def __init__(self, app: ASGIApp, fastapi_app=None, sample_rate: float = None, exporter: TraceExporter = None,
+                 honor_parent: bool = None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.honor_parent = TRACE_HONOR_PARENT if honor_parent is None else honor_parent
+        self.exporter = exporter or trace_exporter
+
+    def _sample(self, scope: Scope) -> Optional[Span]:
+        match = TRACEPARENT.match(Headers(scope=scope).get("traceparent", ""))
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            if not int(flags, 16) & 1:
+                # The caller is not tracing this request
+                return None
+            sampled = self.honor_parent or random.random() < self.sample_rate
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        from metrics import route_template
+        route = route_template(self.fastapi_app, scope)
+        return Span(trace_id, f"{scope['method']} {route}", parent_id, "SERVER",
+                    {"http.method": scope["method"], "http.route": route, "http.path": scope["path"]})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.exporter.enabled:
+            await self.app(scope, receive, send)
+            return
+        root = self._sample(scope)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(root.trace_id)
+        trace.spans.append(root)
+
+        async def send_traced(message: Message):
+            if message["type"] == "http.response.start":
+                root.tags["http.status_code"] = message["status"]
+                # Time to first byte: the rest is spent streaming the body
+                root.tags["ttfb_ms"] = round((time.perf_counter() - root._start) * 1000, 3)
+                MutableHeaders(scope=message)["traceparent"] = f"00-{root.trace_id}-{root.span_id}-01"
+            await send(message)
+
+        trace_token, span_token = _trace.set(trace), _current.set(root)
+        try:
+            await self.app(scope, receive, send_traced)
+        except Exception as e:
+            root.tags["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            root.finish()
+            _current.reset(span_token)
+            _trace.reset(trace_token)
+            self.exporter.submit(trace)
+
+
+class TracedORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse whose body rendering is a span of its own
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return super().render(content)
+
+
+# Create a global instance
+trace_exporter = TraceExporter()
@@ -10,9 +10,21 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchDashboardData();
-    // Refresh data every 30 seconds
-    const interval = setInterval(fetchDashboardData, 30000);
-    return () => clearInterval(interval);
+
+    // The server pushes stats changes and new predictions; no polling needed
+    if (typeof EventSource === 'undefined') {
+      const interval = setInterval(fetchDashboardData, 30000);
+      return () => clearInterval(interval);
+    }
+    return apiService.subscribeDashboardEvents({
+      stats: (changes) => setStats((current) => ({ ...current, ...changes })),
+      prediction: (prediction) =>
+        setRecentPredictions((current) =>
+          [prediction, ...current.filter((p) => p.id !== prediction.id)].slice(0, 10)
+        ),
+      // EventSource reconnects by itself; the first event after that is a full stats snapshot
+      error: () => console.warn('Live dashboard updates interrupted, reconnecting...'),
+    });
   }, []);
 
   const fetchDashboardData = async () => {
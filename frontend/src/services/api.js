@@ -33,6 +33,13 @@ api.interceptors.response.use(
   }
 );
 
+const pageParams = (limit, cursor, fields) => {
+  const params = { limit };
+  if (cursor) params.cursor = cursor;
+  if (fields) params.fields = fields;
+  return params;
+};
+
 // API functions
 export const apiService = {
   // Health check
@@ -41,6 +48,19 @@ export const apiService = {
   // Dashboard stats
   getDashboardStats: () => api.get('/dashboard/stats'),
   
+  // Live dashboard updates (server-sent events); returns a function that closes the stream
+  subscribeDashboardEvents: (handlers) => {
+    const source = new EventSource(`${api.defaults.baseURL}/dashboard/events`);
+    Object.entries(handlers).forEach(([type, handler]) => {
+      if (type === 'error') {
+        source.onerror = handler;
+      } else {
+        source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+      }
+    });
+    return () => source.close();
+  },
+  
   // Predictions
   getPrediction: (region, lat = null, lon = null) => {
     const params = {};
@@ -49,11 +69,13 @@ export const apiService = {
     return api.get(`/predictions/${region}`, { params });
   },
   
-  getPredictionHistory: (region, limit = 10) => 
-    api.get(`/predictions/history/${region}`, { params: { limit } }),
+  // History endpoints page with the next_cursor of the previous response;
+  // fields is an optional comma-separated column list
+  getPredictionHistory: (region, limit = 10, cursor = null, fields = null) => 
+    api.get(`/predictions/history/${region}`, { params: pageParams(limit, cursor, fields) }),
   
-  getAllRecentPredictions: (limit = 20) => 
-    api.get('/predictions', { params: { limit } }),
+  getAllRecentPredictions: (limit = 20, cursor = null, fields = null) => 
+    api.get('/predictions', { params: pageParams(limit, cursor, fields) }),
   
   // Alerts
   sendAlert: (userId, message) => 
@@ -66,11 +88,11 @@ export const apiService = {
       severity_threshold: severityThreshold 
     }),
   
-  getAlertHistory: (userId, limit = 10) => 
-    api.get(`/alerts/history/${userId}`, { params: { limit } }),
+  getAlertHistory: (userId, limit = 10, cursor = null, fields = null) => 
+    api.get(`/alerts/history/${userId}`, { params: pageParams(limit, cursor, fields) }),
   
-  getRecentAlerts: (limit = 50) => 
-    api.get('/alerts', { params: { limit } }),
+  getRecentAlerts: (limit = 50, cursor = null, fields = null) => 
+    api.get('/alerts', { params: pageParams(limit, cursor, fields) }),
   
   // Routes
   getEvacuationRoute: (origin, destination = null, region = null) => 
@@ -38,8 +38,13 @@ create table if not exists public.resources (
 );
 
 -- Helpful indexes
-create index if not exists idx_predictions_region_created_at on public.predictions(region, created_at desc);
-create index if not exists idx_alerts_user_id_sent_at on public.alerts(user_id, sent_at desc);
+-- History endpoints page by (created_at, id) / (sent_at, id), newest first
+drop index if exists public.idx_predictions_region_created_at;
+drop index if exists public.idx_alerts_user_id_sent_at;
+create index if not exists idx_predictions_region_created_at_id on public.predictions(region, created_at desc, id desc);
+create index if not exists idx_predictions_created_at_id on public.predictions(created_at desc, id desc);
+create index if not exists idx_alerts_user_id_sent_at_id on public.alerts(user_id, sent_at desc, id desc);
+create index if not exists idx_alerts_sent_at_id on public.alerts(sent_at desc, id desc);
 create index if not exists idx_resources_region on public.resources(region);
 
 -- RLS (optional for service role usage; keep disabled or add policies)